@@ -28,6 +28,8 @@ CHAT_READ_INTERVAL = 30
 """Interval in seconds to read chat messages."""
 CHAT_WRITE_INTERVAL = 60
 """Interval in seconds to write chat messages."""
+LIVE_CHAT_POLL_CONCURRENCY = 8
+"""Maximum number of active streams whose live chats are polled concurrently."""
 CONVERSATION_CONTEXT = 3
 """Number of previous messages to include in the conversation context."""
 START_STREAM_APPEND = f"\n\nFetching buzz in {CHAT_READ_INTERVAL} seconds..."
@@ -229,10 +231,14 @@ YOUTUBE_URL_REGEX = r"(https?://)?(www\.)?(youtube\.com|youtu\.be)/[a-zA-Z0-9_\-
 
     This regular expression is used to validate YouTube URLs.
 """
-ALLOWED_DOMAINS = ["youtube.com", "www.youtube.com", "youtu.be"]
+SHORT_YOUTUBE_DOMAINS = frozenset({"youtu.be", "www.youtu.be"})
+"""Domains of shortened YouTube URLs, where the video ID is the path."""
+LONG_YOUTUBE_DOMAINS = frozenset({"youtube.com", "www.youtube.com", "m.youtube.com"})
+"""Domains of standard YouTube URLs, with the video ID in the query or embed path."""
+ALLOWED_DOMAINS = SHORT_YOUTUBE_DOMAINS | LONG_YOUTUBE_DOMAINS
 """Allowed domains for YouTube URLs.
 
-    This list specifies the valid domains for YouTube URLs.
+    This set specifies the valid domains for YouTube URLs, matched exactly.
 """
 YOUTUBE_API_ENDPOINT = "https://www.googleapis.com/youtube/v3/videos"
 """Endpoint for YouTube API videos.
@@ -245,7 +251,55 @@ YOUTUBE_LIVE_API_ENDPOINT = "https://www.googleapis.com/youtube/v3/liveChat/mess
     This string defines the API endpoint for retrieving live chat messages from YouTube.
 """
 OAUTH_TOKEN_URI = "https://oauth2.googleapis.com/token"
+OAUTH_TOKEN_REFRESH_MARGIN = 300
+"""Seconds before expiry at which a cached OAuth access token is refreshed."""
+OAUTH_REFRESH_FAILURE_COOLDOWN = 60.0
+"""Seconds a key is skipped after its OAuth access token could not be refreshed."""
 YOUTUBE_SSL = "https://www.googleapis.com/auth/youtube.force-ssl"
+YOUTUBE_CONNECT_TIMEOUT = 3.0
+"""Seconds to wait for a connection to the YouTube API before trying the next key."""
+YOUTUBE_READ_TIMEOUT = 10.0
+"""Seconds to wait for the YouTube API to send, accept or pool a request."""
+YOUTUBE_CALL_BUDGET = 20.0
+"""Wall-clock seconds a YouTube API call may spend across all of its retries."""
+YOUTUBE_HEDGE_DELAY = 1.5
+"""Seconds to wait on a YouTube API GET before racing it with the next key."""
+YOUTUBE_HTTP_LIMITS = {
+    "max_connections": 64,
+    "max_keepalive_connections": 16,
+    "keepalive_expiry": 60,
+}
+"""Connection pool limits of the shared HTTP client used for YouTube API calls.
+
+    Keeping connections alive avoids a TCP and TLS handshake with googleapis.com on
+    every poll.
+"""
+YOUTUBE_RETRY_BASE_DELAY = 1.0
+"""Base delay in seconds for the exponential backoff between YouTube API retries."""
+YOUTUBE_RETRY_MAX_DELAY = 15.0
+"""Upper bound in seconds for the backoff delay between YouTube API retries."""
+YOUTUBE_RETRYABLE_STATUSES = frozenset({403, 429, 500, 502, 503, 504})
+"""HTTP status codes worth retrying with the next API key.
+
+    403 covers per-key quota errors; any other non-200 status is treated as terminal.
+"""
+YOUTUBE_KEY_DAILY_QUOTA = 10_000
+"""Default daily YouTube Data API quota of the project behind each key, in units."""
+YOUTUBE_KEY_BUCKET_CAPACITY = YOUTUBE_KEY_DAILY_QUOTA
+"""Burst size, in quota units, of the token bucket kept for each YouTube API key."""
+YOUTUBE_KEY_BUCKET_REFILL_PER_SEC = YOUTUBE_KEY_DAILY_QUOTA / 86_400
+"""Quota units refilled per second for each key, spreading its daily quota over a day."""
+YOUTUBE_QUOTA_COSTS = {
+    ("GET", YOUTUBE_API_ENDPOINT): 1,
+    ("GET", YOUTUBE_LIVE_API_ENDPOINT): 5,
+    ("POST", YOUTUBE_LIVE_API_ENDPOINT): 50,
+}
+"""Quota units charged per YouTube API call, keyed by HTTP method and endpoint.
+
+    Calls not listed are charged 1 unit, the cost of most list methods.
+"""
+YOUTUBE_RATE_LIMIT_COOLDOWN = 60.0
+"""Seconds a key is skipped after a short-lived `rateLimitExceeded` error."""
 
 # Supabase setup constants
 SUPABASE_CLIENT = create_client(
@@ -255,6 +309,16 @@ SUPABASE_CLIENT = create_client(
 
     This instance of the Supabase client is configured to interact with the Supabase database.
 """
+SUPABASE_RETRIES = 3
+"""Number of attempts for a Supabase query failing with a transient error.
+
+    Only connection-level failures (timeouts, resets, pooler failovers) are retried,
+    and for writes only those raised before the request reached the server.
+"""
+SUPABASE_RETRY_BASE_DELAY = 0.1
+"""Base delay in seconds for the exponential backoff between Supabase retries."""
+SUPABASE_RETRY_MAX_DELAY = 2.0
+"""Upper bound in seconds for the backoff delay between Supabase retries."""
 
 # Table names
 MESSAGES = "messages"
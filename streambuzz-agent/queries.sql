@@ -13,6 +13,26 @@ create index IF not exists idx_messages_session_id on messages using btree (sess
 create index IF not exists idx_messages_created_at on messages using btree (created_at) TABLESPACE pg_default;
 alter publication supabase_realtime add table messages;
 
+-- Create a function to fetch the latest messages of a session in chronological order
+create function fetch_conversation_history (
+  user_session_id text,
+  message_count int default 10
+) returns table (
+  message jsonb
+)
+language sql
+as $$
+  select message
+  from (
+    select message, created_at
+    from messages
+    where session_id = user_session_id
+    order by created_at desc
+    limit message_count
+  ) latest
+  order by created_at asc;
+$$;
+
 -- RAG knowledge
 create extension if not exists vector;
 
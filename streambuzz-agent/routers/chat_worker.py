@@ -8,7 +8,7 @@ from fastapi import APIRouter
 
 from agents.buzz_intern import buzz_intern_agent
 from agents.responder import responder_agent
-from constants.constants import YOUTUBE_LIVE_API_ENDPOINT
+from constants.constants import LIVE_CHAT_POLL_CONCURRENCY, YOUTUBE_LIVE_API_ENDPOINT
 from constants.enums import BuzzStatusEnum
 from constants.prompts import CHAT_ANALYSER_PROMPT, REPLY_SUMMARISER_PROMPT
 from logger import log_method
@@ -174,26 +174,25 @@ async def process_chat_messages(chat_list: List[Dict[str, str]], session_id: str
             print(f"Error processing chat: {chat_intent}. Exception: {e}")
 
 
-@log_method
-async def process_active_streams(active_streams: List[Dict[str, Any]]):
+async def process_active_stream(stream: Dict[str, Any], semaphore: asyncio.Semaphore):
     """
-    Processes all active streams.
+    Processes a single active stream.
 
-    This function iterates through a list of active streams, fetches the latest
-    chat messages for each stream using the YouTube API, and then processes the
-    chat messages. If any error occurs during the processing of a stream,
-    it logs the error along with the stream that caused the error.
+    This function fetches the latest chat messages for the stream using the
+    YouTube API and then processes the chat messages. If any error occurs, it
+    logs the error along with the stream that caused the error.
 
     Args:
-        active_streams (List[Dict[str, Any]]): A list of dictionaries, where each
-            dictionary represents an active stream and contains at least the keys
-            'session_id', 'live_chat_id', and 'next_chat_page'.
+        stream (Dict[str, Any]): A dictionary representing an active stream,
+            containing at least the keys 'session_id', 'live_chat_id', and
+            'next_chat_page'.
+        semaphore (asyncio.Semaphore): Bounds the number of streams polled at once.
 
     Raises:
-        Exception: If an error occurs during the processing of a stream,
+        Exception: If an error occurs during the processing of the stream,
             the exception is caught, logged, and not re-raised.
     """
-    for stream in active_streams:
+    async with semaphore:
         try:
             session_id, live_chat_id, next_chat_page = (
                 stream["session_id"],
@@ -213,6 +212,27 @@ async def process_active_streams(active_streams: List[Dict[str, Any]]):
             print(f"Error processing stream: {stream}. Exception: {e}")
 
 
+@log_method
+async def process_active_streams(active_streams: List[Dict[str, Any]]):
+    """
+    Processes all active streams.
+
+    This function polls the live chats of all active streams concurrently,
+    bounded by `LIVE_CHAT_POLL_CONCURRENCY`, so one slow stream no longer
+    delays the others. Each stream is handled by `process_active_stream`,
+    which logs and swallows its own errors.
+
+    Args:
+        active_streams (List[Dict[str, Any]]): A list of dictionaries, where each
+            dictionary represents an active stream and contains at least the keys
+            'session_id', 'live_chat_id', and 'next_chat_page'.
+    """
+    semaphore = asyncio.Semaphore(LIVE_CHAT_POLL_CONCURRENCY)
+    await asyncio.gather(
+        *(process_active_stream(stream, semaphore) for stream in active_streams)
+    )
+
+
 @log_method
 async def read_live_chats():
     """
@@ -15,6 +15,7 @@ from exceptions.user_error import UserError
 from models.agent_models import AgentRequest, AgentResponse
 from routers import chat_worker
 from routers.chat_worker import read_live_chats, write_live_chats
+from utils.youtube_util import close_http_client
 from utils.supabase_util import (fetch_conversation_history,
                                  fetch_human_session_history, store_message)
 
@@ -70,6 +71,9 @@ async def lifespan(_: FastAPI):
     scheduler.shutdown()
     print("Scheduler shut down...")
 
+    # Release pooled YouTube API connections
+    await close_http_client()
+
 
 # Create FastAPI app and pass the lifespan function
 app = FastAPI(lifespan=lifespan)
@@ -0,0 +1,68 @@
+import asyncio
+import time
+
+
+class TokenBucket:
+    """
+    Asyncio-compatible token bucket used for client-side rate limiting.
+
+    The bucket holds up to `capacity` tokens and refills continuously at
+    `refill_per_sec` tokens per second. Callers take tokens with `acquire`,
+    waiting for the bucket to refill when it runs dry, which smooths the
+    request rate instead of reacting to failures after the fact.
+
+    Tokens are reserved before waiting: a caller finding the bucket short takes
+    its tokens on credit and sleeps until they are refilled, so callers are
+    served in arrival order and nobody waits behind another caller's sleep.
+    """
+
+    def __init__(self, capacity: float, refill_per_sec: float) -> None:
+        """
+        Initializes a full token bucket.
+
+        Args:
+            capacity: The maximum number of tokens the bucket can hold.
+            refill_per_sec: The number of tokens added back every second.
+        """
+        self.capacity = capacity
+        self.refill_per_sec = refill_per_sec
+        self._tokens = capacity
+        self._updated_at = time.monotonic()
+
+    def _refill(self) -> None:
+        """Adds the tokens accumulated since the last update, up to `capacity`."""
+        now = time.monotonic()
+        self._tokens = min(
+            self.capacity, self._tokens + (now - self._updated_at) * self.refill_per_sec
+        )
+        self._updated_at = now
+
+    @property
+    def available(self) -> float:
+        """The number of tokens that can be taken right now, negative while in debt."""
+        self._refill()
+        return self._tokens
+
+    async def acquire(self, tokens: float = 1.0) -> None:
+        """
+        Takes `tokens` from the bucket, waiting until enough have been refilled.
+
+        Args:
+            tokens: The number of tokens to take. Defaults to 1.
+        """
+        # No await between the refill and the reservation, so no lock is needed
+        self._refill()
+        self._tokens -= tokens
+        if self._tokens >= 0:
+            return
+        try:
+            await asyncio.sleep(-self._tokens / self.refill_per_sec)
+        except asyncio.CancelledError:
+            # Give back the reservation of a caller that stopped waiting
+            self._tokens += tokens
+            raise
+
+    def drain(self) -> None:
+        """Empties the bucket, e.g. after the upstream reported exhausted quota."""
+        self._refill()
+        self._tokens = min(self._tokens, 0.0)
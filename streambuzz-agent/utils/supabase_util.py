@@ -1,13 +1,19 @@
+import asyncio
+import random
+from operator import itemgetter
 from typing import Any, Dict, List, Optional
 
+import httpx
 from dotenv import load_dotenv
 from fastapi import HTTPException
 from pydantic_ai.messages import (ModelRequest, ModelResponse, TextPart,
                                   UserPromptPart)
 
 from constants.constants import (CONVERSATION_CONTEXT, MESSAGES, MODEL_RETRIES,
-                                 STREAMER_KB, SUPABASE_CLIENT, YT_BUZZ,
-                                 YT_REPLY, YT_STREAMS)
+                                 STREAMER_KB, SUPABASE_CLIENT,
+                                 SUPABASE_RETRIES, SUPABASE_RETRY_BASE_DELAY,
+                                 SUPABASE_RETRY_MAX_DELAY, YT_BUZZ, YT_REPLY,
+                                 YT_STREAMS)
 from constants.enums import BuzzStatusEnum, StateEnum
 from models.agent_models import ProcessedChunk
 from models.youtube_models import (StreamBuzzModel, StreamMetadataDB,
@@ -16,6 +22,54 @@ from models.youtube_models import (StreamBuzzModel, StreamMetadataDB,
 # Load environment variables
 load_dotenv()
 
+_get_type_and_content = itemgetter("type", "content")
+"""Extracts the `type` and `content` of a stored message in a single call."""
+
+
+_UNSENT_REQUEST_ERRORS = (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout)
+"""Transport errors raised before a request reaches the server, safe to retry for writes."""
+
+
+async def _execute(query, idempotent: bool = False):
+    """Executes a Supabase query off the event loop, retrying transient failures.
+
+    supabase-py performs blocking HTTP calls, so the query runs in a worker
+    thread via `asyncio.to_thread` to let other coroutines progress meanwhile.
+    Connection resets, timeouts and pooler failovers surface as
+    `httpx.TransportError` and usually succeed on a second attempt, so they are
+    retried with exponential backoff and full jitter. Any other error is raised
+    immediately so the caller can convert it into an `HTTPException`.
+
+    A write may already be committed when its response is lost to a read
+    timeout or a dropped connection, and repeating it would insert or update
+    rows twice. Unless the query is `idempotent`, only the failures raised
+    before the request reached the server are retried.
+
+    Args:
+        query: A Supabase query builder, ready to be executed.
+        idempotent: Whether the query can safely run more than once, e.g. a
+            select or a read-only rpc. Defaults to False.
+
+    Returns:
+        The response of the executed query.
+
+    Raises:
+        httpx.TransportError: If the query still fails after `SUPABASE_RETRIES`
+        attempts, or fails in a way that cannot be retried.
+    """
+    retryable = httpx.TransportError if idempotent else _UNSENT_REQUEST_ERRORS
+    for attempt in range(1, SUPABASE_RETRIES + 1):
+        try:
+            return await asyncio.to_thread(query.execute)
+        except retryable as e:
+            if attempt == SUPABASE_RETRIES:
+                raise
+            delay = min(
+                SUPABASE_RETRY_MAX_DELAY, SUPABASE_RETRY_BASE_DELAY * 2 ** (attempt - 1)
+            )
+            print(f"Supabase attempt {attempt} failed: {str(e)}. Retrying...")
+            await asyncio.sleep(random.uniform(0, delay))
+
 
 # MESSAGES table queries
 async def fetch_human_session_history(session_id: str, limit: int = 10) -> list[str]:
@@ -39,13 +93,13 @@ async def fetch_human_session_history(session_id: str, limit: int = 10) -> list[
         status code and error details.
     """
     try:
-        response = (
+        response = await _execute(
             SUPABASE_CLIENT.table(MESSAGES)
             .select("*")
             .eq("session_id", session_id)
             .order("created_at", desc=True)
-            .limit(limit)
-            .execute()
+            .limit(limit),
+            idempotent=True,
         )
 
         messages = []
@@ -65,11 +119,11 @@ async def fetch_conversation_history(
 ) -> list[ModelRequest | ModelResponse]:
     """Fetches the most recent conversation history for a given session.
 
-    This function retrieves a specified number of the most recent messages from the
-    `MESSAGES` table in Supabase, ordering them by creation time in descending
-    order. It then converts the messages into a list of `ModelRequest` or
-    `ModelResponse` objects, based on the message type ("human" or other). The
-    list is returned in chronological order (oldest to newest).
+    This function uses the `fetch_conversation_history` RPC function in Supabase
+    to retrieve a specified number of the most recent messages from the `MESSAGES`
+    table, already sorted in chronological order (oldest to newest). It then
+    converts the messages into a list of `ModelRequest` or `ModelResponse`
+    objects, based on the message type ("human" or other).
 
     Args:
         session_id: The unique identifier of the session.
@@ -84,31 +138,23 @@ async def fetch_conversation_history(
         status code and error details.
     """
     try:
-        response = (
-            SUPABASE_CLIENT.table(MESSAGES)
-            .select("*")
-            .eq("session_id", session_id)
-            .order("created_at", desc=True)
-            .limit(limit)
-            .execute()
+        response = await _execute(
+            SUPABASE_CLIENT.rpc(
+                "fetch_conversation_history",
+                {"user_session_id": session_id, "message_count": limit},
+            ),
+            idempotent=True,
         )
 
-        # Convert to list and reverse to get chronological order
-        conversation_history = response.data[::-1]
-
         # Convert conversation history to format expected by Pydantic AI
-        messages = []
-        for msg in conversation_history:
-            msg_data = msg["message"]
-            msg_type = msg_data["type"]
-            msg_content = msg_data["content"]
-            msg = (
-                ModelRequest(parts=[UserPromptPart(content=msg_content)])
-                if msg_type == "human"
-                else ModelResponse(parts=[TextPart(content=msg_content)])
+        return [
+            ModelRequest(parts=[UserPromptPart(content=msg_content)])
+            if msg_type == "human"
+            else ModelResponse(parts=[TextPart(content=msg_content)])
+            for msg_type, msg_content in (
+                _get_type_and_content(row["message"]) for row in response.data
             )
-            messages.append(msg)
-        return messages
+        ]
     except Exception as e:
         print(f"Error>> Failed at supabase_util: {str(e)}")
         raise HTTPException(
@@ -139,9 +185,11 @@ async def store_message(
         message_obj["data"] = data
 
     try:
-        SUPABASE_CLIENT.table(MESSAGES).insert(
-            {"session_id": session_id, "message": message_obj}
-        ).execute()
+        await _execute(
+            SUPABASE_CLIENT.table(MESSAGES).insert(
+                {"session_id": session_id, "message": message_obj}
+            )
+        )
     except Exception as e:
         print(f"Error>> Failed at supabase_util: {str(e)}")
         raise HTTPException(
@@ -166,11 +214,11 @@ async def get_active_streams() -> List[Dict[str, Any]]:
         status code and error details.
     """
     try:
-        response = (
+        response = await _execute(
             SUPABASE_CLIENT.table(YT_STREAMS)
             .select("session_id, live_chat_id, next_chat_page")
-            .eq("is_active", StateEnum.YES.value)
-            .execute()
+            .eq("is_active", StateEnum.YES.value),
+            idempotent=True,
         )
         return response.data
     except Exception as e:
@@ -199,12 +247,12 @@ async def get_active_stream(session_id: str) -> Optional[StreamMetadataDB]:
         status code and error details.
     """
     try:
-        response = (
+        response = await _execute(
             SUPABASE_CLIENT.table(YT_STREAMS)
             .select("*")
             .eq("session_id", session_id)
-            .eq("is_active", StateEnum.YES.value)
-            .execute()
+            .eq("is_active", StateEnum.YES.value),
+            idempotent=True,
         )
         if not response.data:
             return None
@@ -237,15 +285,17 @@ async def start_stream(stream_metadata_db: StreamMetadataDB):
         status code and error details.
     """
     try:
-        SUPABASE_CLIENT.table(YT_STREAMS).insert(
-            {
-                "session_id": stream_metadata_db.session_id,
-                "video_id": stream_metadata_db.video_id,
-                "live_chat_id": stream_metadata_db.live_chat_id,
-                "next_chat_page": stream_metadata_db.next_chat_page,
-                "is_active": stream_metadata_db.is_active,
-            }
-        ).execute()
+        await _execute(
+            SUPABASE_CLIENT.table(YT_STREAMS).insert(
+                {
+                    "session_id": stream_metadata_db.session_id,
+                    "video_id": stream_metadata_db.video_id,
+                    "live_chat_id": stream_metadata_db.live_chat_id,
+                    "next_chat_page": stream_metadata_db.next_chat_page,
+                    "is_active": stream_metadata_db.is_active,
+                }
+            )
+        )
     except Exception as e:
         print(f"Error>> Failed at supabase_util: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Failed to start_stream: {str(e)}")
@@ -265,9 +315,11 @@ async def deactivate_existing_streams(session_id: str):
         status code and error details.
     """
     try:
-        SUPABASE_CLIENT.table(YT_STREAMS).update({"is_active": StateEnum.NO.value}).eq(
-            "session_id", session_id
-        ).execute()
+        await _execute(
+            SUPABASE_CLIENT.table(YT_STREAMS)
+            .update({"is_active": StateEnum.NO.value})
+            .eq("session_id", session_id)
+        )
     except Exception as e:
         print(f"Error>> Failed at supabase_util: {str(e)}")
         raise HTTPException(
@@ -291,9 +343,12 @@ async def update_next_chat_page(live_chat_id: str, next_chat_page: str):
         status code and error details.
     """
     try:
-        SUPABASE_CLIENT.table(YT_STREAMS).update({"next_chat_page": next_chat_page}).eq(
-            "live_chat_id", live_chat_id
-        ).eq("is_active", StateEnum.YES.value).execute()
+        await _execute(
+            SUPABASE_CLIENT.table(YT_STREAMS)
+            .update({"next_chat_page": next_chat_page})
+            .eq("live_chat_id", live_chat_id)
+            .eq("is_active", StateEnum.YES.value)
+        )
     except Exception as e:
         print(f"Error>> Failed at supabase_util: {str(e)}")
         raise HTTPException(
@@ -316,16 +371,18 @@ async def store_buzz(buzz: StreamBuzzModel):
         status code and error details.
     """
     try:
-        SUPABASE_CLIENT.table(YT_BUZZ).insert(
-            {
-                "buzz_type": buzz.buzz_type,
-                "session_id": buzz.session_id,
-                "original_chat": buzz.original_chat,
-                "author": buzz.author,
-                "generated_response": buzz.generated_response,
-                "buzz_status": BuzzStatusEnum.FOUND.value,
-            }
-        ).execute()
+        await _execute(
+            SUPABASE_CLIENT.table(YT_BUZZ).insert(
+                {
+                    "buzz_type": buzz.buzz_type,
+                    "session_id": buzz.session_id,
+                    "original_chat": buzz.original_chat,
+                    "author": buzz.author,
+                    "generated_response": buzz.generated_response,
+                    "buzz_status": BuzzStatusEnum.FOUND.value,
+                }
+            )
+        )
     except Exception as e:
         print(f"Error>> Failed at supabase_util: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Failed to store_buzz: {str(e)}")
@@ -353,15 +410,15 @@ async def get_current_buzz(session_id: str) -> Optional[Dict[str, Any]]:
         status code and error details.
     """
     try:
-        response = (
+        response = await _execute(
             SUPABASE_CLIENT.table(YT_BUZZ)
             .select("buzz_type, original_chat, author, generated_response")
             .eq("session_id", session_id)
             .eq("buzz_status", BuzzStatusEnum.ACTIVE.value)
             .order("created_at")
             .order("id")
-            .limit(1)
-            .execute()
+            .limit(1),
+            idempotent=True,
         )
         return response.data[0] if response.data else None
     except Exception as e:
@@ -387,20 +444,22 @@ async def mark_current_buzz_inactive(session_id: str):
         status code and error details.
     """
     try:
-        response = (
+        response = await _execute(
             SUPABASE_CLIENT.table(YT_BUZZ)
             .select("id")
             .eq("session_id", session_id)
             .eq("buzz_status", BuzzStatusEnum.ACTIVE.value)
             .order("created_at")
             .order("id")
-            .limit(1)
-            .execute()
+            .limit(1),
+            idempotent=True,
         )
         if response.data:
-            SUPABASE_CLIENT.table(YT_BUZZ).update(
-                {"buzz_status": BuzzStatusEnum.INACTIVE.value}
-            ).eq("id", response.data[0]["id"]).execute()
+            await _execute(
+                SUPABASE_CLIENT.table(YT_BUZZ).update(
+                    {"buzz_status": BuzzStatusEnum.INACTIVE.value}
+                ).eq("id", response.data[0]["id"])
+            )
     except Exception as e:
         print(f"Error>> Failed at supabase_util: {str(e)}")
         raise HTTPException(
@@ -423,12 +482,12 @@ async def get_found_buzz() -> list[Dict[str, Any]]:
         status code and error details.
     """
     try:
-        response = (
+        response = await _execute(
             SUPABASE_CLIENT.table(YT_BUZZ)
             .select("id, session_id, author, buzz_type, original_chat")
             .eq("buzz_status", BuzzStatusEnum.FOUND.value)
-            .order("created_at")
-            .execute()
+            .order("created_at"),
+            idempotent=True,
         )
         return response.data
     except Exception as e:
@@ -453,9 +512,11 @@ async def update_buzz_status_by_id(buzz_id: int, buzz_status: str):
         status code and error details.
     """
     try:
-        SUPABASE_CLIENT.table(YT_BUZZ).update({"buzz_status": buzz_status}).eq(
-            "id", buzz_id
-        ).execute()
+        await _execute(
+            SUPABASE_CLIENT.table(YT_BUZZ).update({"buzz_status": buzz_status}).eq(
+                "id", buzz_id
+            )
+        )
     except Exception as e:
         print(f"Error>> Failed at supabase_util: {str(e)}")
         raise HTTPException(
@@ -478,9 +539,11 @@ async def update_buzz_status_by_session_id(session_id: str, buzz_status: int):
         status code and error details.
     """
     try:
-        SUPABASE_CLIENT.table(YT_BUZZ).update({"buzz_status": buzz_status}).eq(
-            "session_id", session_id
-        ).execute()
+        await _execute(
+            SUPABASE_CLIENT.table(YT_BUZZ).update({"buzz_status": buzz_status}).eq(
+                "session_id", session_id
+            )
+        )
     except Exception as e:
         print(f"Error>> Failed at supabase_util: {str(e)}")
         raise HTTPException(
@@ -503,9 +566,11 @@ async def update_buzz_status_batch_by_id(id_list: list[int], buzz_status: int):
         status code and error details.
     """
     try:
-        SUPABASE_CLIENT.table(YT_BUZZ).update({"buzz_status": buzz_status}).in_(
-            "id", id_list
-        ).execute()
+        await _execute(
+            SUPABASE_CLIENT.table(YT_BUZZ).update({"buzz_status": buzz_status}).in_(
+                "id", id_list
+            )
+        )
     except Exception as e:
         print(f"Error>> Failed at supabase_util: {str(e)}")
         raise HTTPException(
@@ -529,12 +594,14 @@ async def update_buzz_response_by_id(buzz_id: int, generated_response: str):
         status code and error details.
     """
     try:
-        SUPABASE_CLIENT.table(YT_BUZZ).update(
-            {
-                "buzz_status": BuzzStatusEnum.ACTIVE.value,
-                "generated_response": generated_response,
-            }
-        ).eq("id", buzz_id).execute()
+        await _execute(
+            SUPABASE_CLIENT.table(YT_BUZZ).update(
+                {
+                    "buzz_status": BuzzStatusEnum.ACTIVE.value,
+                    "generated_response": generated_response,
+                }
+            ).eq("id", buzz_id)
+        )
     except Exception as e:
         print(f"Error>> Failed at supabase_util: {str(e)}")
         raise HTTPException(
@@ -557,15 +624,17 @@ async def store_reply(reply: WriteChatModel):
         status code and error details.
     """
     try:
-        SUPABASE_CLIENT.table(YT_REPLY).insert(
-            {
-                "session_id": reply.session_id,
-                "live_chat_id": reply.live_chat_id,
-                "retry_count": reply.retry_count,
-                "reply": reply.reply,
-                "is_written": StateEnum.NO.value,
-            }
-        ).execute()
+        await _execute(
+            SUPABASE_CLIENT.table(YT_REPLY).insert(
+                {
+                    "session_id": reply.session_id,
+                    "live_chat_id": reply.live_chat_id,
+                    "retry_count": reply.retry_count,
+                    "reply": reply.reply,
+                    "is_written": StateEnum.NO.value,
+                }
+            )
+        )
     except Exception as e:
         print(f"Error>> Failed at supabase_util: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Failed to store_reply: {str(e)}")
@@ -587,12 +656,12 @@ async def get_unwritten_replies() -> list[Dict[str, Any]]:
         status code and error details.
     """
     try:
-        response = (
+        response = await _execute(
             SUPABASE_CLIENT.table(YT_REPLY)
             .select("session_id, live_chat_id, reply")
             .eq("is_written", StateEnum.NO.value)
-            .lt("retry_count", MODEL_RETRIES)
-            .execute()
+            .lt("retry_count", MODEL_RETRIES),
+            idempotent=True,
         )
         return response.data
     except Exception as e:
@@ -617,9 +686,11 @@ async def mark_replies_pending(live_chat_id: str):
         status code and error details.
     """
     try:
-        SUPABASE_CLIENT.table(YT_REPLY).update(
-            {"is_written": StateEnum.PENDING.value}
-        ).eq("live_chat_id", live_chat_id).eq("is_written", StateEnum.NO.value).execute()
+        await _execute(
+            SUPABASE_CLIENT.table(YT_REPLY).update(
+                {"is_written": StateEnum.PENDING.value}
+            ).eq("live_chat_id", live_chat_id).eq("is_written", StateEnum.NO.value)
+        )
     except Exception as e:
         print(f"Error>> Failed at supabase_util: {str(e)}")
         raise HTTPException(
@@ -642,9 +713,12 @@ async def mark_replies_success(live_chat_id: str):
         status code and error details.
     """
     try:
-        SUPABASE_CLIENT.table(YT_REPLY).update({"is_written": StateEnum.YES.value}).eq(
-            "live_chat_id", live_chat_id
-        ).eq("is_written", StateEnum.PENDING.value).execute()
+        await _execute(
+            SUPABASE_CLIENT.table(YT_REPLY)
+            .update({"is_written": StateEnum.YES.value})
+            .eq("live_chat_id", live_chat_id)
+            .eq("is_written", StateEnum.PENDING.value)
+        )
     except Exception as e:
         print(f"Error>> Failed at supabase_util: {str(e)}")
         raise HTTPException(
@@ -668,11 +742,13 @@ async def mark_replies_failed(live_chat_id: str):
         status code and error details.
     """
     try:
-        SUPABASE_CLIENT.table(YT_REPLY).update(
-            {"is_written": StateEnum.NO.value}
-        ).inc({"retry_count": 1}).eq("live_chat_id", live_chat_id).eq(
-            "is_written", StateEnum.PENDING.value
-        ).execute()
+        await _execute(
+            SUPABASE_CLIENT.table(YT_REPLY).update(
+                {"is_written": StateEnum.NO.value}
+            ).inc({"retry_count": 1}).eq("live_chat_id", live_chat_id).eq(
+                "is_written", StateEnum.PENDING.value
+            )
+        )
     except Exception as e:
         print(f"Error>> Failed at supabase_util: {str(e)}")
         raise HTTPException(
@@ -694,9 +770,11 @@ async def deactivate_replies(session_id: str):
         status code and error details.
     """
     try:
-        SUPABASE_CLIENT.table(YT_REPLY).update({"is_written": StateEnum.YES.value}).eq(
-            "session_id", session_id
-        ).execute()
+        await _execute(
+            SUPABASE_CLIENT.table(YT_REPLY)
+            .update({"is_written": StateEnum.YES.value})
+            .eq("session_id", session_id)
+        )
     except Exception as e:
         print(f"Error>> Failed at supabase_util: {str(e)}")
         raise HTTPException(
@@ -722,11 +800,11 @@ async def get_kb_file_name(session_id: str) -> Optional[str]:
         status code and error details.
     """
     try:
-        response = (
+        response = await _execute(
             SUPABASE_CLIENT.table(STREAMER_KB)
             .select("file_name")
-            .eq("session_id", session_id)
-            .execute()
+            .eq("session_id", session_id),
+            idempotent=True,
         )
         return response.data[0]["file_name"] if response.data else None
     except Exception as e:
@@ -750,9 +828,11 @@ async def delete_previous_kb_entries(session_id: str):
         status code and error details.
     """
     try:
-        SUPABASE_CLIENT.table(STREAMER_KB).delete().eq(
-            "session_id", session_id
-        ).execute()
+        await _execute(
+            SUPABASE_CLIENT.table(STREAMER_KB).delete().eq(
+                "session_id", session_id
+            )
+        )
     except Exception as e:
         print(f"Error>> Failed at supabase_util: {str(e)}")
         raise HTTPException(
@@ -787,7 +867,7 @@ async def insert_chunk(chunk: ProcessedChunk):
             "embedding": chunk.embedding,
         }
 
-        result = SUPABASE_CLIENT.table(STREAMER_KB).insert(data).execute()
+        result = await _execute(SUPABASE_CLIENT.table(STREAMER_KB).insert(data))
         print(f"Inserted chunk {chunk.chunk_number} for {chunk.session_id}")
         return result
     except Exception as e:
@@ -820,14 +900,17 @@ async def get_matching_chunks(
         status code and error details.
     """
     try:
-        response = SUPABASE_CLIENT.rpc(
-            "match_streamer_knowledge",
-            {
-                "query_embedding": query_embedding,
-                "user_session_id": session_id,
-                "match_count": CONVERSATION_CONTEXT,
-            },
-        ).execute()
+        response = await _execute(
+            SUPABASE_CLIENT.rpc(
+                "match_streamer_knowledge",
+                {
+                    "query_embedding": query_embedding,
+                    "user_session_id": session_id,
+                    "match_count": CONVERSATION_CONTEXT,
+                },
+            ),
+            idempotent=True,
+        )
 
         return response.data
     except Exception as e:
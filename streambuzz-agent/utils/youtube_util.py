@@ -1,22 +1,38 @@
+import asyncio
 import json
 import os
+import random
 import re
 import time
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
+from typing import Optional
 from urllib.parse import parse_qs, urlparse
+from zoneinfo import ZoneInfo
 
-import requests
-from cachetools.func import ttl_cache
+import httpx
 from dotenv import load_dotenv
 from google.auth.transport.requests import Request
 from google.oauth2.credentials import Credentials
-from requests import HTTPError
 
-from constants.constants import (ALLOWED_DOMAINS, OAUTH_TOKEN_URI, YOUTUBE_API_ENDPOINT,
-                                 YOUTUBE_LIVE_API_ENDPOINT, YOUTUBE_SSL)
+from constants.constants import (ALLOWED_DOMAINS, LONG_YOUTUBE_DOMAINS,
+                                 OAUTH_REFRESH_FAILURE_COOLDOWN,
+                                 OAUTH_TOKEN_REFRESH_MARGIN, OAUTH_TOKEN_URI,
+                                 SHORT_YOUTUBE_DOMAINS, YOUTUBE_API_ENDPOINT,
+                                 YOUTUBE_CALL_BUDGET, YOUTUBE_CONNECT_TIMEOUT,
+                                 YOUTUBE_HEDGE_DELAY, YOUTUBE_HTTP_LIMITS,
+                                 YOUTUBE_KEY_BUCKET_CAPACITY,
+                                 YOUTUBE_KEY_BUCKET_REFILL_PER_SEC,
+                                 YOUTUBE_LIVE_API_ENDPOINT, YOUTUBE_QUOTA_COSTS,
+                                 YOUTUBE_RATE_LIMIT_COOLDOWN,
+                                 YOUTUBE_READ_TIMEOUT, YOUTUBE_RETRY_BASE_DELAY,
+                                 YOUTUBE_RETRY_MAX_DELAY, YOUTUBE_RETRYABLE_STATUSES,
+                                 YOUTUBE_SSL)
 from constants.enums import BuzzStatusEnum
 from exceptions.user_error import UserError
-from logger import log_method
+from logger import log_method, logger
 from utils import supabase_util
+from utils.rate_limit_util import TokenBucket
 
 # Load environment variables from .env file
 load_dotenv()
@@ -24,26 +40,325 @@ load_dotenv()
 # Retrieve and parse the dictionary
 YOUTUBE_API_KEY_BUNCHES_ENV = json.loads(os.getenv("YOUTUBE_API_KEY_BUNCHES"))
 
+# Precompiled patterns used to validate user supplied YouTube URLs
+URL_PATTERN = re.compile(r"(https?://|www\.)\S+")
+VIDEO_ID_PATTERN = re.compile(r"^[a-zA-Z0-9_-]{11}$")
 
-@ttl_cache(ttl=3600)
-def get_youtube_api_key_bunches():
-    youtube_api_key_bunches = []
-    for key_bunch in YOUTUBE_API_KEY_BUNCHES_ENV:
-        creds = Credentials(
-            None,  # No initial access token
-            refresh_token=key_bunch["refresh_token"],
-            token_uri=OAUTH_TOKEN_URI,
-            client_id=key_bunch["client_id"],
-            client_secret=key_bunch["client_secret"],
-            scopes=[YOUTUBE_SSL]
+# Live chat author flags and the tag appended to the author's name for each
+AUTHOR_TAGS = (
+    ("isChatOwner", "(owner)"),
+    ("isChatSponsor", "(sponsor)"),
+    ("isVerified", "(verified)"),
+    ("isChatModerator", "(moderator)"),
+)
+
+# Shared async HTTP client for YouTube API calls, created lazily
+_http_client: Optional[httpx.AsyncClient] = None
+
+# OAuth credentials for each API key, keyed by OAuth client id
+_key_credentials: dict[str, Credentials] = {}
+_key_credentials_lock = asyncio.Lock()
+
+# Client-side rate limiters for each API key, keyed by OAuth client id
+_key_buckets: dict[str, TokenBucket] = {}
+
+# Epoch time until which a key that ran out of quota or could not be refreshed is
+# skipped, keyed by OAuth client id
+_key_open_until: dict[str, float] = {}
+
+# YouTube Data API quotas reset at midnight Pacific Time
+QUOTA_RESET_TZ = ZoneInfo("America/Los_Angeles")
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """Returns the shared async HTTP client, creating it on first use.
+
+    The client keeps a pool of keep-alive connections so repeated polls reuse
+    the same TCP and TLS sessions, and uses a short connect timeout so a stalled
+    connection fails over to the next key quickly.
+
+    Returns:
+        httpx.AsyncClient: The client used for all YouTube API requests.
+    """
+    global _http_client
+    if _http_client is None or _http_client.is_closed:
+        _http_client = httpx.AsyncClient(
+            timeout=httpx.Timeout(
+                YOUTUBE_READ_TIMEOUT, connect=YOUTUBE_CONNECT_TIMEOUT
+            ),
+            limits=httpx.Limits(**YOUTUBE_HTTP_LIMITS),
         )
-        if not creds.valid:
-            creds.refresh(Request())
-            print("Token refreshed successfully.")
-        key_bunch["access_token"] = creds.token
-        youtube_api_key_bunches.append(key_bunch)
+    return _http_client
+
+
+async def close_http_client() -> None:
+    """Closes the shared async HTTP client, if it was ever created."""
+    global _http_client
+    if _http_client is not None:
+        await _http_client.aclose()
+        _http_client = None
+
 
-    return youtube_api_key_bunches
+def get_retry_delay(attempt: int) -> float:
+    """Computes the delay before the next retry as a full-jitter exponential backoff.
+
+    Randomising the whole delay keeps concurrent pollers from retrying in lockstep
+    against the YouTube API quota.
+
+    Args:
+        attempt (int): The zero-based index of the attempt that just failed.
+
+    Returns:
+        float: The number of seconds to wait before the next attempt.
+    """
+    return random.random() * min(
+        YOUTUBE_RETRY_BASE_DELAY * 2 ** attempt, YOUTUBE_RETRY_MAX_DELAY
+    )
+
+
+async def refresh_key_bunch(key_bunch: dict, creds: Credentials) -> None:
+    """Refreshes the OAuth access token of a key bunch in a worker thread.
+
+    Args:
+        key_bunch (dict): The API key bunch to store the new 'access_token' and
+            the matching bearer 'headers' in.
+        creds (Credentials): The credentials of the key bunch.
+    """
+    await asyncio.to_thread(creds.refresh, Request())
+    key_bunch["access_token"] = creds.token
+    # Built once per token so requests can reuse it as is
+    key_bunch["headers"] = {
+        "Content-Type": "application/json",
+        "Authorization": f"Bearer {creds.token}",
+    }
+    logger.info("Token refreshed successfully.")
+
+
+async def get_youtube_api_key_bunches() -> list[dict]:
+    """Returns the usable YouTube API key bunches with a valid OAuth access token.
+
+    Credentials are created once per key bunch and kept in memory. A key's token
+    is only refreshed when it is missing or expires within
+    `OAUTH_TOKEN_REFRESH_MARGIN` seconds, so a call never hands out a token that
+    is about to expire and never refreshes one that is still fresh. Expiring
+    tokens are refreshed concurrently off the event loop, and a lock makes
+    concurrent callers wait for the same refresh instead of starting their own.
+
+    A key whose refresh fails, e.g. because its refresh token was revoked, is
+    left out and skipped for `OAUTH_REFRESH_FAILURE_COOLDOWN` seconds, so the
+    other keys keep serving requests. Keys whose circuit is open are left out
+    without being refreshed.
+
+    Returns:
+        list[dict]: The usable key bunches, each with an up to date
+            'access_token' and bearer 'headers'.
+    """
+    async with _key_credentials_lock:
+        # google-auth stores expiry as a naive UTC datetime
+        now = datetime.now(timezone.utc).replace(tzinfo=None)
+        key_bunches = []
+        refreshing = []
+        refresh_tasks = []
+        for key_bunch in YOUTUBE_API_KEY_BUNCHES_ENV:
+            if is_key_open(key_bunch):
+                continue
+            key_bunches.append(key_bunch)
+            creds = _key_credentials.get(key_bunch["client_id"])
+            if creds is None:
+                creds = Credentials(
+                    None,  # No initial access token
+                    refresh_token=key_bunch["refresh_token"],
+                    token_uri=OAUTH_TOKEN_URI,
+                    client_id=key_bunch["client_id"],
+                    client_secret=key_bunch["client_secret"],
+                    scopes=[YOUTUBE_SSL]
+                )
+                _key_credentials[key_bunch["client_id"]] = creds
+            if (
+                creds.expiry is None
+                or (creds.expiry - now).total_seconds() < OAUTH_TOKEN_REFRESH_MARGIN
+            ):
+                refreshing.append(key_bunch)
+                refresh_tasks.append(refresh_key_bunch(key_bunch, creds))
+        results = await asyncio.gather(*refresh_tasks, return_exceptions=True)
+
+    failed = []
+    for key_bunch, result in zip(refreshing, results):
+        if isinstance(result, Exception):
+            logger.error(
+                "Token refresh failed for client %s: %s", key_bunch["client_id"], result
+            )
+            _key_open_until[key_bunch["client_id"]] = (
+                time.time() + OAUTH_REFRESH_FAILURE_COOLDOWN
+            )
+            failed.append(key_bunch)
+    return [key_bunch for key_bunch in key_bunches if key_bunch not in failed]
+
+
+def get_key_bucket(key_dict: dict) -> TokenBucket:
+    """Returns the token bucket tracking the quota spent with the given API key bunch.
+
+    Args:
+        key_dict (dict): An API key bunch from `get_youtube_api_key_bunches`.
+
+    Returns:
+        TokenBucket: The bucket shared by every request made with this key.
+    """
+    client_id = key_dict["client_id"]
+    if client_id not in _key_buckets:
+        _key_buckets[client_id] = TokenBucket(
+            YOUTUBE_KEY_BUCKET_CAPACITY, YOUTUBE_KEY_BUCKET_REFILL_PER_SEC
+        )
+    return _key_buckets[client_id]
+
+
+def get_next_quota_reset() -> float:
+    """Returns the epoch time of the next daily YouTube API quota reset.
+
+    Returns:
+        float: The timestamp of the next midnight in Pacific Time.
+    """
+    now = datetime.now(QUOTA_RESET_TZ)
+    next_midnight = datetime.combine(
+        now.date() + timedelta(days=1), datetime.min.time(), tzinfo=QUOTA_RESET_TZ
+    )
+    return next_midnight.timestamp()
+
+
+def is_key_open(key_dict: dict) -> bool:
+    """Checks whether a key is circuit-broken, e.g. because it ran out of quota.
+
+    Args:
+        key_dict (dict): An API key bunch from `get_youtube_api_key_bunches`.
+
+    Returns:
+        bool: True if the key must be skipped for now.
+    """
+    return time.time() < _key_open_until.get(key_dict["client_id"], 0.0)
+
+
+def penalise_key(key_dict: dict, error_reason: Optional[str]) -> None:
+    """Throttles a key after the YouTube API reported it ran out of quota.
+
+    A `quotaExceeded` error means the daily quota is spent, so the key's token
+    bucket is drained and the key is skipped until the next reset. A
+    `rateLimitExceeded` error only concerns the short-term request rate, so the
+    key is skipped for `YOUTUBE_RATE_LIMIT_COOLDOWN` seconds and keeps its bucket.
+
+    Args:
+        key_dict (dict): The API key bunch used for the failed request.
+        error_reason (Optional[str]): The reason reported by the YouTube API.
+    """
+    if error_reason == "quotaExceeded":
+        get_key_bucket(key_dict).drain()
+        _key_open_until[key_dict["client_id"]] = get_next_quota_reset()
+    elif error_reason == "rateLimitExceeded":
+        _key_open_until[key_dict["client_id"]] = (
+            time.time() + YOUTUBE_RATE_LIMIT_COOLDOWN
+        )
+
+
+async def get_ranked_key_bunches() -> list[dict]:
+    """Returns the usable API key bunches ordered by remaining client-side quota.
+
+    Keys that ran out of quota are left out until their circuit closes again.
+    Trying the key with the most available tokens first spreads requests evenly
+    across keys instead of always exhausting the first one.
+
+    Returns:
+        list[dict]: The usable API key bunches, most available key first.
+    """
+    return sorted(
+        await get_youtube_api_key_bunches(),
+        key=lambda key_dict: get_key_bucket(key_dict).available,
+        reverse=True,
+    )
+
+
+def parse_body(response: httpx.Response) -> dict:
+    """Decodes the JSON body of a YouTube API response once.
+
+    Error responses from proxies or load balancers are not always JSON, so an
+    empty or undecodable body yields an empty dict instead of raising.
+
+    Args:
+        response (httpx.Response): A response from the YouTube API.
+
+    Returns:
+        dict: The decoded body, or an empty dict if there is none.
+    """
+    if not response.content:
+        return {}
+    try:
+        return response.json()
+    except ValueError:
+        return {}
+
+
+def get_error_reason(body: dict) -> Optional[str]:
+    """Extracts the YouTube API error reason from a decoded error body.
+
+    Args:
+        body (dict): The decoded body of a 4xx response from the YouTube API.
+
+    Returns:
+        Optional[str]: The reason of the first reported error, if any.
+    """
+    return body.get("error", {}).get("errors", [{}])[0].get("reason")
+
+
+@lru_cache(maxsize=1024)
+def extract_youtube_id(url: str) -> str:
+    """
+    Extracts the video ID from the first YouTube URL found in a text.
+
+    The result only depends on `url`, so it is memoized; repeated links to the
+    same stream skip parsing altogether. Errors are not cached.
+
+    Args:
+        url (str): The text containing the YouTube URL to validate and parse.
+
+    Returns:
+        str: The extracted video ID if the URL is valid.
+
+    Raises:
+        UserError: If the provided URL is invalid due to an invalid domain,
+                   invalid path, or invalid video ID format.
+    """
+    match = URL_PATTERN.search(url)
+    if not match:
+        raise UserError("No URL found in the text.")
+
+    # Parse the YouTube URL
+    url = match.group()
+    parsed_url = urlparse(url)
+    domain = parsed_url.netloc
+    path = parsed_url.path
+
+    # Check if the domain is valid
+    if domain not in ALLOWED_DOMAINS:
+        raise UserError(f"Invalid YouTube domain: {domain}")
+
+    # Extract video ID based on URL format
+    if domain in SHORT_YOUTUBE_DOMAINS:
+        # Shortened URL
+        video_id = path[1:]  # Skip leading '/'
+    elif domain in LONG_YOUTUBE_DOMAINS:
+        # Standard URL or embed URL, only parse the query string when needed
+        query = parse_qs(parsed_url.query) if path == "/watch" else {}
+        if "v" in query:
+            video_id = query["v"][0]
+        elif path.startswith("/embed/"):
+            video_id = path.split("/embed/")[1]
+        else:
+            raise UserError(f"Invalid YouTube video URL path: {path}")
+    else:
+        raise UserError("Unrecognized YouTube URL format.")
+
+    # Validate video ID format (11-character alphanumeric)
+    if not VIDEO_ID_PATTERN.match(video_id):
+        raise UserError(f"Invalid YouTube video ID: {video_id}")
+    return video_id
 
 
 @log_method
@@ -54,7 +369,8 @@ async def validate_and_extract_youtube_id(url: str) -> str:
     This function parses the provided URL, checks if the domain is valid
     (either 'youtu.be' or 'youtube.com'), and extracts the 11-character
     alphanumeric video ID from the URL. It supports standard, shortened,
-    and embed URL formats.
+    and embed URL formats. Parsing is delegated to the memoized
+    `extract_youtube_id`.
 
     Args:
         url (str): The YouTube URL to validate and parse.
@@ -68,41 +384,7 @@ async def validate_and_extract_youtube_id(url: str) -> str:
         Exception: If there's any other unexpected error during the process.
     """
     try:
-        url_pattern = r"(https?://|www\.)\S+"
-        match = re.search(url_pattern, url)
-        if not match:
-            raise UserError("No URL found in the text.")
-
-        # Parse the YouTube URL
-        url = match.group()
-        parsed_url = urlparse(url)
-        domain = parsed_url.netloc
-        path = parsed_url.path
-        query = parse_qs(parsed_url.query)
-
-        # Check if the domain is valid
-        if domain not in ALLOWED_DOMAINS:
-            raise UserError(f"Invalid YouTube domain: {domain}")
-
-        # Extract video ID based on URL format
-        if "youtu.be" in domain:
-            # Shortened URL
-            video_id = path[1:]  # Skip leading '/'
-        elif "youtube.com" in domain:
-            # Standard URL or embed URL
-            if path == "/watch" and "v" in query:
-                video_id = query["v"][0]
-            elif path.startswith("/embed/"):
-                video_id = path.split("/embed/")[1]
-            else:
-                raise UserError(f"Invalid YouTube video URL path: {path}")
-        else:
-            raise UserError("Unrecognized YouTube URL format.")
-
-        # Validate video ID format (11-character alphanumeric)
-        if not re.match(r"^[a-zA-Z0-9_-]{11}$", video_id):
-            raise UserError(f"Invalid YouTube video ID: {video_id}")
-        return video_id
+        return extract_youtube_id(url)
     except UserError as ue:
         print(f"Error validating and extracting YouTube ID: {str(ue)}")
         raise
@@ -156,10 +438,14 @@ async def post_request_with_retries(
     """
     Makes a POST request with retries using multiple API keys.
 
-    This function iterates through a list of API keys, attempting to make a POST
-    request to the specified URL. If a request fails, it retries with the next key
-    after a short delay. The function handles both API key authentication and
-    bearer token authentication based on the `use_keys` flag.
+    This function iterates through a list of API keys, most available quota first,
+    waiting on each key's token bucket before attempting to make a POST
+    request to the specified URL. If a request fails with a retryable status (quota,
+    rate limit, server error) or a network error, it retries with the next key
+    after a jittered exponential backoff, for at most `YOUTUBE_CALL_BUDGET` seconds
+    in total; any other failure stops immediately. The
+    function handles both API key authentication and bearer token authentication
+    based on the `use_keys` flag.
 
     Args:
         url (str): The URL to make the POST request to.
@@ -172,56 +458,112 @@ async def post_request_with_retries(
         dict: The JSON response from the POST request if successful.
 
     Raises:
-        HTTPError: If all API keys fail or the maximum number of retries is reached.
+        HTTPError: If all API keys fail, the maximum number of retries is reached
+            or a non-retryable error occurs.
     """
-    api_key_bunches = get_youtube_api_key_bunches()
-    for attempt, key_dict in enumerate(api_key_bunches):
-        if use_keys:
-            params["key"] = key_dict["api_key"]
-            response = requests.post(url, params=params, data=payload, timeout=10)
-        else:
-            headers = {
-                "Content-Type": "application/json",
-                "Authorization": f"Bearer {key_dict['access_token']}",
-            }
-            response = requests.post(
-                url, headers=headers, params=params, data=payload, timeout=10
+    client = get_http_client()
+    deadline = time.monotonic() + YOUTUBE_CALL_BUDGET
+    for attempt, key_dict in enumerate(await get_ranked_key_bunches()):
+        if time.monotonic() >= deadline:
+            logger.warning(
+                "Attempt %d: Call budget exhausted. Breaking...", attempt + 1
             )
-
+            break
+        bucket = get_key_bucket(key_dict)
         try:
+            # Never wait for quota beyond the call budget
+            await asyncio.wait_for(
+                bucket.acquire(YOUTUBE_QUOTA_COSTS.get(("POST", url), 1)),
+                deadline - time.monotonic(),
+            )
+        except asyncio.TimeoutError:
+            logger.warning(
+                "Attempt %d: No quota left within the call budget. Breaking...",
+                attempt + 1,
+            )
+            break
+        try:
+            if use_keys:
+                params["key"] = key_dict["api_key"]
+                response = await client.post(url, params=params, content=payload)
+            else:
+                response = await client.post(
+                    url, headers=key_dict["headers"], params=params, content=payload
+                )
+
+            body = parse_body(response)
             if response.status_code == 200:
-                return response.json()
+                return body
+            if response.status_code not in YOUTUBE_RETRYABLE_STATUSES:
+                logger.warning(
+                    "Attempt %d: status=%d body=%s. Breaking...",
+                    attempt + 1, response.status_code, body,
+                )
+                break
+            if response.status_code == 403:
+                penalise_key(key_dict, get_error_reason(body))
 
             # Log the failure
-            print(
-                f"Attempt {attempt + 1}: {response.status_code=}\nBody="
-                f"{response.json()}. Retrying..."
+            logger.warning(
+                "Attempt %d: status=%d body=%s. Retrying...",
+                attempt + 1, response.status_code, body,
             )
 
-        except requests.exceptions.RequestException as e:
+        except httpx.TransportError as e:
             # Log the exception
-            print(
-                f"Error>> {str(e)}\nAttempt {attempt + 1}: {response.status_code=}\n"
-                f"body={response.json()}. Retrying..."
-            )
-
-        # Retry after a short delay
-        time.sleep(2)
+            logger.warning("Attempt %d: %s. Retrying...", attempt + 1, e)
+        except httpx.HTTPError as e:
+            logger.warning("Attempt %d: %s. Breaking...", attempt + 1, e)
+            break
+
+        # Retry after an exponentially growing, jittered delay within the budget
+        await asyncio.sleep(
+            max(0.0, min(get_retry_delay(attempt), deadline - time.monotonic()))
+        )
 
     # If all attempts fail
-    raise HTTPError("All API keys failed or maximum retries reached.")
+    raise httpx.HTTPError("All API keys failed or maximum retries reached.")
+
+
+async def get_with_key(
+        client: httpx.AsyncClient, url: str, params: dict, key_dict: dict,
+        use_keys: bool
+) -> httpx.Response:
+    """Makes a single GET request authenticated with the given API key bunch.
+
+    Args:
+        client (httpx.AsyncClient): The shared HTTP client.
+        url (str): The URL to make the GET request to.
+        params (dict): The parameters to include in the GET request.
+        key_dict (dict): The API key bunch used to authenticate the request.
+        use_keys (bool): If True, uses 'api_key' for authentication;
+                        otherwise, uses 'access_token'.
+
+    Returns:
+        httpx.Response: The raw response of the YouTube API.
+    """
+    await get_key_bucket(key_dict).acquire(YOUTUBE_QUOTA_COSTS.get(("GET", url), 1))
+    if use_keys:
+        # Copy the params, hedged requests for other keys may run concurrently
+        return await client.get(url, params={**params, "key": key_dict["api_key"]})
+    return await client.get(url, headers=key_dict["headers"], params=params)
 
 
 @log_method
 async def get_request_with_retries(
         url: str, params: dict, session_id: str, use_keys: bool = True
 ) -> dict:
-    """Makes a GET request with retries using multiple API keys.
-
-    This function iterates through a list of API keys, attempting to make a GET
-    request to the specified URL. If a request fails, it retries with the next key
-    after a short delay. The function handles both API key authentication and
-    bearer token authentication based on the `use_keys` flag.
+    """Makes a hedged GET request with retries using multiple API keys.
+
+    This function tries the API keys most available quota first, waiting on each
+    key's token bucket before making a GET request to the specified URL. If the
+    request in flight has not answered within `YOUTUBE_HEDGE_DELAY` seconds, the
+    next key is tried concurrently and the first successful response wins; the
+    others are cancelled. If a request fails with a retryable status (quota, rate
+    limit, server error) or a network error, the next key is tried after a
+    jittered exponential backoff, for at most `YOUTUBE_CALL_BUDGET` seconds in
+    total; any other failure stops immediately. The function handles both API key
+    authentication and bearer token authentication based on the `use_keys` flag.
 
     Args:
         url (str): The URL to make the GET request to.
@@ -234,59 +576,101 @@ async def get_request_with_retries(
         dict: The JSON response from the GET request if successful.
 
     Raises:
-        HTTPError: If all API keys fail or the maximum number of retries is reached.
+        HTTPError: If all API keys fail, the maximum number of retries is reached
+            or a non-retryable error occurs.
     """
-    api_key_bunches = get_youtube_api_key_bunches()
-    for attempt, key_dict in enumerate(api_key_bunches):
-        if use_keys:
-            params["key"] = key_dict["api_key"]
-            response = requests.get(url, params=params, timeout=10)
-        else:
-            headers = {
-                "Content-Type": "application/json",
-                "Authorization": f"Bearer {key_dict['access_token']}",
-            }
-            response = requests.get(url, headers=headers, params=params, timeout=10)
+    client = get_http_client()
+    deadline = time.monotonic() + YOUTUBE_CALL_BUDGET
+    key_bunches = enumerate(await get_ranked_key_bunches())
+    in_flight: dict[asyncio.Task, tuple[int, dict]] = {}
+
+    def try_next_key() -> None:
+        """Starts a request with the next untried key, if any is left."""
+        attempt, key_dict = next(key_bunches, (None, None))
+        if key_dict is not None:
+            task = asyncio.create_task(
+                get_with_key(client, url, params, key_dict, use_keys)
+            )
+            in_flight[task] = (attempt, key_dict)
 
-        try:
-            if response.status_code == 200:
-                return response.json()
-            error_reason = None
-            if 400 <= response.status_code < 500:
-                error_reason = (
-                    response.json()
-                    .get("error", {})
-                    .get("errors", [{}])[0]
-                    .get("reason")
-                )
-            if response.status_code == 400:
-                print(f"Bad Request (400): {error_reason}\nBreaking...")
-                break
-            elif response.status_code == 403 and error_reason == "liveChatEnded":
-                print("Live Chat Ended: Deactivating stream and breaking...")
-                await deactivate_stream(
-                    session_id=session_id,
-                    message="The current YouTube Live Stream has ended. You can explore the buzz so far, but replies are disabled. Start a new stream anytime!",
-                )
+    try:
+        try_next_key()
+        while in_flight:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                logger.warning("Call budget exhausted. Breaking...")
                 break
-            else:
-                print(
-                    f"Attempt {attempt + 1}: {response.status_code=}\nBody="
-                    f"{response.json()}. Retrying..."
-                )
-
-        except requests.exceptions.RequestException as e:
-            # Log the exception
-            print(
-                f"Error>> {str(e)}\nAttempt {attempt + 1}: {response.status_code=}\n"
-                f"body={response.json()}. Retrying..."
+            done, _ = await asyncio.wait(
+                in_flight,
+                timeout=min(YOUTUBE_HEDGE_DELAY, remaining),
+                return_when=asyncio.FIRST_COMPLETED,
             )
+            if not done:
+                # The request in flight is slow, hedge with the next key
+                try_next_key()
+                continue
+
+            stop = False
+            for task in done:
+                attempt, key_dict = in_flight.pop(task)
+                try:
+                    response = task.result()
+                except httpx.TransportError as e:
+                    # Log the exception
+                    logger.warning("Attempt %d: %s. Retrying...", attempt + 1, e)
+                    continue
+                except httpx.HTTPError as e:
+                    logger.warning("Attempt %d: %s. Breaking...", attempt + 1, e)
+                    stop = True
+                    break
+
+                body = parse_body(response)
+                if response.status_code == 200:
+                    return body
+                error_reason = None
+                if 400 <= response.status_code < 500:
+                    error_reason = get_error_reason(body)
+                if response.status_code == 400:
+                    logger.warning("Bad Request (400): %s. Breaking...", error_reason)
+                    stop = True
+                    break
+                elif response.status_code not in YOUTUBE_RETRYABLE_STATUSES:
+                    logger.warning(
+                        "Attempt %d: status=%d reason=%s. Breaking...",
+                        attempt + 1, response.status_code, error_reason,
+                    )
+                    stop = True
+                    break
+                elif response.status_code == 403 and error_reason == "liveChatEnded":
+                    logger.info("Live Chat Ended: Deactivating stream and breaking...")
+                    await deactivate_stream(
+                        session_id=session_id,
+                        message="The current YouTube Live Stream has ended. You can explore the buzz so far, but replies are disabled. Start a new stream anytime!",
+                    )
+                    stop = True
+                    break
+                else:
+                    penalise_key(key_dict, error_reason)
+                    logger.warning(
+                        "Attempt %d: status=%d body=%s. Retrying...",
+                        attempt + 1, response.status_code, body,
+                    )
+            if stop:
+                break
 
-        # Retry after a short delay
-        time.sleep(2)
+            if not in_flight:
+                # Retry after an exponentially growing, jittered delay within the
+                # budget
+                await asyncio.sleep(
+                    max(0.0, min(get_retry_delay(attempt), deadline - time.monotonic()))
+                )
+                try_next_key()
+    finally:
+        for task in in_flight:
+            task.cancel()
 
     # If all attempts fail
-    raise HTTPError("All API keys failed, maximum retries reached or bad request.")
+    raise httpx.HTTPError("All API keys failed, maximum retries reached or bad request.")
 
 
 @log_method
@@ -349,6 +733,20 @@ async def deactivate_session(session_id: str) -> None:
         raise
 
 
+def format_author(author_details: dict) -> str:
+    """Formats a live chat author as '@name' followed by their role tags.
+
+    Args:
+        author_details (dict): The 'authorDetails' of a live chat message.
+
+    Returns:
+        str: The display name prefixed with '@', e.g. '@name (owner) (moderator)'.
+    """
+    tags = [tag for flag, tag in AUTHOR_TAGS if author_details.get(flag, False)]
+    author = f"@{author_details.get('displayName')}"
+    return f"{author} {' '.join(tags)}" if tags else author
+
+
 @log_method
 async def get_live_chat_messages(session_id: str, live_chat_id: str,
                                  next_chat_page: str) -> list:
@@ -384,30 +782,8 @@ async def get_live_chat_messages(session_id: str, live_chat_id: str,
     # Extract chats as a list of dictionaries with updated displayName formatting
     chats = [
         {
-            "original_chat": item.get("snippet").get("displayMessage"),
-            "author": (
-                f"@{item.get('authorDetails').get('displayName')}"
-                + (
-                    " (owner)"
-                    if item.get("authorDetails").get("isChatOwner", False)
-                    else ""
-                )
-                + (
-                    " (sponsor)"
-                    if item.get("authorDetails").get("isChatSponsor", False)
-                    else ""
-                )
-                + (
-                    " (verified)"
-                    if item.get("authorDetails").get("isVerified", False)
-                    else ""
-                )
-                + (
-                    " (moderator)"
-                    if item.get("authorDetails").get("isChatModerator", False)
-                    else ""
-                )
-            ),
+            "original_chat": item["snippet"].get("displayMessage"),
+            "author": format_author(item["authorDetails"]),
         }
         for item in live_chat_response.get("items", [])
     ]
@@ -3,16 +3,17 @@
 Script to get YouTube OAuth tokens through desktop app flow
 """
 
+import json
 import os
-import pickle
 from google_auth_oauthlib.flow import InstalledAppFlow
 from google.auth.transport.requests import Request
+from google.oauth2.credentials import Credentials
 from dotenv import load_dotenv
 
 # Load environment variables
 load_dotenv()
 
-# If modifying these scopes, delete the file token.pickle.
+# If modifying these scopes, delete the file token.json.
 SCOPES = [
     'https://www.googleapis.com/auth/youtube.force-ssl'  # Full access to YouTube account
 ]
@@ -22,9 +23,9 @@ def get_credentials():
     creds = None
     
     # Try to load existing credentials
-    if os.path.exists('token.pickle'):
-        with open('token.pickle', 'rb') as token:
-            creds = pickle.load(token)
+    if os.path.exists('token.json'):
+        with open('token.json', 'r') as token:
+            creds = Credentials.from_authorized_user_info(json.load(token), SCOPES)
     
     # If there are no (valid) credentials available, let the user log in.
     if not creds or not creds.valid:
@@ -44,8 +45,8 @@ def get_credentials():
             )
         
         # Save the credentials for the next run
-        with open('token.pickle', 'wb') as token:
-            pickle.dump(creds, token)
+        with open('token.json', 'w') as token:
+            token.write(creds.to_json())
     
     print("\nHere are your tokens:")
     print(f"Access Token: {creds.token}")
@@ -0,0 +1,145 @@
+import hashlib
+from collections import OrderedDict
+from typing import Any, Iterable, Optional
+
+import orjson
+
+class HashedMessageList(list):
+    """
+    List of chat messages that keeps a running blake2b hash of the messages appended to it.
+
+    A conversation only grows by appending, so its cache key can be updated per message
+    instead of re-serializing and re-hashing the whole history on every turn. Any other
+    in-place edit rehashes the whole list, so the digest always matches the contents.
+    """
+    def __init__(self, messages: Iterable[dict] = ()):
+        super().__init__()
+        self._hasher = hashlib.blake2b()
+        self.extend(messages)
+
+    @staticmethod
+    def _encode(message: dict) -> bytes:
+        """Serialize a message the same way for every hash update."""
+        return orjson.dumps(message, option=orjson.OPT_SORT_KEYS)
+
+    def _rehash(self) -> None:
+        """Recompute the running hash from scratch after an edit other than an append."""
+        self._hasher = hashlib.blake2b()
+        for message in self:
+            self._hasher.update(self._encode(message))
+
+    def append(self, message: dict) -> None:
+        """Append a message and fold it into the running hash."""
+        super().append(message)
+        self._hasher.update(self._encode(message))
+
+    def extend(self, messages: Iterable[dict]) -> None:
+        """Append several messages and fold them into the running hash."""
+        for message in messages:
+            self.append(message)
+
+    def __iadd__(self, messages: Iterable[dict]) -> "HashedMessageList":
+        self.extend(messages)
+        return self
+
+    def __imul__(self, n: int) -> "HashedMessageList":
+        super().__imul__(n)
+        self._rehash()
+        return self
+
+    def __setitem__(self, index, value) -> None:
+        super().__setitem__(index, value)
+        self._rehash()
+
+    def __delitem__(self, index) -> None:
+        super().__delitem__(index)
+        self._rehash()
+
+    def insert(self, index: int, message: dict) -> None:
+        super().insert(index, message)
+        self._rehash()
+
+    def pop(self, index: int = -1) -> dict:
+        message = super().pop(index)
+        self._rehash()
+        return message
+
+    def remove(self, message: dict) -> None:
+        super().remove(message)
+        self._rehash()
+
+    def clear(self) -> None:
+        super().clear()
+        self._hasher = hashlib.blake2b()
+
+    def sort(self, *args, **kwargs) -> None:
+        super().sort(*args, **kwargs)
+        self._rehash()
+
+    def reverse(self) -> None:
+        super().reverse()
+        self._rehash()
+
+    def digest(self) -> str:
+        """
+        Return the hash of all messages appended so far.
+
+        Returns:
+            str: The hex digest.
+        """
+        return self._hasher.copy().hexdigest()
+
+class CompletionCache:
+    """
+    Exact-match LRU cache of chat completions, keyed by a hash of the whole request.
+
+    Only deterministic requests (temperature 0) are worth caching: the same model,
+    messages and tools then produce the same completion, so a repeated conversation
+    is answered from memory instead of paying for another LLM round trip.
+    """
+    def __init__(self, maxsize: int = 256):
+        self.maxsize = maxsize
+        self._entries: OrderedDict[bytes, Any] = OrderedDict()
+
+    @staticmethod
+    def key(**request: Any) -> bytes:
+        """
+        Hash the keyword arguments of a chat.completions.create call.
+
+        A HashedMessageList contributes its running digest instead of being serialized again.
+
+        Returns:
+            bytes: The blake2b digest of the request.
+        """
+        messages = request.get("messages")
+        if isinstance(messages, HashedMessageList):
+            request = {**request, "messages": messages.digest()}
+        return hashlib.blake2b(orjson.dumps(request, option=orjson.OPT_SORT_KEYS)).digest()
+
+    def get(self, key: bytes) -> Optional[Any]:
+        """
+        Return the completion cached for a key and mark it as recently used.
+
+        Args:
+            key (bytes): The request key.
+
+        Returns:
+            Optional[Any]: The cached completion, or None on a miss.
+        """
+        response = self._entries.get(key)
+        if response is not None:
+            self._entries.move_to_end(key)
+        return response
+
+    def put(self, key: bytes, response: Any) -> None:
+        """
+        Cache a completion, evicting the least recently used one when full.
+
+        Args:
+            key (bytes): The request key.
+            response (Any): The completion returned for the request.
+        """
+        self._entries[key] = response
+        self._entries.move_to_end(key)
+        if len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
@@ -1,15 +1,18 @@
 import os
 import asyncio
+import functools
 import json
 import logging
-import pprint
+import orjson
 from exceptions import ConfigurationError, ConnectionError, ToolError
+from completion_cache import CompletionCache, HashedMessageList
 
 from dotenv import load_dotenv
 from dataclasses import dataclass
-from typing import Optional, Union, Any, Dict, List
+from typing import Optional, Union, Any, Callable, Dict, List, Tuple
 from contextlib import AsyncExitStack
 from colorama import init, Fore, Style
+from aioconsole import ainput
 init(autoreset=True)  # Initialize colorama with autoreset=True
 
 from pydantic import BaseModel
@@ -18,7 +21,9 @@ from pydantic_ai.tools import Tool, ToolDefinition
 
 from mcp import ClientSession, StdioServerParameters
 from mcp.client.stdio import stdio_client
+from anyio import BrokenResourceError, ClosedResourceError
 
+import httpx
 from httpx import AsyncClient
 from supabase import Client
 from openai import AsyncOpenAI
@@ -30,11 +35,15 @@ logging.basicConfig(
     format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
 )
 
-def initialize_client_and_model() -> tuple[AsyncOpenAI, OpenAIModel, str]:
+def initialize_client_and_model(http_client: Optional[AsyncClient] = None) -> tuple[AsyncOpenAI, OpenAIModel, str]:
     """
     Load environment variables, resolve provider-specific configuration,
     and return the client and model.
 
+    Args:
+        http_client (Optional[AsyncClient]): HTTP client the LLM client sends its calls over.
+            Defaults to a pooled HTTP/2 client of its own.
+
     Returns:
         tuple[AsyncOpenAI, OpenAIModel, str]: A tuple containing the client, model, and language model.
 
@@ -43,9 +52,9 @@ def initialize_client_and_model() -> tuple[AsyncOpenAI, OpenAIModel, str]:
     """
 
     load_dotenv()  
-    selected = os.getenv("SELECTED")
+    selected = os.environ.get("SELECTED")
 
-    required_env_vars = {var: os.getenv(f"{selected}_{var}") for var in ["URL", "API_KEY", "MODEL"]}
+    required_env_vars = {var: os.environ.get(f"{selected}_{var}") for var in ["URL", "API_KEY", "MODEL"]}
     
     missing_vars = [var for var, value in required_env_vars.items() if not value]
     if missing_vars:
@@ -53,9 +62,16 @@ def initialize_client_and_model() -> tuple[AsyncOpenAI, OpenAIModel, str]:
     
     base_url, api_key, language_model = required_env_vars["URL"], required_env_vars["API_KEY"], required_env_vars["MODEL"]
 
+    # One pooled HTTP/2 connection is reused by every LLM call instead of handshaking per request
+    if http_client is None:
+        http_client = AsyncClient(
+            http2=True,
+            limits=httpx.Limits(max_keepalive_connections=32, max_connections=64, keepalive_expiry=60.0),
+            timeout=httpx.Timeout(60.0, connect=5.0))
     client = AsyncOpenAI( 
         base_url=base_url,
-        api_key=api_key)
+        api_key=api_key,
+        http_client=http_client)
     
     model = OpenAIModel(
         language_model,
@@ -63,18 +79,41 @@ def initialize_client_and_model() -> tuple[AsyncOpenAI, OpenAIModel, str]:
         api_key=api_key)
     
     return client, model, language_model
-    
-try:
-    client, model, language_model = initialize_client_and_model()
-    logger.info("Client and model initialized successfully.")
-except ConfigurationError as e:
-    # Explain what happens with the raise here, what is executed next ?
-    logger.error(f"Configuration error: {e}")
-    raise
-    
-except Exception as e:
-    logger.exception("Unexpected error during client and model initialization")
-    raise
+
+# Client and model built by the first successful get_client_and_model call
+_client_and_model: Optional[tuple[AsyncOpenAI, OpenAIModel, str]] = None
+
+def get_client_and_model(http_client: Optional[AsyncClient] = None) -> tuple[AsyncOpenAI, OpenAIModel, str]:
+    """
+    Initialize the client and model on first use and return the same ones afterwards,
+    so importing this module neither reads .env nor builds clients.
+
+    Args:
+        http_client (Optional[AsyncClient]): HTTP client the LLM client sends its calls over,
+            only used by the call that initializes them. An application owning a connection
+            pool passes it on its first call, so no second pool is built. Defaults to None.
+
+    Returns:
+        tuple[AsyncOpenAI, OpenAIModel, str]: A tuple containing the client, model, and language model.
+
+    Raises:
+        ConfigurationError: If any required environment variable is missing.
+    """
+    global _client_and_model
+    if _client_and_model is not None:
+        return _client_and_model
+    try:
+        _client_and_model = initialize_client_and_model(http_client)
+        logger.info("Client and model initialized successfully.")
+        return _client_and_model
+    except ConfigurationError as e:
+        # Failures are not cached, so the next call retries the initialization
+        logger.error(f"Configuration error: {e}")
+        raise
+
+    except Exception as e:
+        logger.exception("Unexpected error during client and model initialization")
+        raise
 
 # System prompt that guides the LLM's behavior and capabilities
 # This helps the model understand its role and available tools
@@ -90,6 +129,42 @@ SYSTEM_PROMPT = """You are a helpful assistant capable of accessing external fun
 - Maintain an engaging, supportive, and friendly tone throughout the dialogue.
 - Always highlight the potential of available tools to assist users comprehensively."""
  
+def load_description_overrides(directory: str = "./mcp-tool-description-overrides") -> Dict[str, str]:
+    """
+    Read every tool description override once, keyed by its file name (server__tool).
+
+    Args:
+        directory (str): The directory holding the override files.
+
+    Returns:
+        Dict[str, str]: The override descriptions.
+    """
+    try:
+        with os.scandir(directory) as entries:
+            paths = {entry.name: entry.path for entry in entries if entry.is_file()}
+    except FileNotFoundError:
+        return {}
+
+    overrides = {}
+    for name, path in paths.items():
+        try:
+            with open(path, 'r') as f:
+                overrides[name] = f.read()
+        except Exception as e:
+            logging.error(f"An error occurred while reading the file: {e}")
+            raise
+    return overrides
+
+def _read_bytes(path: str) -> bytes:
+    """Read a whole file, meant to run in a worker thread via asyncio.to_thread."""
+    with open(path, "rb") as f:
+        return f.read()
+
+def _write_bytes(path: str, data: bytes) -> None:
+    """Write a whole file, meant to run in a worker thread via asyncio.to_thread."""
+    with open(path, "wb") as f:
+        f.write(data)
+
 @dataclass
 class Deps:
     client: AsyncClient
@@ -105,12 +180,58 @@ class MCPClient:
         # Initialize sessions and agents dictionaries
         self.sessions: Dict[str, ClientSession] = {}  # Dictionary to store {server_name: session}
         self.agents: Dict[str, Agent] = {}  # Dictionary to store {server_name: agent}
-        self.exit_stack = AsyncExitStack()
+        self._tools_cache: Dict[str, list] = {}  # Dictionary to store {server_name: tools from list_tools}
+        self._server_tasks: Dict[str, asyncio.Task] = {}  # Dictionary to store {server_name: session owner task}
+        self._shutdown = asyncio.Event()
+        self._server_params: Dict[str, StdioServerParameters] = {}  # Dictionary to store {server_name: spawn parameters}
+        self._reconnecting: Dict[str, asyncio.Task] = {}  # Dictionary to store {server_name: running reconnect}
         self.available_tools = []
-        self.tools = {}
+        self.tool_registry: Dict[str, Tuple[str, Optional[str]]] = {}  # Dictionary to store {server__tool: (server_name, tool_name)}
+        self._openai_tools_cache: Optional[Dict[str, dict]] = None  # Tools dict built by get_available_tools
+        self._system_prompt: Optional[str] = None  # SYSTEM_PROMPT rendered for the current tools
+        self._openai_tool_payload: Optional[list] = None  # Tool schemas passed to chat.completions.create
         self.connected = False
+        self._warmup_task: Optional[asyncio.Task] = None  # Background connect_to_server started by warmup()
         self.config_file = 'mcp_config.json'
+        self._config_cache: Optional[tuple[int, dict]] = None  # (st_mtime_ns, parsed config) of the config file
         self.dynamic_tools: List[Tool] = []  # List to store dynamic pydantic tools
+        self._desc_overrides = load_description_overrides()  # Dictionary to store {server__tool: description}
+        # Dictionary to store {slash command: (handler taking the command arguments, whether arguments are required)}
+        self._slash_handlers = {
+            "/addMcpServer": (lambda args: self.add_mcp_configuration(" ".join(args)), False),
+            "/list": (lambda args: self.list_mcp_servers(), False),
+            "/enable": (lambda args: self.toggle_server_status(args, True), True),  # Pass list of server names
+            "/disable": (lambda args: self.toggle_server_status(args, False), True),  # Pass list of server names
+            "/functions": (lambda args: self.list_server_functions(args[0]), True),
+            "/dropMcpServer": (lambda args: self.drop_mcp_server(args[0]), True),
+        }
+
+    async def _load_config(self) -> dict:
+        """
+        Return the parsed configuration file, re-reading it only when it changed on disk.
+
+        Returns:
+            dict: The parsed configuration.
+
+        Raises:
+            FileNotFoundError: If the configuration file does not exist.
+            orjson.JSONDecodeError: If the configuration file is not valid JSON.
+        """
+        mtime = (await asyncio.to_thread(os.stat, self.config_file)).st_mtime_ns
+        if self._config_cache is None or self._config_cache[0] != mtime:
+            raw = await asyncio.to_thread(_read_bytes, self.config_file)
+            self._config_cache = (mtime, orjson.loads(raw))
+        return self._config_cache[1]
+
+    async def _save_config(self, config: dict) -> None:
+        """
+        Write the configuration file and keep the in-memory copy in sync with it.
+
+        Args:
+            config (dict): The configuration to save.
+        """
+        await asyncio.to_thread(_write_bytes, self.config_file, orjson.dumps(config, option=orjson.OPT_INDENT_2))
+        self._config_cache = ((await asyncio.to_thread(os.stat, self.config_file)).st_mtime_ns, config)
 
     async def connect_to_server(self) -> None:
         """
@@ -126,107 +247,316 @@ class MCPClient:
 
         logger.info(f"Loading configuration from {self.config_file}.")
         try:
-            with open(self.config_file) as f:
-                config = json.load(f)
+            config = await self._load_config()
         except FileNotFoundError:
             raise ConfigurationError(f"{self.config_file} file not found.")
-        except json.JSONDecodeError:
+        except orjson.JSONDecodeError:
             raise ConfigurationError(f"{self.config_file} is not a valid JSON file.")
         
         logger.debug("Available servers in config: %s", list(config['mcpServers'].keys()))
-        
-        # Connect only to enabled servers in config
+
+        # Connect only to enabled servers in config, all of them at once. Servers connected
+        # by an earlier, partly failed attempt are kept
+        enabled_servers = {}
         for server_name, server_config in config['mcpServers'].items():
+            if server_name in self.sessions:
+                continue
             logger.info(f"Processing server configuration for {server_name}.")
-            logger.debug(f"Server configuration details: %s", json.dumps(server_config, indent=2))
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("Server configuration details: %s", json.dumps(server_config, indent=2))
             if server_config.get("enable", False):
-                logger.debug(f"Attempting to load {server_name} server config.")
-                
-                server_params = StdioServerParameters(
-                    command=server_config['command'],
-                    args=server_config['args'],
-                    env=server_config.get('env'),
-                )
-                logger.info("Created server parameters: command=%s, args=%s, env=%s",
-                              server_params.command, server_params.args, server_params.env)
-               
-                try:
-                    # Create and store session with server name as key
-                    stdio_transport = await self.exit_stack.enter_async_context(stdio_client(server_params))
-                    stdio, write = stdio_transport
-                    session = await self.exit_stack.enter_async_context(ClientSession(stdio, write))
-                    await session.initialize()
-                    self.sessions[server_name] = session
-                    
-                    # Create and store an Agent for this server
-                    server_agent: Agent = Agent(
-                        model,
-                        system_prompt=(
-                            f"You are an AI assistant that helps interact with the {server_name} server. "
-                            "You will use the available tools to process requests and provide responses."
-                            "Make sure to always give feedback to the user after you have called the tool, especially when the tool does not generate any message itself."
-                        )
-                    )
-                    self.agents[server_name] = server_agent
-                    
-                    # List available tools for this server
-                    response = await session.list_tools()
-                    server_tools = [{
-                        "name": f"{server_name}__{tool.name}",
-                        "description": tool.description,
-                        "input_schema": tool.inputSchema
-                    } for tool in response.tools]
-                except Exception as e:
-                    raise ConnectionError(f"Failed to connect to MCP server {server_name}: {str(e)}")
-                
-                # Add server's tools to overall available tools
-                self.available_tools.extend(server_tools)
-
-                # Create corresponding dynamic pydantic tools
-                # if pydantic-ai provides fix for OpenAI this can be used
-                # now no dynalic tools are used
-                for tool in response.tools:
-                    
-                    # Long descriptions beyond 1023 are not supported with OpenAI,
-                    # so replacing with a local file description optimized for use if it exists.
-                    file_name = f"./mcp-tool-description-overrides/{server_name}__{tool.name}"
-
-                    if os.path.exists(file_name):
-                        try:
-                            with open(file_name, 'r') as f:
-                                file_content = f.read()
-                            tool.description = file_content
-                        except Exception as e:
-                            logging.error(f"An error occurred while reading the file: {e}")
-                            raise
-                        finally: 
-                            f.close
-                    else:
-                        logger.debug(f"File '{file_name}' not found. Using default description.")
-
-                    # Create corresponding dynamic pydantic tools
-                    dynamic_tool = self.create_dynamic_tool(tool, server_name, server_agent)
-                    self.tools[tool.name] = {
-                        "name": tool.name,
-                        "callable": self.call_tool(f"{server_name}__{tool.name}"),
-                        "schema": {
-                            "type": "function",
-                            "function": {
-                                "name": tool.name,
-                                "description": tool.description,
-                                "parameters": tool.inputSchema,
-                            },
-                        },
-                    }
-                    logger.debug(f"Added tool: {tool.name}")
-                
-                logger.info(f"Connected to server {server_name} with tools: {', '.join(tool['name'] for tool in server_tools)}")
-
-                self.connected = True
+                enabled_servers[server_name] = server_config
             else:
                 logging.info(f"Server {server_name} is disabled. Skipping connection.")
+
+        results = await asyncio.gather(
+            *(self._connect_one(server_name, server_config) for server_name, server_config in enabled_servers.items()),
+            return_exceptions=True
+        )
+
+        # Register the connected servers on this task, then report the first failure if any
+        errors = []
+        for server_name, result in zip(enabled_servers, results):
+            if isinstance(result, BaseException):
+                errors.append(result)
+                continue
+
+            session, server_agent, tools = result
+            self.sessions[server_name] = session
+            self.agents[server_name] = server_agent
+
+            if tools is None:
+                self._register_lazy_tools(server_name)
+            else:
+                self._tools_cache[server_name] = tools
+                self._register_tools(server_name, tools)
+
+        self._invalidate_tools()
+        if errors:
+            raise errors[0]
+        self.connected = True
         logging.info("Done connecting to servers.")
 
+    def _register_tools(self, server_name: str, tools: list) -> None:
+        """
+        Register the tools listed by a connected server.
+
+        Args:
+            server_name (str): The name of the server.
+            tools (list): The tools returned by the server's list_tools.
+        """
+        server_tools = []
+        for tool in tools:
+            server__tool_name = f"{server_name}__{tool.name}"
+
+            # Long descriptions beyond 1023 are not supported with OpenAI,
+            # so replacing with a local file description optimized for use if it exists.
+            file_content = self._desc_overrides.get(server__tool_name)
+
+            if file_content is not None:
+                tool.description = file_content
+            else:
+                logger.debug(f"No description override for '{server__tool_name}'. Using default description.")
+
+            server_tools.append({
+                "name": server__tool_name,
+                "description": tool.description,
+                "input_schema": tool.inputSchema
+            })
+            self.tool_registry[server__tool_name] = (server_name, tool.name)
+            logger.debug(f"Added tool: {tool.name}")
+
+        # Add server's tools to overall available tools
+        self.available_tools.extend(server_tools)
+
+        logger.info(f"Connected to server {server_name} with tools: {', '.join(tool['name'] for tool in server_tools)}")
+
+    def _register_lazy_tools(self, server_name: str) -> None:
+        """
+        Register a single list_tools tool for a server with lazy_tools enabled.
+
+        The server's own tools are only fetched and registered once the LLM calls it,
+        so servers that are enabled but never used cost no list_tools round trip.
+
+        Args:
+            server_name (str): The name of the server.
+        """
+        shim_name = f"{server_name}__list_tools"
+        self.tool_registry[shim_name] = (server_name, None)  # No tool name: the server's tools are not loaded yet
+        self.available_tools.append({
+            "name": shim_name,
+            "description": f"Activate the tools of the {server_name} server and list them. Call this before using the {server_name} server.",
+            "input_schema": {"type": "object", "properties": {}}
+        })
+        logger.info(f"Connected to server {server_name}, its tools are loaded on first use.")
+
+    async def _activate_tools(self, server_name: str) -> str:
+        """
+        Fetch and register the tools of a lazy_tools server.
+
+        Args:
+            server_name (str): The name of the server.
+
+        Returns:
+            str: The activated tools, which the LLM can use from the next query on.
+        """
+        shim_name = f"{server_name}__list_tools"
+        response = await self.sessions[server_name].list_tools()
+
+        # Another call may have activated the tools while this one was waiting
+        if shim_name in self.tool_registry and self.tool_registry[shim_name][1] is None:
+            del self.tool_registry[shim_name]
+            self.available_tools = [tool for tool in self.available_tools if tool["name"] != shim_name]
+            self._tools_cache[server_name] = response.tools
+            self._register_tools(server_name, response.tools)
+            self._invalidate_tools()
+
+        return f"Activated the tools of server '{server_name}':\n" + "\n".join(
+            f"- {server_name}__{tool.name}: {tool.description}" for tool in response.tools
+        )
+
+    async def _hold_session(self, server_params: StdioServerParameters, ready: asyncio.Future) -> None:
+        """
+        Own the stdio transport and session of one server for as long as it is connected.
+
+        stdio_client runs an anyio task group, which must be exited by the task that entered it.
+        Each server therefore gets its own task that opens the contexts, hands the session back
+        through `ready` and keeps them open until cleanup.
+
+        Args:
+            server_params (StdioServerParameters): The parameters used to spawn the server.
+            ready (asyncio.Future): Resolved with the initialized session, or with the connection error.
+        """
+        try:
+            async with AsyncExitStack() as stack:
+                stdio, write = await stack.enter_async_context(stdio_client(server_params))
+                session = await stack.enter_async_context(ClientSession(stdio, write))
+                await session.initialize()
+                ready.set_result(session)
+                await self._shutdown.wait()
+        except Exception as e:
+            if not ready.done():
+                ready.set_exception(e)
+            else:
+                logging.error(f"MCP session closed with an error: {e}")
+
+    async def _open_session(self, server_name: str, server_params: StdioServerParameters) -> ClientSession:
+        """
+        Spawn a server and return its initialized session.
+
+        Args:
+            server_name (str): The name of the server.
+            server_params (StdioServerParameters): The parameters used to spawn the server.
+
+        Returns:
+            ClientSession: The initialized session.
+        """
+        ready = asyncio.get_running_loop().create_future()
+        self._server_params[server_name] = server_params
+        self._server_tasks[server_name] = asyncio.create_task(self._hold_session(server_params, ready))
+        return await ready
+
+    async def _close_session(self, server_name: str) -> None:
+        """
+        Stop the task owning a server's session, which closes the session and ends the server process.
+
+        Args:
+            server_name (str): The name of the server.
+        """
+        task = self._server_tasks.pop(server_name, None)
+        if task is not None:
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+
+    async def _reconnect(self, server_name: str) -> None:
+        """
+        Respawn a server whose process died, keeping its registered tools.
+
+        Args:
+            server_name (str): The name of the server.
+        """
+        try:
+            await self._close_session(server_name)
+            self.sessions[server_name] = await self._open_session(server_name, self._server_params[server_name])
+            logging.info(f"Reconnected to server {server_name}.")
+        except Exception as e:
+            logging.error(f"Failed to reconnect to MCP server {server_name}: {e}")
+        finally:
+            self._reconnecting.pop(server_name, None)
+
+    def _create_server_agent(self, server_name: str) -> Agent:
+        """
+        Create the Agent that helps interact with a server.
+
+        Args:
+            server_name (str): The name of the server.
+
+        Returns:
+            Agent: The server agent.
+        """
+        _, model, _ = get_client_and_model()
+        return Agent(
+            model,
+            system_prompt=(
+                f"You are an AI assistant that helps interact with the {server_name} server. "
+                "You will use the available tools to process requests and provide responses."
+                "Make sure to always give feedback to the user after you have called the tool, especially when the tool does not generate any message itself."
+            )
+        )
+
+    async def _connect_one(self, server_name: str, server_config: dict) -> tuple[ClientSession, Agent, Optional[list]]:
+        """
+        Connect to a single MCP server and fetch its tools.
+
+        Args:
+            server_name (str): The name of the server.
+            server_config (dict): The server configuration dictionary.
+
+        Returns:
+            tuple[ClientSession, Agent, Optional[list]]: The session, the server agent and the server's tools,
+                or None as tools for a server with lazy_tools enabled.
+
+        Raises:
+            ConnectionError: If unable to connect to the MCP server.
+        """
+        logger.debug(f"Attempting to load {server_name} server config.")
+
+        server_params = StdioServerParameters(
+            command=server_config['command'],
+            args=server_config['args'],
+            env=server_config.get('env'),
+        )
+        logger.info("Created server parameters: command=%s, args=%s, env=%s",
+                      server_params.command, server_params.args, server_params.env)
+
+        try:
+            session = await self._open_session(server_name, server_params)
+
+            # Servers with lazy_tools only list their tools once the LLM asks for them
+            if server_config.get("lazy_tools", False):
+                return session, self._create_server_agent(server_name), None
+
+            # Send the list_tools request first and build the Agent while the server answers
+            tools_task = asyncio.create_task(session.list_tools())
+            await asyncio.sleep(0)
+            try:
+                # Create an Agent for this server
+                server_agent = self._create_server_agent(server_name)
+            except Exception:
+                tools_task.cancel()
+                raise
+
+            # List available tools for this server
+            response = await tools_task
+        except Exception as e:
+            # Do not leave the server process running without a session using it
+            await self._close_session(server_name)
+            raise ConnectionError(f"Failed to connect to MCP server {server_name}: {str(e)}")
+
+        return session, server_agent, response.tools
+
+    async def _warm(self) -> None:
+        """
+        Connect to the servers and build the tools dict, system prompt and tool schemas.
+        """
+        await self.connect_to_server()
+        if self.sessions:
+            await self.get_available_tools()
+
+    def warmup(self) -> asyncio.Task:
+        """
+        Start connecting to the MCP servers in the background.
+
+        Calling this at startup lets the application serve requests while the servers
+        are spawned, instead of making the first query pay for it. The tools are built
+        as well, so the first query finds them cached. Repeated calls return the same task.
+
+        Returns:
+            asyncio.Task: The task connecting to the servers.
+        """
+        if self._warmup_task is None:
+            self._warmup_task = asyncio.create_task(self._warm())
+        return self._warmup_task
+
+    async def wait_until_ready(self) -> None:
+        """
+        Wait until the servers started by warmup() are connected.
+
+        A failed warmup is not kept: the next call starts a new one, so a server that
+        was briefly unavailable at startup does not fail every later request.
+
+        Raises:
+            ConfigurationError: If the configuration file is missing or invalid.
+            ConnectionError: If unable to connect to an MCP server.
+        """
+        task = self.warmup()
+        try:
+            await task
+        except Exception:
+            if self._warmup_task is task:
+                self._warmup_task = None
+            raise
+
     async def add_mcp_configuration(self, query: str) -> Optional[str]:
         """
         Add a new MCP server configuration if the query starts with 'mcpServer'.
@@ -251,9 +581,9 @@ class MCPClient:
             elif close_braces > open_braces:
                 config_str = '{' * (close_braces - open_braces) + config_str
                 braces_warning = "Added missing opening brace(s) to the configuration."
-            config_str = query
-            new_config = json.loads(config_str)
-            logging.debug("New configuration to add:", json.dumps(new_config, indent=2))
+            new_config = orjson.loads(config_str)
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("New configuration to add: %s", json.dumps(new_config, indent=2))
 
             # Validate the new configuration
             if not isinstance(new_config, dict):
@@ -275,11 +605,10 @@ class MCPClient:
 
             # Load the existing config
             try:
-                with open(self.config_file, "r") as f:
-                    config = json.load(f)
+                config = await self._load_config()
             except FileNotFoundError:
                 return f"Error: {self.config_file} file not found."
-            except json.JSONDecodeError:
+            except orjson.JSONDecodeError:
                 return f"Error: {self.config_file} is not a valid JSON file."
 
             # Check if the server name already exists
@@ -298,18 +627,17 @@ class MCPClient:
             }
 
             # Save the updated config back to the file
-            with open(self.config_file, "w") as f:
-                json.dump(config, f, indent=2)
+            await self._save_config(config)
 
             # Connect to the new server
             await self.connect_to_server_with_config(server_name, config["mcpServers"][server_name])
 
-            return f"Successfully added and connected to server '{server_name}'."
+            return f"Successfully added and connected to server '{server_name}'. {braces_warning}".rstrip()
 
-        except json.JSONDecodeError:
+        except orjson.JSONDecodeError:
             return "Error: Invalid JSON format in the query."
         except Exception as e:
-            raise f"Error adding MCP configuration: {str(e)}"
+            raise ToolError(f"Error adding MCP configuration: {str(e)}") from e
 
 
     async def drop_mcp_server(self, server_name: str) -> str:
@@ -323,8 +651,7 @@ class MCPClient:
             str: Success message or error message if the operation fails.
         """
         try:
-            with open(self.config_file, "r") as f:
-                config = json.load(f)
+            config = await self._load_config()
 
             if server_name not in config.get("mcpServers", {}):
                 return f"Error: Server '{server_name}' does not exist in the configuration."
@@ -333,19 +660,34 @@ class MCPClient:
             del config["mcpServers"][server_name]
 
             # Save the updated config back to the file
-            with open(self.config_file, "w") as f:
-                json.dump(config, f, indent=2)
+            await self._save_config(config)
+
+            # Stop the server process, and a reconnect of it if one is running
+            reconnect_task = self._reconnecting.pop(server_name, None)
+            if reconnect_task is not None:
+                reconnect_task.cancel()
+                await asyncio.gather(reconnect_task, return_exceptions=True)
+            await self._close_session(server_name)
+            self._server_params.pop(server_name, None)
 
             # Disconnect the server if it is connected
             if server_name in self.sessions:
                 del self.sessions[server_name]
+                self.tool_registry = {
+                    name: entry for name, entry in self.tool_registry.items() if entry[0] != server_name
+                }
+                self.available_tools = [
+                    tool for tool in self.available_tools if tool["name"] in self.tool_registry
+                ]
+                self._tools_cache.pop(server_name, None)
+                self._invalidate_tools()
                 del self.agents[server_name]
 
             return f"Successfully removed and disconnected server '{server_name}'."
 
         except FileNotFoundError:
             return f"Error: {self.config_file} file not found."
-        except json.JSONDecodeError:
+        except orjson.JSONDecodeError:
             return f"Error: {self.config_file} is not a valid JSON file."
         except Exception as e:
             return f"Error removing MCP server: {str(e)}"
@@ -363,20 +705,20 @@ class MCPClient:
             args=server_config['args'],
             env=None
         )
-        stdio_transport = await self.exit_stack.enter_async_context(stdio_client(server_params))
-        stdio, write = stdio_transport
-        session = await self.exit_stack.enter_async_context(ClientSession(stdio, write))
-        await session.initialize()
+        session = await self._open_session(server_name, server_params)
         self.sessions[server_name] = session
 
         response = await session.list_tools()
+        self._tools_cache[server_name] = response.tools
         server_tools = [{
             "name": f"{server_name}__{tool.name}",
             "description": tool.description,
             "input_schema": tool.inputSchema
         } for tool in response.tools]
+        self.tool_registry.update({f"{server_name}__{tool.name}": (server_name, tool.name) for tool in response.tools})
 
         self.available_tools.extend(server_tools)
+        self._invalidate_tools()
         return None
 
     async def list_mcp_servers(self) -> str:
@@ -387,8 +729,7 @@ class MCPClient:
             str: A formatted string listing enabled and disabled servers.
         """
         try:
-            with open(self.config_file, "r") as f:
-                config = json.load(f)
+            config = await self._load_config()
 
             enabled_servers = [
                 server_name for server_name, server_config in config.get("mcpServers", {}).items()
@@ -403,7 +744,7 @@ class MCPClient:
             return f"**Enabled servers:**{newline}1. {newline}1. ".join(enabled_servers) + f"{newline}{newline}Disabled servers: {', '.join(disabled_servers)}{newline}Next command suggestion: {suggestion}"
         except FileNotFoundError:
             return f"Error: {self.config_file} file not found."
-        except json.JSONDecodeError:
+        except orjson.JSONDecodeError:
             return f"Error: {self.config_file} is not a valid JSON file."
 
     async def list_server_functions(self, server_name: str) -> str:
@@ -419,9 +760,13 @@ class MCPClient:
         if server_name not in self.sessions:
             return f"Error: Server '{server_name}' is not connected."
         try:
-            response = await self.sessions[server_name].list_tools()
+            # Tool schemas are static per session, so only ask the server on a cache miss
+            tools = self._tools_cache.get(server_name)
+            if tools is None:
+                response = await self.sessions[server_name].list_tools()
+                tools = self._tools_cache[server_name] = response.tools
             functions = []
-            for tool in response.tools:
+            for tool in tools:
                 parameters = tool.inputSchema.get('properties', {})
                 functions.append({
                     "function name": tool.name,
@@ -437,9 +782,24 @@ class MCPClient:
         Clean up resources by closing sessions and clearing tool lists.
         """
         logging.debug("Cleaning up resources...")
-        await self.exit_stack.aclose()
+        for reconnect_task in self._reconnecting.values():
+            reconnect_task.cancel()
+        await asyncio.gather(*self._reconnecting.values(), return_exceptions=True)
+        self._reconnecting.clear()
+        if self._warmup_task is not None:
+            self._warmup_task.cancel()
+            await asyncio.gather(self._warmup_task, return_exceptions=True)
+            self._warmup_task = None
+        self._shutdown.set()
+        await asyncio.gather(*self._server_tasks.values(), return_exceptions=True)
+        self._server_tasks.clear()
+        self._server_params.clear()
+        self._shutdown = asyncio.Event()
         self.sessions.clear()
+        self._tools_cache.clear()
         self.available_tools.clear()
+        self.tool_registry.clear()
+        self._invalidate_tools()
         self.connected = False
         logging.info("Cleanup completed.")
 
@@ -455,8 +815,7 @@ class MCPClient:
             str: A message indicating the result of the operation.
         """
         try:
-            with open(self.config_file, "r") as f:
-                config = json.load(f)
+            config = await self._load_config()
 
             results = []
             for server_name in server_names:
@@ -470,27 +829,17 @@ class MCPClient:
                 results.append(f"Successfully {status} server '{server_name}'.")
 
             # Save the updated config back to the file
-            with open(self.config_file, "w") as f:
-                json.dump(config, f, indent=2)
+            await self._save_config(config)
 
             return "\n".join(results)
 
         except FileNotFoundError:
             return "Error: mcp_config.json file not found."
-        except json.JSONDecodeError:
+        except orjson.JSONDecodeError:
             return "Error: mcp_config.json is not a valid JSON file."
         except Exception as e:
             return f"Error toggling server status: {str(e)}"
         
-    async def cleanup(self):
-        """Clean up resources."""
-        logging.debug("Cleaning up resources...")
-        await self.exit_stack.aclose()
-        self.sessions.clear()
-        self.available_tools.clear()
-        self.connected = False
-        logging.info("Cleanup completed.")
-    
     async def get_available_tools(self) -> List[Any]:
         """
         Retrieve a list of available tools from the MCP server.
@@ -501,34 +850,12 @@ class MCPClient:
         """
         if not self.sessions:
             raise RuntimeError("Not connected to MCP server")
-    
-        def simplify_schema(schema):
-            """
-            Simplifies a JSON schema by removing unsupported constructs like 'allOf', 'oneOf', etc.,
-            and preserving the core structure and properties. Needed for pandoc to work with the LLM.
-
-            Args:
-                schema (dict): The original JSON schema.
-
-            Returns:
-                dict: A simplified JSON schema.
-            """
-            # Create a new schema with only the basic structure
-            simplified_schema = {
-                "type": "object",
-                "properties": schema.get("properties", {}),
-                "required": schema.get("required", []),
-                "additionalProperties": schema.get("additionalProperties", False)
-            }
-
-            # Remove unsupported constructs like 'allOf', 'oneOf', 'anyOf', 'not', 'enum' at the top level
-            for key in ["allOf", "oneOf", "anyOf", "not", "enum"]:
-                if key in simplified_schema:
-                    del simplified_schema[key]
 
-            return simplified_schema
+        # The tools only change when servers are connected or removed, so build them once per tool set
+        if self._openai_tools_cache is not None:
+            return self._openai_tools_cache
 
-        return  {
+        tools = {
             tool['name']: {
                 "name": tool['name'],
                 "callable": self.call_tool(
@@ -547,7 +874,79 @@ class MCPClient:
             if tool['name']
             != "xxx"  # Excludes xxx tool as it has an incorrect schema
         }
-        
+        self._system_prompt = render_system_prompt(tools)
+        self._openai_tool_payload = [t["schema"] for t in tools.values()]
+        self._openai_tools_cache = tools
+        return tools
+
+    def _invalidate_tools(self) -> None:
+        """
+        Drop the tools and system prompt built by get_available_tools after the connected servers changed.
+        """
+        self._openai_tools_cache = None
+        self._system_prompt = None
+        self._openai_tool_payload = None
+
+    def tool_payload(self) -> Optional[list]:
+        """
+        Return the tool schemas for the tools last returned by get_available_tools.
+
+        Returns:
+            Optional[list]: The schemas to pass to the LLM, or None if the tools changed since.
+        """
+        return self._openai_tool_payload
+
+    def rendered_system_prompt(self) -> Optional[str]:
+        """
+        Return the system prompt rendered for the tools last returned by get_available_tools.
+
+        Returns:
+            Optional[str]: The rendered system prompt, or None if the tools changed since.
+        """
+        return self._system_prompt
+
+    async def _dispatch(self, server__tool_name: str, *args, **kwargs) -> Optional[str]:
+        """
+        Execute a tool through the MCP server that provides it.
+
+        Args:
+            server__tool_name (str): The name of the tool to execute.
+            **kwargs: The tool arguments.
+
+        Returns:
+            Optional[str]: The text returned by the tool, or None if the call failed or timed out.
+        """
+        server_name, tool_name = self.tool_registry[server__tool_name]
+
+        # Hold calls to a server that is being respawned until it is back
+        reconnect_task = self._reconnecting.get(server_name)
+        if reconnect_task is not None:
+            await asyncio.shield(reconnect_task)
+
+        try:
+            if tool_name is None:
+                return await self._activate_tools(server_name)
+
+            response = await asyncio.wait_for(
+                self.sessions[server_name].call_tool(tool_name, arguments=kwargs),
+                timeout=10.0  # Set a timeout
+            )
+            return response.content[0].text if response.content else None
+        except (ConnectionResetError, BrokenPipeError, ProcessLookupError, BrokenResourceError, ClosedResourceError) as e:
+            # The server process is gone, respawn it in the background instead of failing every later call
+            logging.error(f"MCP server {server_name} is not reachable, reconnecting: {e}")
+            if server_name not in self._reconnecting:
+                self._reconnecting[server_name] = asyncio.create_task(self._reconnect(server_name))
+            return None
+        except asyncio.TimeoutError:
+            # pandoc docker will not return timely respons
+            logging.debug("Timeout while calling MCP server")
+            return None
+        except Exception as e:
+            #ignore for now, many mcp servers not production ready
+            logging.error(f"Error calling MCP server: {e}")
+            return None
+
     def call_tool(self, server__tool_name: str) -> Any:
         """
         Create a callable function for a specific tool.
@@ -559,28 +958,10 @@ class MCPClient:
         Returns:
             Any: A callable async function that executes the specified tool.
         """
-        server_name, tool_name = server__tool_name.split("__")  
-
-        if not server_name in self.sessions:
+        if server__tool_name not in self.tool_registry:
             raise RuntimeError("Not connected to MCP server")
- 
-        async def callable(*args, **kwargs):
-            try:
-                response = await asyncio.wait_for(
-                    self.sessions[server_name].call_tool(tool_name, arguments=kwargs),
-                    timeout=10.0  # Set a timeout
-                )
-                return response.content[0].text if response.content else None
-            except asyncio.TimeoutError:
-                # pandoc docker will not return timely respons
-                logging.debug("Timeout while calling MCP server")
-                return None
-            except Exception as e:
-                #ignore for now, many mcp servers not production ready
-                logging.error(f"Error calling MCP server: {e}")
-                return None
- 
-        return callable
+
+        return functools.partial(self._dispatch, server__tool_name)
     
     def create_dynamic_tool(self, tool, server_name: str, server_agent: Agent) -> Tool:
         """
@@ -630,27 +1011,132 @@ class MCPClient:
         """
         try:
             command, *args = query.split()
-            if command == "/addMcpServer":
-                result = await self.add_mcp_configuration(" ".join(args))
-            elif command == "/list":
-                result = await self.list_mcp_servers()
-            elif command == "/enable" and args:
-                result = await self.toggle_server_status(args, True)  # Pass list of server names
-            elif command == "/disable" and args:
-                result = await self.toggle_server_status(args, False)  # Pass list of server names
-            elif command == "/functions" and args:
-                result = await self.list_server_functions(args[0])
-            elif command == "/dropMcpServer" and args:
-                result = await self.drop_mcp_server(args[0])
-            else:
+            handler, requires_args = self._slash_handlers.get(command, (None, False))
+            if handler is None or (requires_args and not args):
                 result = "Error: Invalid command or missing arguments."
+            else:
+                result = await handler(args)
         except Exception as e:
             logging.error(f"Error handling slash commands: {e}")
             raise
 
         return result
     
-async def agent_loop(query: str, tools: dict, messages: List[dict] = None, deps: Deps = None):
+def simplify_schema(schema):
+    """
+    Simplifies a JSON schema by removing unsupported constructs like 'allOf', 'oneOf', etc.,
+    and preserving the core structure and properties. Needed for pandoc to work with the LLM.
+
+    Args:
+        schema (dict): The original JSON schema.
+
+    Returns:
+        dict: A simplified JSON schema.
+    """
+    # Create a new schema with only the basic structure
+    simplified_schema = {
+        "type": "object",
+        "properties": schema.get("properties", {}),
+        "required": schema.get("required", []),
+        "additionalProperties": schema.get("additionalProperties", False)
+    }
+
+    # Remove unsupported constructs like 'allOf', 'oneOf', 'anyOf', 'not', 'enum' at the top level
+    for key in ["allOf", "oneOf", "anyOf", "not", "enum"]:
+        if key in simplified_schema:
+            del simplified_schema[key]
+
+    return simplified_schema
+
+@functools.lru_cache(maxsize=1)
+def get_llm_semaphore() -> asyncio.Semaphore:
+    """
+    Return the semaphore bounding how many LLM calls run at once, sized by LLM_CONCURRENCY.
+
+    Requests beyond the limit wait here instead of being throttled by the provider.
+
+    Returns:
+        asyncio.Semaphore: The shared semaphore.
+    """
+    return asyncio.Semaphore(int(os.environ.get("LLM_CONCURRENCY", "8")))
+
+@functools.lru_cache(maxsize=1)
+def get_max_tool_result_chars() -> int:
+    """
+    Return how many characters of a tool result are sent to the LLM, set by MAX_TOOL_RESULT_CHARS.
+
+    Returns:
+        int: The limit, 0 meaning unlimited.
+    """
+    return int(os.environ.get("MAX_TOOL_RESULT_CHARS", "16000"))
+
+def compact_tool_result(content: str) -> str:
+    """
+    Cut a tool result down to get_max_tool_result_chars() characters.
+
+    The follow-up LLM call re-sends every tool message, so a single oversized result
+    (a crawled page, a large file) would otherwise dominate the input tokens and the
+    time to first token of the answer.
+
+    Args:
+        content: The serialized tool result
+
+    Returns:
+        str: The result, or its beginning followed by a note of how much was left out.
+    """
+    limit = get_max_tool_result_chars()
+    if not limit or len(content) <= limit:
+        return content
+    return f"{content[:limit]}\n[... {len(content) - limit} more characters truncated]"
+
+# Completions of deterministic requests, so repeated conversations skip the LLM round trip
+completion_cache = CompletionCache()
+
+async def create_completion(client: AsyncOpenAI, **request: Any) -> Any:
+    """
+    Call client.chat.completions.create, answering repeated deterministic requests from completion_cache.
+
+    Requests with a non-zero temperature are always sent, since their answers are meant to vary.
+
+    Args:
+        client: The client used to call the LLM
+        **request: The keyword arguments for chat.completions.create
+
+    Returns:
+        Any: The chat completion.
+    """
+    if request.get("temperature") != 0:
+        async with get_llm_semaphore():
+            return await client.chat.completions.create(**request)
+
+    key = CompletionCache.key(**request)
+    response = completion_cache.get(key)
+    if response is None:
+        async with get_llm_semaphore():
+            response = await client.chat.completions.create(**request)
+        completion_cache.put(key, response)
+    return response
+
+def render_system_prompt(tools: dict) -> str:
+    """
+    Render SYSTEM_PROMPT with the name and description of every available tool.
+
+    Args:
+        tools: Dictionary of available tools and their schemas
+
+    Returns:
+        str: The rendered system prompt.
+    """
+    return SYSTEM_PROMPT.format(
+        tools="\n- ".join(
+            [
+                f"{t['name']}: {t['schema']['function']['description']}"
+                for t in tools.values()
+            ]
+        )
+    )
+
+async def agent_loop(query: str, tools: dict, messages: List[dict] = None, deps: Deps = None, system_prompt: Optional[str] = None, tool_payload: Optional[list] = None, on_token: Optional[Callable[[str], None]] = None, client: Optional[AsyncOpenAI] = None):
     """
     Main interaction loop that processes user queries using the LLM and available tools.
  
@@ -663,34 +1149,43 @@ async def agent_loop(query: str, tools: dict, messages: List[dict] = None, deps:
         query: User's input question or command
         tools: Dictionary of available tools and their schemas
         messages: List of messages to pass to the LLM, defaults to None
+        system_prompt: System prompt already rendered for these tools, defaults to None
+        tool_payload: Tool schemas already collected for these tools, defaults to None
+        on_token: Called with each piece of the final response as it is generated, defaults to None
+        client: Client used to call the LLM, defaults to the one from get_client_and_model()
     """
  
     messages = (
         [
             {
                 "role": "system",
-                "content": SYSTEM_PROMPT.format(
-                    tools="\n- ".join(
-                        [
-                            f"{t['name']}: {t['schema']['function']['description']}"
-                            for t in tools.values()
-                        ]
-                    )
+                "content": system_prompt or render_system_prompt(
+                    tools
                 ),  # Creates System prompt based on available MCP server tools
             },
         ]
         if messages is None
         else messages  # reuse existing messages if provided
     )
+    # Track a running hash of the conversation for the completion cache key
+    if not isinstance(messages, HashedMessageList):
+        messages = HashedMessageList(messages)
     # add user query to the messages list
     messages.append({"role": "user", "content": query})
-    pprint.pprint(messages)
+    logger.debug("Added user message: %s", messages[-1])
+
+    default_client, _, language_model = get_client_and_model()
+    client = client or default_client
 
     # Query LLM with the system prompt, user query, and available tools
-    first_response = await client.chat.completions.create(
+    first_response = await create_completion(
+        client,
         model=language_model,
         messages=messages,
-        tools=([t["schema"] for t in tools.values()] if len(tools) > 0 else None),
+        tools=(
+            (tool_payload if tool_payload is not None else [t["schema"] for t in tools.values()])
+            if len(tools) > 0 else None
+        ),
         max_tokens=4096,
         temperature=0,
     )
@@ -705,87 +1200,135 @@ async def agent_loop(query: str, tools: dict, messages: List[dict] = None, deps:
  
     if stop_reason == "tool_calls":
         # Extract tool use details from response
-        for tool_call in first_response.choices[0].message.tool_calls:
-            arguments = (
-                json.loads(tool_call.function.arguments)
-                if isinstance(tool_call.function.arguments, str)
-                else tool_call.function.arguments
-            )
-            # Call the tool with the arguments using our callable initialized in the tools dict
+        tool_calls = first_response.choices[0].message.tool_calls
+        arguments_list = [
+            orjson.loads(tool_call.function.arguments)
+            if isinstance(tool_call.function.arguments, str)
+            else tool_call.function.arguments
+            for tool_call in tool_calls
+        ]
+        # Call the tools concurrently using our callables initialized in the tools dict,
+        # a failing tool only fails its own result
+        tool_results = await asyncio.gather(*(
+            tools[tool_call.function.name]["callable"](**arguments)
+            for tool_call, arguments in zip(tool_calls, arguments_list)
+        ), return_exceptions=True)
+
+        # Add the tool calls to messages with their ids, as one assistant turn
+        messages.append({
+            "role": "assistant",
+            "content": None,
+            "tool_calls": [{
+                "id": tool_call.id,
+                "type": "function",
+                "function": {
+                    "name": tool_call.function.name,
+                    "arguments": orjson.dumps(arguments).decode()
+                }
+            } for tool_call, arguments in zip(tool_calls, arguments_list)]
+        })
+
+        # Add the tool results to the messages list in the order the LLM made the calls
+        for tool_call, tool_result in zip(tool_calls, tool_results):
             logging.debug(tool_call.function.name)
-            tool_result = await tools[tool_call.function.name]["callable"](**arguments)
-            if tool_result is None:
+            if isinstance(tool_result, Exception):
+                logging.error(f"Error calling tool {tool_call.function.name}: {tool_result}")
+                tool_result = f"Error calling tool {tool_call.function.name}: {tool_result}"
+            elif tool_result is None:
                 tool_result = f"{tool_call.function.name}"
-            #logging.debug("tool result begin")
-            #pprint.pprint(tool_result)
-            #logging.debug("tool result end")
-
-            # Add tool call to messages with an id
-            messages.append({
-                "role": "assistant",
-                "content": None,
-                "tool_calls": [{
-                    "id": tool_call.id,
-                    "type": "function",
-                    "function": {
-                        "name": tool_call.function.name,
-                        "arguments": json.dumps(arguments)
-                    }
-                }]
-            })
-            
-            # Add the tool result to the messages list
+
             messages.append(
                 {
                     "role": "tool",
                     "tool_call_id": tool_call.id,
                     "name": tool_call.function.name,
-                    "content": json.dumps(tool_result),
+                    # Tools return text, often JSON already; quoting it again would escape every character
+                    "content": compact_tool_result(
+                        tool_result if isinstance(tool_result, str) else orjson.dumps(tool_result).decode()
+                    ),
                 }
             )
-            pprint.pprint(messages)
-
-        # Query LLM with the user query and the tool results
-        new_response = await client.chat.completions.create(
-            model=language_model,
-            messages=messages,
-        )
+            logger.debug("Added tool result message: %s", messages[-1])
+
+        # Query LLM with the user query and the tool results.
+        # This cannot start before every tool has returned: the API rejects a conversation
+        # in which a tool_call id has no matching tool message.
+        async with get_llm_semaphore():
+            if on_token is None:
+                new_response = await client.chat.completions.create(
+                    model=language_model,
+                    messages=messages,
+                )
+                content = new_response.choices[0].message.content
+            else:
+                # Stream the response so the caller can show it while it is generated
+                stream = await client.chat.completions.create(
+                    model=language_model,
+                    messages=messages,
+                    stream=True,
+                )
+                parts = []
+                async for chunk in stream:
+                    token = chunk.choices[0].delta.content if chunk.choices else None
+                    if token:
+                        parts.append(token)
+                        on_token(token)
+                content = "".join(parts)
  
     elif stop_reason == "stop":
         # If the LLM stopped on its own, use the first response
-        new_response = first_response
+        content = first_response.choices[0].message.content
+        if on_token is not None and content:
+            on_token(content)
     else:
         raise ValueError(f"Unknown stop reason: {stop_reason}")
     
     # Add the LLM response to the messages list
     messages.append(
-        {"role": "assistant", "content": new_response.choices[0].message.content}
+        {"role": "assistant", "content": content}
     )
 
     # Return the LLM response and messages
-    return new_response.choices[0].message.content, messages
+    return content, messages
 
 def json_to_markdown(data, indent=0):
-    markdown = ""
-    prefix = "  " * indent  # Indentation for nested structures
-
-    if isinstance(data, dict):
-        for key, value in data.items():
-            markdown += f"{prefix}- **{key}**: "
-            if isinstance(value, (dict, list)):
-                markdown += "\n" + json_to_markdown(value, indent + 1)
-            else:
-                markdown += f"{value}\n"
-    elif isinstance(data, list):
-        for item in data:
-            if isinstance(item, (dict, list)):
-                markdown += f"{prefix}- \n{json_to_markdown(item, indent + 1)}"
-            else:
-                markdown += f"{prefix}- {item}\n"
-    else:
-        markdown += f"{prefix}- {data}\n"
-
-    return markdown
+    # Walk the structure with an explicit stack and collect the lines in a list,
+    # instead of recursing and concatenating strings at every level
+    parts = []
+    stack = [(data, indent)]
+    while stack:
+        node, level = stack.pop()
+        if level is None:  # Already rendered text
+            parts.append(node)
+            continue
+
+        prefix = "  " * level  # Indentation for nested structures
+        pending = []
+        if isinstance(node, dict):
+            for key, value in node.items():
+                if isinstance(value, (dict, list)):
+                    pending.append((f"{prefix}- **{key}**: \n", None))
+                    pending.append((value, level + 1))
+                else:
+                    pending.append((f"{prefix}- **{key}**: {value}\n", None))
+        elif isinstance(node, list):
+            if not any(isinstance(item, (dict, list)) for item in node):
+                # Flat lists (e.g. numeric series) are rendered in one pass, without the stack
+                parts.append("".join([f"{prefix}- {item}\n" for item in node]))
+                continue
+            for item in node:
+                if isinstance(item, (dict, list)):
+                    pending.append((f"{prefix}- \n", None))
+                    pending.append((item, level + 1))
+                else:
+                    pending.append((f"{prefix}- {item}\n", None))
+        else:
+            parts.append(f"{prefix}- {node}\n")
+
+        # Reversed so the first child is popped first
+        stack.extend(reversed(pending))
+
+    return "".join(parts)
 
 async def main():
     """
@@ -794,23 +1337,30 @@ async def main():
     mcp_client = MCPClient()
     await mcp_client.connect_to_server()
 
-    tools = await mcp_client.get_available_tools()
-    
     # Start interactive prompt loop for user queries
     messages = None
     while True:
         try:
-            # Get user input and check for exit commands
-            user_input = input("\nEnter your prompt (or 'quit' to exit): ")
+            # Servers with lazy_tools add tools while the loop runs
+            tools = await mcp_client.get_available_tools()
+
+            # Get user input and check for exit commands,
+            # without blocking the event loop that serves the MCP server sessions
+            user_input = await ainput("\nEnter your prompt (or 'quit' to exit): ")
             if user_input.lower() in ["quit", "exit", "q"]:
                 break
             if user_input.startswith("/"):
                 response = await mcp_client.handle_slash_commands(user_input)
             else:
                 # Process the prompt and run agent loop
-                response, messages = await agent_loop(user_input, tools, messages)
-            logging.debug("Response:", response)
-            # logging.debug("Messages:", messages)
+                response, messages = await agent_loop(
+                    user_input, tools, messages,
+                    system_prompt=mcp_client.rendered_system_prompt(),
+                    tool_payload=mcp_client.tool_payload(),
+                    on_token=lambda token: print(token, end="", flush=True)
+                )
+                print()
+            logger.debug("Response: %s", response)
         except KeyboardInterrupt:
             logging.debug("Exiting...")
             break
@@ -1,13 +1,16 @@
 from __future__ import annotations as _annotations
 
+import asyncio
 import httpx
+from collections import OrderedDict, deque
 from typing import Optional, Any, Dict
 from fastapi import FastAPI, HTTPException, Security, Depends
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, ORJSONResponse
 from contextlib import asynccontextmanager
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 from fastapi.middleware.cors import CORSMiddleware
 from supabase import create_client, Client
+from openai import AsyncOpenAI
 from pydantic import BaseModel
 from dotenv import load_dotenv
 import os
@@ -18,7 +21,7 @@ import logging
 logger = logging.getLogger(__name__)
 
 # mcp client for pydantic ai
-from mcp_client import MCPClient, Deps, logging, agent_loop
+from mcp_client import MCPClient, Deps, logging, agent_loop, get_client_and_model
 
 def validate_env_vars(required_vars: list[str]) -> None:
     """Validate that all required environment variables are set."""
@@ -33,6 +36,21 @@ load_dotenv()
 # Supabase setup
 supabase: Client = None
 
+# HTTP client shared by all requests, so connections are kept alive between them
+http_client: httpx.AsyncClient = None
+
+# LLM client sending its calls over the shared HTTP client
+openai_client: AsyncOpenAI = None
+
+# Most recent messages of the sessions served by this process, as ring buffers in chronological order.
+# Messages are added as they are stored, so warm sessions need no history query.
+# This assumes a single agent instance writes each session's messages.
+MAX_CACHED_SESSIONS = 1000
+history_cache: OrderedDict[str, deque] = OrderedDict()
+
+# Roles of the agent's messages for the message types stored in the messages table
+_ROLE_MAP = {"human": "user", "ai": "assistant"}
+
 # Define a context manager for startup and shutdown
 @asynccontextmanager
 async def lifespan(app: FastAPI):
@@ -57,10 +75,23 @@ async def lifespan(app: FastAPI):
             logging.error("Supabase client is not initialized. Please check your environment variables.")
             raise DatabaseConnectionError("Supabase client initialization failed.")
 
-        # Initialize MCPClient and connect to server
+        # Initialize the shared HTTP client
+        global http_client
+        http_client = httpx.AsyncClient(
+            http2=True,
+            limits=httpx.Limits(max_keepalive_connections=100, max_connections=200),
+            timeout=httpx.Timeout(60.0)
+        )
+
+        # Fail startup early if the LLM provider is not configured. The LLM client is built
+        # on the shared HTTP/2 connection pool, so its calls multiplex over it
+        global openai_client
+        openai_client = get_client_and_model(http_client)[0]
+
+        # Initialize MCPClient and connect to the servers in the background
         global mcp_client
         mcp_client = MCPClient()
-        await mcp_client.connect_to_server()
+        mcp_client.warmup()
         logging.info("Startup tasks completed successfully.")
     except Exception as e:
         logger.error(f"Error during startup: {e}")
@@ -72,10 +103,11 @@ async def lifespan(app: FastAPI):
     # Shutdown logic
     logger.info("Shutting down the FastAPI application.")
     await mcp_client.cleanup()  
+    await http_client.aclose()
     logging.info("Shutdown tasks completed successfully.")
 
 # Initialize FastAPI app with lifespan
-app = FastAPI(lifespan=lifespan)
+app = FastAPI(lifespan=lifespan, default_response_class=ORJSONResponse)
 security = HTTPBearer()
 
 app.add_middleware(
@@ -113,30 +145,47 @@ def verify_token(credentials: HTTPAuthorizationCredentials = Security(security))
 
 async def get_conversation_history(session_id: str, limit: int = 10) -> list[dict[str, Any]]:
     """Fetch the most recent conversation history for a session."""
+    cached = history_cache.get(session_id)
+    if cached is not None and cached.maxlen == limit:
+        history_cache.move_to_end(session_id)
+        return list(cached)
+
     try:
-        response = supabase.table("messages") \
+        # supabase-py is synchronous, so run the request in a worker thread to keep the event loop free
+        query = supabase.table("messages") \
             .select("*") \
             .eq("session_id", session_id) \
             .order("created_at", desc=True) \
-            .limit(limit) \
-            .execute()
+            .limit(limit)
+        response = await asyncio.to_thread(query.execute)
         
-        return response.data[::-1]  # Reverse to get chronological order
+        history = response.data[::-1]  # Reverse to get chronological order
     except Exception as e:
         raise DatabaseConnectionError(f"Failed to fetch conversation history: {str(e)}")
 
+    history_cache[session_id] = deque(history, maxlen=limit)
+    if len(history_cache) > MAX_CACHED_SESSIONS:
+        history_cache.popitem(last=False)
+    return history
+
 async def save_message(session_id: str, message_type: str, content: str, data: Optional[Dict] = None):
     """Store a message in the Supabase messages table."""
     message_obj = {"type": message_type, "content": content, **({"data": data} if data else {})}
 
     try:
-        supabase.table("messages").insert({
+        query = supabase.table("messages").insert({
             "session_id": session_id,
             "message": message_obj
-        }).execute()
+        })
+        await asyncio.to_thread(query.execute)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to store message: {str(e)}")
 
+    # Keep the cached history in step with the table, the ring buffer drops the oldest message
+    cached = history_cache.get(session_id)
+    if cached is not None:
+        cached.append({"session_id": session_id, "message": message_obj})
+
 @app.get("/api/thirdbrain-hello")
 async def thirdbrain_hello():
     return {"message": "Server is running"}
@@ -146,34 +195,30 @@ async def thirdbrain_mcp_openai_agent(
     request: AgentRequest,
     authenticated: bool = Depends(verify_token)
 ):
+    # Fetch conversation history from the DB while the MCP servers and tools are made ready
+    history_task = asyncio.create_task(get_conversation_history(request.session_id))
+
+    # Wait for the MCP servers connected in the background at startup
+    try:
+        await mcp_client.wait_until_ready()
+    except Exception as e:
+        await asyncio.gather(history_task, return_exceptions=True)
+        logger.error(f"MCP servers are not available: {e}")
+        raise HTTPException(status_code=503, detail=f"MCP servers are not available: {str(e)}")
+
+    # Get available tools and prepare them for the LLM
+    tools = await mcp_client.get_available_tools()
+
     try:
-        # Fetch conversation history from the DB
-        conversation_history = await get_conversation_history(request.session_id)
+        conversation_history = await history_task
         
-        # Convert conversation history to format expected by agent
-        messages = []
-        for msg in conversation_history:
-            #logger.debug("Processing message: %s", msg)
-            msg_data = msg["message"]
-            msg_type = msg_data["type"]
-            msg_content = msg_data["content"]
-
-            # Convert to appropriate message type for the agent
-            if msg_type == "human":
-                #messages.append(UserPromptPart(content=msg_content))
-                messages.append({"role": "user", "content": msg_content})
-            elif msg_type == "ai":
-                #messages.append(TextPart(content=msg_content))
-                messages.append({"role": "assistant", "content": msg_content})
-            else:
-                logging.debug("this was most likely an error message stored in the messages table")
-
-        # Store user's query if it doesn't start with a slash
-        await save_message(
-            session_id=request.session_id,
-            message_type="human",
-            content=request.query
-        )
+        # Convert conversation history to format expected by agent,
+        # other message types were most likely error messages stored in the messages table
+        messages = [
+            {"role": _ROLE_MAP[msg["message"]["type"]], "content": msg["message"]["content"]}
+            for msg in conversation_history
+            if msg["message"]["type"] in _ROLE_MAP
+        ]
 
     except ToolError as e:
         logger.error(f"Tool error: {e}")
@@ -181,54 +226,62 @@ async def thirdbrain_mcp_openai_agent(
     except Exception as e:
         logger.exception("Unexpected error during request processing")
         raise HTTPException(status_code=500, detail="Internal server error")
-    
 
-    # Get available tools and prepare them for the LLM
-    tools = await mcp_client.get_available_tools()
+    # Store user's query while the agent runs, it only has to be stored before the agent's response
+    save_query_task = asyncio.create_task(save_message(
+        session_id=request.session_id,
+        message_type="human",
+        content=request.query
+    ))
     
     # Initialize agent dependencies
-    async with httpx.AsyncClient() as client: 
-        try:
-            deps = Deps(
-                client=client,
-                supabase=supabase,
-                session_id=request.session_id,
-            )
-            if request.query.startswith("/"):
-                result = await mcp_client.handle_slash_commands(request.query)
-            else:     
-                result, messages = await agent_loop(request.query, tools, messages, deps)
-            if request.query.startswith("/"):
-                # Prepend the result with the slash command and server name
-                command_info = f"Executed command: {request.query.split()[0]} {request.query.split()[1] if len(request.query.split()) > 1 else ''}".strip()
-                result = f"{command_info}\n{result}"
-            logging.info(f"Result: {result}")
-        except KeyboardInterrupt:
-            logger.info("Keyboard interrupt detected. Exiting...")
-            return
-        except Exception as e:
-            logging.error(f"Error in agent loop: {str(e)}")
-            raise HTTPException(status_code=500, detail=f"Error processing query: {str(e)}")
-
-        try:
-            # Store agent's response
-            await save_message(
-                session_id=request.session_id,
-                message_type="ai",
-                content=result,
-                data={"request_id": request.request_id}
+    try:
+        deps = Deps(
+            client=http_client,
+            supabase=supabase,
+            session_id=request.session_id,
+        )
+        if request.query.startswith("/"):
+            result = await mcp_client.handle_slash_commands(request.query)
+        else:     
+            result, messages = await agent_loop(
+                request.query, tools, messages, deps, tool_payload=mcp_client.tool_payload(), client=openai_client
             )
+        if request.query.startswith("/"):
+            # Prepend the result with the slash command and server name
+            command_info = f"Executed command: {request.query.split()[0]} {request.query.split()[1] if len(request.query.split()) > 1 else ''}".strip()
+            result = f"{command_info}\n{result}"
+        logging.info(f"Result: {result}")
+    except KeyboardInterrupt:
+        logger.info("Keyboard interrupt detected. Exiting...")
+        return
+    except Exception as e:
+        logging.error(f"Error in agent loop: {str(e)}")
+        await asyncio.gather(save_query_task, return_exceptions=True)
+        raise HTTPException(status_code=500, detail=f"Error processing query: {str(e)}")
 
-            return AgentResponse(success=True)
-        except Exception as e:
-            # Store error message in conversation
-            await save_message(
-                session_id=request.session_id,
-                message_type="ai",
-                content="I apologize, but I encountered an error processing your request.",
-                data={"error": str(e), "request_id": request.request_id}
-            )
-            return AgentResponse(success=False)
+    # Fails the request with the storage error if the user's query could not be stored
+    await save_query_task
+
+    try:
+        # Store agent's response
+        await save_message(
+            session_id=request.session_id,
+            message_type="ai",
+            content=result,
+            data={"request_id": request.request_id}
+        )
+
+        return AgentResponse(success=True)
+    except Exception as e:
+        # Store error message in conversation
+        await save_message(
+            session_id=request.session_id,
+            message_type="ai",
+            content="I apologize, but I encountered an error processing your request.",
+            data={"error": str(e), "request_id": request.request_id}
+        )
+        return AgentResponse(success=False)
 
 if __name__ == "__main__":
     import uvicorn
@@ -1,8 +1,14 @@
 import asyncio
+import functools
 import json
+import logging
+import os
+import re
+import orjson
 from typing import Optional, Dict, List, Union, Any
 from contextlib import AsyncExitStack
 from colorama import init, Fore, Style
+from aioconsole import ainput
 
 from mcp import ClientSession, StdioServerParameters
 init(autoreset=True)  # Initialize colorama with autoreset=True
@@ -11,104 +17,232 @@ from pydantic_ai import Agent, RunContext
 from pydantic_ai.tools import Tool, ToolDefinition
 from mcp.client.stdio import stdio_client
 
-from anthropic import Anthropic
+from anthropic import AsyncAnthropic
 from dotenv import load_dotenv
 
 load_dotenv()  # load environment variables from .env
 
+logger = logging.getLogger(__name__)
+
+# Seconds between the pings checking that every server is still alive
+HEARTBEAT_INTERVAL = float(os.getenv("HEARTBEAT_INTERVAL", "30"))
+
+# Most tools sent to Claude with a query, the ones sharing most words with it
+MAX_TOOLS = int(os.getenv("MAX_TOOLS", "12"))
+
+# Color prefixes of the console output, built once
+_ANSWER = Style.BRIGHT + Fore.CYAN
+_PROMPT = f"\n{Fore.RED}Query: {Fore.LIGHTGREEN_EX}"
+_RESPONSE = f"\n{Fore.YELLOW}"
+_ERROR = f"\n{Fore.RED}Error: "
+_BANNER = f"{Fore.WHITE}\nMCP Client Started!\n{Fore.WHITE}Type your queries or 'quit' to exit."
+
+_WORD_RE = re.compile(r'[a-z0-9]+')
+
+def _words(text: str) -> set:
+    """Return the lowercase words of a text"""
+    return set(_WORD_RE.findall(text.lower()))
+
+async def _prepare_tool(
+    ctx: RunContext[str],
+    tool_def: ToolDefinition,
+    *,
+    tool_name: str,
+    server: str,
+    description: str
+) -> Union[ToolDefinition, None]:
+    """Customize tool definition based on server context"""
+    tool_def.name = f"{server}__{tool_name}"
+    tool_def.description = f"Tool from {server} server: {description}"
+    return tool_def
+
+def _make_tool_func(tool_name: str, server_agent: Agent):
+    """Create the function of a dynamic tool, bound to its own tool name and server agent"""
+    async def tool_func(ctx: RunContext[Any], str_arg) -> str:
+        agent_response = await server_agent.run(str_arg)
+        print(f"\nServer agent response: {agent_response}")
+        return f"Tool {tool_name} called with {str_arg}. Agent response: {agent_response}"
+    return tool_func
+
 class MCPClient:
     def __init__(self):
         # Initialize sessions and agents dictionaries
         self.sessions: Dict[str, ClientSession] = {}  # Dictionary to store {server_name: session}
         self.agents: Dict[str, Agent] = {}  # Dictionary to store {server_name: agent}
-        self.exit_stack = AsyncExitStack()
-        self.anthropic = Anthropic()
+        self._server_params: Dict[str, StdioServerParameters] = {}  # Dictionary to store {server_name: parameters}
+        self._server_tasks: Dict[str, asyncio.Task] = {}  # Dictionary to store {server_name: task owning the session}
+        self._stop: Dict[str, asyncio.Event] = {}  # Dictionary to store {server_name: event closing the session}
+        self._heartbeat_task: Optional[asyncio.Task] = None
+        self.anthropic = AsyncAnthropic()
         self.available_tools = []  # List to store all available tools across servers
+        self._tool_to_session: Dict[str, ClientSession] = {}  # Dictionary to store {full tool name: session}
+        self._tool_to_realname: Dict[str, str] = {}  # Dictionary to store {full tool name: server tool name}
+        self._tool_words: List[set] = []  # Words of each tool's name and description, in available_tools order
         self.dynamic_tools: List[Tool] = []  # List to store dynamic pydantic tools
 
     async def connect_to_server(self):
         """Connect to an MCP server using config.json settings"""
-        print("\nLoading config.json...")
-        with open('config.json') as f:
-            config = json.load(f)
+        logger.debug("Loading config.json...")
+        with open('config.json', 'rb') as f:
+            config = orjson.loads(f.read())
         
-        print("\nAvailable servers in config:", list(config['mcpServers'].keys()))
-        print("\nFull config content:", json.dumps(config, indent=2))
+        logger.debug("Available servers in config: %s", list(config['mcpServers'].keys()))
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Full config content: %s", json.dumps(config, indent=2))
         
-        # Connect to all servers in config
+        server_params: Dict[str, StdioServerParameters] = {}
         for server_name, server_config in config['mcpServers'].items():
-            print(f"\nAttempting to load {server_name} server config...")
-            print("Server config found:", json.dumps(server_config, indent=2))
+            logger.debug("Attempting to load %s server config: %s", server_name, server_config)
             
-            server_params = StdioServerParameters(
+            server_params[server_name] = StdioServerParameters(
                 command=server_config['command'],
                 args=server_config['args'],
                 env=None
             )
-            print("\nCreated server parameters:", server_params)
-            
-            stdio_transport = await self.exit_stack.enter_async_context(stdio_client(server_params))
-            stdio, write = stdio_transport
-            session = await self.exit_stack.enter_async_context(ClientSession(stdio, write))
-            
-            await session.initialize()
-            
-            # Store session with server name as key
-            self.sessions[server_name] = session
-            
-            # Create and store an Agent for this server
-            server_agent: Agent = Agent(
-                'openai:gpt-4',
-                system_prompt=(
-                    f"You are an AI assistant that helps interact with the {server_name} server. "
-                    "You will use the available tools to process requests and provide responses."
-                )
-            )
-            self.agents[server_name] = server_agent
-            
-            # List available tools for this server
-            response = await session.list_tools()
-            server_tools = [{
-                "name": f"{server_name}__{tool.name}",
-                "description": tool.description,
-                "input_schema": tool.inputSchema
-            } for tool in response.tools]
-            
-            # Add server's tools to overall available tools
+            logger.debug("Created server parameters: %s", server_params[server_name])
+
+        # Start the servers and list their tools concurrently, then merge the results in config order
+        results = await asyncio.gather(*(
+            self._connect_one(server_name, params) for server_name, params in server_params.items()
+        ))
+        for server_tools, dynamic_tools in results:
             self.available_tools.extend(server_tools)
+            self.dynamic_tools.extend(dynamic_tools)
+        self._tool_words = [
+            _words(f"{tool['name']} {tool['description'] or ''}") for tool in self.available_tools
+        ]
 
-            # Create corresponding dynamic pydantic tools
-            for tool in response.tools:
-                async def prepare_tool(
-                    ctx: RunContext[str], 
-                    tool_def: ToolDefinition,
-                    tool_name: str = tool.name,
-                    server: str = server_name
-                ) -> Union[ToolDefinition, None]:
-                    # Customize tool definition based on server context
-                    tool_def.name = f"{server}__{tool_name}"
-                    tool_def.description = f"Tool from {server} server: {tool.description}"
-                    return tool_def
-
-                async def tool_func(ctx: RunContext[Any], str_arg) -> str:
-                    agent_response = await server_agent.run_sync(str_arg)
-                    print(f"\nServer agent response: {agent_response}")
-                    return f"Tool {tool.name} called with {str_arg}. Agent response: {agent_response}"
-
-                dynamic_tool = Tool(
-                    tool_func,
-                    prepare=prepare_tool,
-                    name=f"{server_name}__{tool.name}",
-                    description=tool.description
-                )
-                self.dynamic_tools.append(dynamic_tool)
-                print(f"\nAdded dynamic tool: {dynamic_tool.name}")
-                print(f"Description: {dynamic_tool.description}")
-                print(f"Function: {dynamic_tool.function}")
-                print(f"Prepare function: {dynamic_tool.prepare}")
-            
-            print(f"\nConnected to server {server_name} with tools:", 
-                  [tool["name"] for tool in server_tools])
+        # Keep the servers warm and replace the ones that stopped answering
+        self._heartbeat_task = asyncio.create_task(self._heartbeat())
+
+    async def _hold_session(self, server_name: str, server_params: StdioServerParameters, ready: asyncio.Future):
+        """
+        Own the stdio transport and session of one server until it is stopped.
+
+        stdio_client runs an anyio task group, which must be exited by the task that entered it,
+        so each server gets its own task and exit stack. One server can then be torn down and
+        restarted without touching the others.
+        """
+        try:
+            async with AsyncExitStack() as stack:
+                stdio, write = await stack.enter_async_context(stdio_client(server_params))
+                session = await stack.enter_async_context(ClientSession(stdio, write))
+                await session.initialize()
+                ready.set_result(session)
+                await self._stop[server_name].wait()
+        except Exception as e:
+            if not ready.done():
+                ready.set_exception(e)
+            else:
+                logger.error("MCP session of %s closed with an error: %s", server_name, e)
+
+    async def _open_session(self, server_name: str, server_params: StdioServerParameters) -> ClientSession:
+        """Start a server in its own task and return its initialized session"""
+        ready = asyncio.get_running_loop().create_future()
+        self._server_params[server_name] = server_params
+        self._stop[server_name] = asyncio.Event()
+        self._server_tasks[server_name] = asyncio.create_task(self._hold_session(server_name, server_params, ready))
+        return await ready
+
+    async def _close_session(self, server_name: str):
+        """Stop a server and wait for its task to close the transport"""
+        task = self._server_tasks.pop(server_name, None)
+        if task is None:
+            return  # Already closed, e.g. after a failed restart
+        self._stop[server_name].set()
+        try:
+            await asyncio.wait_for(task, timeout=5)
+        except Exception:
+            pass  # The task was cancelled on timeout, or already logged its error
+
+    async def _reconnect(self, server_name: str):
+        """Restart a server that stopped answering, keeping its tools"""
+        old_session = self.sessions[server_name]
+        await self._close_session(server_name)
+        try:
+            session = await self._open_session(server_name, self._server_params[server_name])
+        except Exception as e:
+            logger.error("Failed to restart server %s: %s", server_name, e)
+            return
+        self.sessions[server_name] = session
+        for full_tool_name, tool_session in self._tool_to_session.items():
+            if tool_session is old_session:
+                self._tool_to_session[full_tool_name] = session
+        logger.info("Restarted server %s", server_name)
+
+    async def _ping(self, server_name: str):
+        """Ping a server, restarting it when it does not answer"""
+        try:
+            await asyncio.wait_for(self.sessions[server_name].send_ping(), timeout=HEARTBEAT_INTERVAL / 2)
+        except Exception as e:
+            logger.warning("Server %s did not answer the ping: %s", server_name, e)
+            await self._reconnect(server_name)
+
+    async def _heartbeat(self):
+        """Ping every server each HEARTBEAT_INTERVAL seconds"""
+        while True:
+            await asyncio.sleep(HEARTBEAT_INTERVAL)
+            await asyncio.gather(*(self._ping(server_name) for server_name in list(self.sessions)))
+
+    def _select_tools(self, query: str) -> List[dict]:
+        """Return the MAX_TOOLS tools sharing most words with the query, in their original order"""
+        if len(self.available_tools) <= MAX_TOOLS:
+            return self.available_tools
+        query_words = _words(query)
+        ranked = sorted(
+            range(len(self.available_tools)),
+            key=lambda i: len(self._tool_words[i] & query_words),
+            reverse=True
+        )
+        return [self.available_tools[i] for i in sorted(ranked[:MAX_TOOLS])]
+
+    async def _connect_one(self, server_name: str, server_params: StdioServerParameters) -> tuple[List[dict], List[Tool]]:
+        """Start a server and build its tools"""
+        session = await self._open_session(server_name, server_params)
+        
+        # Store session with server name as key
+        self.sessions[server_name] = session
+        
+        # Create and store an Agent for this server
+        server_agent: Agent = Agent(
+            'openai:gpt-4',
+            system_prompt=(
+                f"You are an AI assistant that helps interact with the {server_name} server. "
+                "You will use the available tools to process requests and provide responses."
+            )
+        )
+        self.agents[server_name] = server_agent
+        
+        # List available tools for this server
+        response = await session.list_tools()
+        server_tools = [{
+            "name": f"{server_name}__{tool.name}",
+            "description": tool.description,
+            "input_schema": tool.inputSchema
+        } for tool in response.tools]
+        for tool in response.tools:
+            self._tool_to_session[f"{server_name}__{tool.name}"] = session
+            self._tool_to_realname[f"{server_name}__{tool.name}"] = tool.name
+
+        # Create corresponding dynamic pydantic tools
+        # The tool name, server and description are bound per tool, not looked up from the loop variable
+        dynamic_tools: List[Tool] = [
+            Tool(
+                _make_tool_func(tool.name, server_agent),
+                prepare=functools.partial(
+                    _prepare_tool, tool_name=tool.name, server=server_name, description=tool.description
+                ),
+                name=f"{server_name}__{tool.name}",
+                description=tool.description
+            )
+            for tool in response.tools
+        ]
+        logger.debug("Added dynamic tools: %s", [dynamic_tool.name for dynamic_tool in dynamic_tools])
+        
+        print(f"\nConnected to server {server_name} with tools:", 
+              [tool["name"] for tool in server_tools])
+
+        return server_tools, dynamic_tools
 
     async def process_query(self, query: str) -> str:
         """Process a query using Claude and available tools"""
@@ -120,79 +254,87 @@ class MCPClient:
             }
         ]
 
-        # Initial Claude API call with all available tools
-        response = self.anthropic.messages.create(
+        # Initial Claude API call with the tools most relevant to the query
+        tools = self._select_tools(query)
+        response = await self.anthropic.messages.create(
             model="claude-3-5-sonnet-20241022",
             max_tokens=1000,
             messages=messages,
-            tools=self.available_tools
+            tools=tools
         )
 
         # Process response and handle tool calls
-        tool_results = []
-        final_text = []
-
-        for content in response.content:
-            if content.type == 'text':
-                final_text.append(content.text)
-            elif content.type == 'tool_use':
-                # Parse server name and tool name from the full tool name
-                full_tool_name = content.name
-                server_name, tool_name = full_tool_name.split('__', 1)
-                tool_args = content.input
-                
-                # Get the appropriate session and execute tool call
-                if server_name not in self.sessions:
-                    raise ValueError(f"Unknown server: {server_name}")
-                    
-                result = await self.sessions[server_name].call_tool(tool_name, tool_args)
-                tool_results.append({"call": tool_name, "result": result})
-                final_text.append(f"[Calling tool {tool_name} with args {tool_args}]")
-
-                # Continue conversation with tool results
-                if hasattr(content, 'text') and content.text:
-                    messages.append({
-                      "role": "assistant",
-                      "content": content.text
-                    })
-                messages.append({
-                    "role": "user", 
-                    "content": result.content
-                })
-
-                # Get next response from Claude
-                response = self.anthropic.messages.create(
-                    model="claude-3-5-sonnet-20241022",
-                    max_tokens=1000,
-                    messages=messages,
-                )
-
-                final_text.append(f"{Style.BRIGHT}{Fore.CYAN}{response.content[0].text}")
+        final_text = [content.text for content in response.content if content.type == 'text']
+        tool_uses = [content for content in response.content if content.type == 'tool_use']
+        if not tool_uses:
+            return "\n".join(final_text)
+
+        for content in tool_uses:
+            if content.name not in self._tool_to_session:
+                raise ValueError(f"Unknown tool: {content.name}")
+
+        # Execute the tool calls concurrently, each on the session of its server
+        results = await asyncio.gather(*(
+            self._tool_to_session[content.name].call_tool(self._tool_to_realname[content.name], content.input)
+            for content in tool_uses
+        ))
+        for content in tool_uses:
+            final_text.append(f"[Calling tool {self._tool_to_realname[content.name]} with args {content.input}]")
+
+        # Continue conversation with all tool results in one turn
+        messages.append({
+            "role": "assistant",
+            "content": response.content
+        })
+        messages.append({
+            "role": "user",
+            "content": [{
+                "type": "tool_result",
+                "tool_use_id": content.id,
+                "content": [{"type": "text", "text": item.text} for item in result.content if item.type == "text"]
+            } for content, result in zip(tool_uses, results)]
+        })
+
+        # Get next response from Claude
+        response = await self.anthropic.messages.create(
+            model="claude-3-5-sonnet-20241022",
+            max_tokens=1000,
+            messages=messages,
+            tools=tools
+        )
+
+        # The follow-up may itself request tools, so keep only its text blocks
+        final_text.append(_ANSWER + "".join(
+            content.text for content in response.content if content.type == 'text'
+        ))
 
         return "\n".join(final_text)
 
     async def chat_loop(self):
         """Run an interactive chat loop"""
-        print(f"{Fore.WHITE}\nMCP Client Started!")
-        print(f"{Fore.WHITE}Type your queries or 'quit' to exit.")
+        print(_BANNER)
         
         while True:
             try:
-                query = input(f"\n{Fore.RED}Query: {Fore.LIGHTGREEN_EX}").strip()
+                # Wait for the query without blocking the event loop serving the MCP sessions
+                query = (await ainput(_PROMPT)).strip()
                 
                 if query.lower() in ['quit', 'exit', 'bye', 'goodbye']:
                     print("\nGoodbye!")
                     break
                     
                 response = await self.process_query(query)
-                print(f"\n{Fore.YELLOW}{response}")
+                print(_RESPONSE + response)
                     
             except Exception as e:
-                print(f"\n{Fore.RED}Error: {str(e)}")
+                print(_ERROR + str(e))
     
     async def cleanup(self):
         """Clean up resources"""
-        await self.exit_stack.aclose()
+        if self._heartbeat_task is not None:
+            self._heartbeat_task.cancel()
+            await asyncio.gather(self._heartbeat_task, return_exceptions=True)
+        await asyncio.gather(*(self._close_session(server_name) for server_name in list(self._server_tasks)))
 
 async def main():
     client = MCPClient()
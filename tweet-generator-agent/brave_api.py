@@ -1,17 +1,106 @@
 import os
+import re
 import json
+import logging
+import orjson
+import threading
 import requests
+from cachetools import TTLCache
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from fastapi import HTTPException
-from dotenv import load_dotenv
+from env_utils import load_env
 from supabase_utils import log_message_to_supabase
 
 # Load environment variables
-load_dotenv()
+load_env()
+
+logger = logging.getLogger(__name__)
+
+# Highlighting tags Brave wraps around matched words, stripped in a single pass
+_TAG_RE = re.compile(r'</?(?:strong|b|em|i)>', re.IGNORECASE)
+
+# Session reused by every Brave API request, so the TLS connection is kept alive between them
+_SESSION = requests.Session()
+_SESSION.headers.update({"Accept": "application/json"})
+_SESSION.mount("https://", HTTPAdapter(
+    pool_connections=20, pool_maxsize=50, max_retries=Retry(total=2, backoff_factor=0.2)
+))
+
+# Articles of recent queries, shared by the worker threads running fetch_articles_from_brave
+_brave_cache = TTLCache(maxsize=256, ttl=int(os.getenv("BRAVE_CACHE_TTL", "600")))
+_brave_cache_lock = threading.Lock()
+
+def _search_brave(brave_api_url: str, headers: dict, params: dict) -> list:
+    """
+    Run a Brave web search and extract the articles from its results.
+
+    Args:
+        brave_api_url (str): The Brave web search endpoint.
+        headers (dict): The request headers, carrying the subscription token.
+        params (dict): The search parameters.
+
+    Returns:
+        list: A list of articles with titles, URLs, and descriptions.
+    """
+    response = _SESSION.get(brave_api_url, headers=headers, params=params, timeout=10)
+    
+    logger.debug("Response status: %s", response.status_code)
+    
+    if response.status_code == 401:
+        logger.error("Authentication error - invalid API key")
+        raise HTTPException(status_code=500, detail="Invalid or expired API key")
+    elif response.status_code != 200:
+        logger.error("API error - status code: %s", response.status_code)
+        raise HTTPException(status_code=500, detail=f"API error: {response.text}")
+    
+    try:
+        data = orjson.loads(response.content)
+    except json.JSONDecodeError as e:
+        logger.error("Failed to decode JSON response: %s", e)
+        logger.debug("Raw response content: %s", response.text)
+        raise HTTPException(status_code=500, detail="Invalid JSON response from API")
+
+    # Formatting the whole payload is costly, only do it when it is logged
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("Raw API Response: %s", data)
+    
+    # Extract results from the response
+    articles = []
+    
+    # Handle the response data according to WebSearchApiResponse structure
+    if isinstance(data, dict):
+        # Check for error response
+        if "error" in data:
+            error_msg = data["error"].get("message", "Unknown API error")
+            logger.error("API returned error: %s", error_msg)
+            raise HTTPException(status_code=500, detail=error_msg)
+        
+        # Get web search results from the 'web' field
+        web_results = data.get("web", {}).get("results", [])
+        
+        for result in web_results:
+            # Clean up text by removing all HTML tags
+            title = _TAG_RE.sub("", result.get("title", ""))
+            description = _TAG_RE.sub("", result.get("description", ""))
+            url = result.get("url", "")
+            
+            articles.append({
+                "title": title or "No Title",
+                "url": url or "No URL",
+                "description": description or "No Description"
+            })
+    
+    logger.debug("Processed %d articles", len(articles))
+    return articles
 
 def fetch_articles_from_brave(query: str, session_id: str):
     """
     Fetch articles related to the query using the Brave API.
 
+    Results are cached for BRAVE_CACHE_TTL seconds, so retries on the same topic
+    skip the billed API round trip.
+
     Args:
         query (str): The search query.
         session_id (str): The session ID to log interactions.
@@ -26,7 +115,6 @@ def fetch_articles_from_brave(query: str, session_id: str):
         raise HTTPException(status_code=500, detail="Brave API key not found in environment variables")
     
     headers = {
-        "Accept": "application/json",
         "X-Subscription-Token": api_key
     }
     
@@ -38,10 +126,8 @@ def fetch_articles_from_brave(query: str, session_id: str):
     }
 
     try:
-        print(f"Making request to Brave API with query: {query}")  # Debug log
-        print(f"Request URL: {brave_api_url}")  # Debug log
-        print(f"Request headers: {headers}")  # Debug log
-        print(f"Request params: {params}")  # Debug log
+        logger.debug("Making request to Brave API with query: %s", query)
+        logger.debug("Request URL: %s, params: %s", brave_api_url, params)
         
         # Log the request to Supabase
         log_message_to_supabase(
@@ -50,73 +136,30 @@ def fetch_articles_from_brave(query: str, session_id: str):
             content=f"Brave API request: {query}",
             metadata={"query": query, "source": "Brave API"}
         )
+
+        # Queries differing only in case or spacing share a cache entry, errors are never cached
+        cache_key = " ".join(query.lower().split())
+        with _brave_cache_lock:
+            articles = _brave_cache.get(cache_key)
+        if articles is None:
+            articles = _search_brave(brave_api_url, headers, params)
+            with _brave_cache_lock:
+                _brave_cache[cache_key] = articles
+        else:
+            logger.debug("Using %d cached articles", len(articles))
         
-        response = requests.get(brave_api_url, headers=headers, params=params)
-        
-        print(f"Response status: {response.status_code}")  # Debug log
-        print(f"Response headers: {dict(response.headers)}")  # Debug log
-        
-        if response.status_code == 401:
-            print("Authentication error - invalid API key")  # Debug log
-            raise HTTPException(status_code=500, detail="Invalid or expired API key")
-        elif response.status_code != 200:
-            print(f"API error - status code: {response.status_code}")  # Debug log
-            raise HTTPException(status_code=500, detail=f"API error: {response.text}")
+        # Log the response to Supabase
+        log_message_to_supabase(
+            session_id=session_id,
+            message_type="ai",
+            content=f"Brave API response with {len(articles)} articles",
+            metadata={"articles": articles, "source": "Brave API"}
+        )
         
-        try:
-            data = response.json()
-            print(f"Raw API Response: {data}")  # Debug log
-            
-            # Extract results from the response
-            articles = []
-            
-            # Handle the response data according to WebSearchApiResponse structure
-            if isinstance(data, dict):
-                # Check for error response
-                if "error" in data:
-                    error_msg = data["error"].get("message", "Unknown API error")
-                    print(f"API returned error: {error_msg}")  # Debug log
-                    raise HTTPException(status_code=500, detail=error_msg)
-                
-                # Get web search results from the 'web' field
-                web_results = data.get("web", {}).get("results", [])
-                
-                for result in web_results:
-                    # Clean up text by removing all HTML tags
-                    title = result.get("title", "")
-                    description = result.get("description", "")
-                    url = result.get("url", "")
-                    
-                    # Remove all HTML tags
-                    for tag in ["<strong>", "</strong>", "<b>", "</b>"]:
-                        title = title.replace(tag, "")
-                        description = description.replace(tag, "")
-                    
-                    articles.append({
-                        "title": title or "No Title",
-                        "url": url or "No URL",
-                        "description": description or "No Description"
-                    })
-            
-            print(f"Processed {len(articles)} articles")  # Debug log
-            
-            # Log the response to Supabase
-            log_message_to_supabase(
-                session_id=session_id,
-                message_type="ai",
-                content=f"Brave API response with {len(articles)} articles",
-                metadata={"articles": articles, "source": "Brave API"}
-            )
-            
-            return articles
-            
-        except json.JSONDecodeError as e:
-            print(f"Failed to decode JSON response: {e}")  # Debug log
-            print(f"Raw response content: {response.text}")  # Debug log
-            raise HTTPException(status_code=500, detail="Invalid JSON response from API")
+        return articles
             
     except requests.exceptions.RequestException as e:
-        print(f"Request failed: {e}")  # Debug log
+        logger.error("Request failed: %s", e)
         
         # Log the error to Supabase
         log_message_to_supabase(
@@ -126,4 +169,3 @@ def fetch_articles_from_brave(query: str, session_id: str):
             metadata={"source": "Brave API"}
         )
         raise HTTPException(status_code=500, detail=f"Error fetching articles: {str(e)}")
-
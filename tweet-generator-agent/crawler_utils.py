@@ -1,8 +1,28 @@
+import re
 import requests
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from bs4 import BeautifulSoup
 from urllib.parse import urlparse
 from supabase_utils import log_message_to_supabase
 
+# Session reused by every crawl, so connections to the same site are kept alive between articles.
+# The user agent avoids blocks
+_CRAWL_SESSION = requests.Session()
+_CRAWL_SESSION.headers.update({
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+})
+_retry = Retry(total=2, backoff_factor=0.2)
+_CRAWL_SESSION.mount("http://", HTTPAdapter(pool_connections=20, pool_maxsize=50, max_retries=_retry))
+_CRAWL_SESSION.mount("https://", HTTPAdapter(pool_connections=20, pool_maxsize=50, max_retries=_retry))
+
+# Most bytes of a page that are read, plenty for the 4000 characters of text kept from it
+_MAX_PAGE_BYTES = 256_000
+
+# Whitespace around line breaks, including blank lines, collapsed to a single line break
+_LINE_BREAK_RE = re.compile(r'\s*\n\s*')
+
 def crawl_url(url: str, session_id: str) -> str:
     """
     Fetch and parse content from a URL.
@@ -15,17 +35,20 @@ def crawl_url(url: str, session_id: str) -> str:
         str: Extracted text content
     """
     try:
-        # Add user agent to avoid blocks
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-        }
-        
-        # Fetch URL content
-        response = requests.get(url, headers=headers, timeout=10)
-        response.raise_for_status()
+        # Fetch URL content, streamed so large pages are not downloaded in full
+        with _CRAWL_SESSION.get(url, timeout=10, stream=True) as response:
+            response.raise_for_status()
+
+            # Skip PDFs, images and other documents before reading their body
+            content_type = response.headers.get('Content-Type', '').split(';')[0].strip().lower()
+            if content_type and not (content_type.startswith('text/') or content_type == 'application/xhtml+xml'):
+                raise ValueError(f"unsupported content type {content_type}")
+
+            html = response.raw.read(_MAX_PAGE_BYTES, decode_content=True)
         
-        # Parse HTML
-        soup = BeautifulSoup(response.text, 'html.parser')
+        # Parse HTML with the lxml parser, much faster than html.parser on large pages.
+        # The raw bytes are passed so the encoding is detected once, while parsing
+        soup = BeautifulSoup(html, 'lxml')
         
         # Remove script and style elements
         for script in soup(["script", "style"]):
@@ -34,9 +57,8 @@ def crawl_url(url: str, session_id: str) -> str:
         # Extract text
         text = soup.get_text(separator='\n', strip=True)
         
-        # Basic text cleaning
-        lines = [line.strip() for line in text.splitlines() if line.strip()]
-        content = '\n'.join(lines)
+        # Basic text cleaning: strip every line and drop the empty ones in one pass
+        content = _LINE_BREAK_RE.sub('\n', text).strip()
         
         # Truncate if too long (e.g., for API limits)
         max_length = 4000
@@ -75,17 +97,16 @@ def crawl_articles(articles: list, session_id: str) -> list:
     Returns:
         list: Articles enriched with crawled content
     """
-    enriched_articles = []
-    
-    for article in articles:
+    def enrich(article: dict) -> dict:
         url = article.get('url')
         if url and url != "No URL":
-            content = crawl_url(url, session_id)
-            enriched_articles.append({
+            return {
                 **article,
-                'content': content
-            })
-        else:
-            enriched_articles.append(article)
-    
-    return enriched_articles
\ No newline at end of file
+                'content': crawl_url(url, session_id)
+            }
+        return article
+
+    # Crawl the articles concurrently, so the wall time is that of the slowest page instead of their sum.
+    # map keeps the articles in their original order
+    with ThreadPoolExecutor(max_workers=10) as pool:
+        return list(pool.map(enrich, articles))
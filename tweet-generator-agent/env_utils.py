@@ -0,0 +1,11 @@
+import functools
+from dotenv import load_dotenv
+
+@functools.lru_cache(maxsize=1)
+def load_env():
+    """
+    Load the .env file into the environment variables.
+
+    Every module calls this at import time; only the first call reads and parses the file.
+    """
+    load_dotenv()
@@ -1,22 +1,25 @@
 import os
-import json
+import orjson
+import asyncio
+from datetime import datetime, timezone
 from fastapi import FastAPI, HTTPException, Security, Depends
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
 from supabase import create_client, Client
-from dotenv import load_dotenv
+from env_utils import load_env
 from brave_api import fetch_articles_from_brave
 from openai_api import generate_twitter_drafts
-from supabase_utils import log_message_to_supabase
+from supabase_utils import log_message_to_supabase, flush_messages
 
 
 # Load environment variables from .env file
-load_dotenv()
+load_env()
 
 # Fetch credentials from environment variables
 SUPABASE_URL = os.getenv("SUPABASE_URL")
 SUPABASE_KEY = os.getenv("SUPABASE_KEY")
+API_BEARER_TOKEN = os.getenv("API_BEARER_TOKEN")
 
 # Ensure Supabase credentials are available
 if not SUPABASE_URL or not SUPABASE_KEY:
@@ -41,6 +44,11 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Insert the log messages still queued before the server stops
+@app.on_event("shutdown")
+async def flush_logged_messages():
+    await asyncio.to_thread(flush_messages)
+
 # Models
 class MessageRequest(BaseModel):
     session_id: str
@@ -55,7 +63,7 @@ class Agent0Request(BaseModel):
 
 # Authentication
 async def verify_token(credentials: HTTPAuthorizationCredentials = Depends(security)):
-    if credentials.credentials != os.getenv("API_BEARER_TOKEN"):
+    if credentials.credentials != API_BEARER_TOKEN:
         raise HTTPException(status_code=401, detail="Invalid token")
     return credentials    
 
@@ -82,20 +90,28 @@ async def tweet_gen(request: Agent0Request, authenticated: bool = Depends(verify
     Generates tweet drafts and stores them in the database.
     Returns a simple success/failure response.
     """
-    try:
-        # Store incoming user message
-        user_message = {
-            "type": "human",
-            "content": request.query
-        }
-        supabase.table("messages").insert({
-            "session_id": request.session_id,
-            "message": json.dumps(user_message)
-        }).execute()
+    # Incoming user message. Each row carries its own timestamp, so the history keeps
+    # the user message before the response even though both are stored concurrently
+    user_message = {
+        "type": "human",
+        "content": request.query
+    }
+    user_row = {
+        "session_id": request.session_id,
+        "message": orjson.dumps(user_message).decode(),
+        "created_at": datetime.now(timezone.utc).isoformat()
+    }
+    # Store the user message while the drafts are generated
+    user_insert = asyncio.create_task(asyncio.to_thread(
+        supabase.table("messages").insert(user_row, returning="minimal").execute
+    ))
 
-        # Process the request and generate tweet drafts
-        articles = fetch_articles_from_brave(request.query, request.session_id)
-        drafts = generate_twitter_drafts(articles, request.session_id)
+    try:
+        # Process the request and generate tweet drafts.
+        # The Brave, OpenAI and Supabase clients are blocking, so they run in worker threads
+        # to keep the event loop free
+        articles = await asyncio.to_thread(fetch_articles_from_brave, request.query, request.session_id)
+        drafts = await asyncio.to_thread(generate_twitter_drafts, articles, request.session_id)
 
         # Format drafts for display
         formatted_drafts = []
@@ -117,10 +133,15 @@ async def tweet_gen(request: Agent0Request, authenticated: bool = Depends(verify
                 }
             }
         }
-        supabase.table("messages").insert({
+        ai_row = {
             "session_id": request.session_id,
-            "message": json.dumps(ai_message)
-        }).execute()
+            "message": orjson.dumps(ai_message).decode(),
+            "created_at": datetime.now(timezone.utc).isoformat()
+        }
+        await user_insert
+        await asyncio.to_thread(
+            supabase.table("messages").insert(ai_row, returning="minimal").execute
+        )
 
         return {"success": True}
         
@@ -136,10 +157,18 @@ async def tweet_gen(request: Agent0Request, authenticated: bool = Depends(verify
                 "user_id": request.user_id
             }
         }
-        supabase.table("messages").insert({
+        rows = [{
             "session_id": request.session_id,
-            "message": json.dumps(error_message)
-        }).execute()
+            "message": orjson.dumps(error_message).decode(),
+            "created_at": datetime.now(timezone.utc).isoformat()
+        }]
+        # Retry the user message along with the error if storing it is what failed
+        await asyncio.wait([user_insert])
+        if user_insert.exception() is not None:
+            rows.insert(0, user_row)
+        await asyncio.to_thread(
+            supabase.table("messages").insert(rows, returning="minimal").execute
+        )
         
         return {"success": False}    
 
@@ -1,20 +1,86 @@
 import os
-import json
+import re
+import hashlib
+import unicodedata
+import threading
+from cachetools import TTLCache
 from fastapi import HTTPException
-from dotenv import load_dotenv
+from pydantic import BaseModel, ValidationError
+from env_utils import load_env
 from openai import OpenAI
 from supabase_utils import log_message_to_supabase
 
 # Load environment variables
-load_dotenv()
+load_env()
 
-# Initialize OpenAI client
-openai_client = OpenAI()
+# Initialize OpenAI client. Rate limits, timeouts and 5xx responses are retried by the client
+# with exponential backoff (0.5 s doubling up to 8 s) before the request is reported as failed
+openai_client = OpenAI(max_retries=3)
 openai_api_key = os.getenv("OPENAI_API_KEY")
 
 if not openai_api_key:
     raise ValueError("OpenAI API key not found in environment variables")
 
+# Article block of the prompt context
+_ARTICLE_TEMPLATE = "Title: {}\nURL: {}\nDescription: {}".format
+
+# Whitespace before a line break, e.g. trailing spaces in crawled descriptions
+_TRAILING_SPACE_RE = re.compile(r"[^\S\n]+\n")
+
+# OpenAI prompt with JSON structure requirement. It is identical for every request and sent first,
+# so the provider's prompt cache can reuse it as the prefix of every request
+STATIC_PREFIX = """You are a social media expert. Always respond with valid JSON.
+
+Using the articles given by the user, generate 3 engaging and concise Twitter posts that encourage interaction and shares.
+
+Requirements for each post:
+- A catchy hook
+- A key insight or thought-provoking question
+- A call to action (e.g., "Read more", "Join the conversation", "What do you think?")
+- Ensure the tone is conversational, engaging, and professional
+
+Return the drafts in the following JSON format:
+{
+    "drafts": [
+        {
+            "number": 1,
+            "text": "The complete tweet text",
+            "hook": "The hook used",
+            "insight": "The key insight or question",
+            "cta": "The call to action"
+        },
+        {
+            "number": 2,
+            "text": "The complete tweet text",
+            "hook": "The hook used",
+            "insight": "The key insight or question",
+            "cta": "The call to action"
+        },
+        {
+            "number": 3,
+            "text": "The complete tweet text",
+            "hook": "The hook used",
+            "insight": "The key insight or question",
+            "cta": "The call to action"
+        }
+    ]
+}"""
+
+class Draft(BaseModel):
+    number: int
+    text: str
+    hook: str
+    insight: str
+    cta: str
+
+class DraftsModel(BaseModel):
+    drafts: list[Draft]
+
+# Drafts generated for recent article sets, keyed by a hash of the prompt context.
+# Shared by the worker threads running generate_twitter_drafts
+_drafts_cache = TTLCache(maxsize=256, ttl=int(os.getenv("DRAFTS_CACHE_TTL", "600")))
+_drafts_cache_lock = threading.Lock()
+
 # Function to generate Twitter drafts
 def generate_twitter_drafts(articles, session_id: str):
     """
@@ -27,12 +93,28 @@ def generate_twitter_drafts(articles, session_id: str):
     Returns:
         list: A list of three Twitter drafts in JSON format.
     """
+    return list(stream_twitter_drafts(articles, session_id))
+
+def stream_twitter_drafts(articles, session_id: str):
+    """
+    Generate three engaging Twitter drafts based on article content, yielding each draft
+    as soon as the model has finished writing it.
+
+    Args:
+        articles (list): A list of articles with titles, URLs, and descriptions.
+        session_id (str): Session ID for logging interactions.
+
+    Yields:
+        dict: The next Twitter draft.
+    """
     try:
-        # Combine article details into context
-        context = "\n\n".join([
-            f"Title: {article['title']}\nURL: {article['url']}\nDescription: {article['description']}"
+        # Combine article details into context, in a canonical form so equivalent
+        # articles give the same cache key and no tokens are spent on stray whitespace
+        context = "\n\n".join(
+            _ARTICLE_TEMPLATE(article['title'], article['url'], article['description'])
             for article in articles
-        ])
+        )
+        context = _TRAILING_SPACE_RE.sub("\n", unicodedata.normalize("NFKC", context))
 
         # Log the request to Supabase
         log_message_to_supabase(
@@ -42,72 +124,64 @@ def generate_twitter_drafts(articles, session_id: str):
             metadata={"articles": articles}
         )
 
-        # OpenAI prompt with JSON structure requirement
-        prompt = f"""
-        You are a social media expert. Using the following articles, generate 3 engaging and concise Twitter posts that encourage interaction and shares.
-
-        Requirements for each post:
-        - A catchy hook
-        - A key insight or thought-provoking question
-        - A call to action (e.g., "Read more", "Join the conversation", "What do you think?")
-        - Ensure the tone is conversational, engaging, and professional
-
-        Articles:
-        {context}
-
-        Return the drafts in the following JSON format:
-        {{
-            "drafts": [
-                {{
-                    "number": 1,
-                    "text": "The complete tweet text",
-                    "hook": "The hook used",
-                    "insight": "The key insight or question",
-                    "cta": "The call to action"
-                }},
-                {{
-                    "number": 2,
-                    "text": "The complete tweet text",
-                    "hook": "The hook used",
-                    "insight": "The key insight or question",
-                    "cta": "The call to action"
-                }},
-                {{
-                    "number": 3,
-                    "text": "The complete tweet text",
-                    "hook": "The hook used",
-                    "insight": "The key insight or question",
-                    "cta": "The call to action"
-                }}
-            ]
-        }}
-
-        Ensure each draft has a unique number from 1 to 3.
-        """
-
-        # Generate response using OpenAI GPT-4
-        response = openai_client.chat.completions.create(
-            model="gpt-4",
+        # The same articles were just drafted, e.g. a retried query: skip the gpt-4o call
+        cache_key = hashlib.blake2b(context.encode()).digest()
+        with _drafts_cache_lock:
+            drafts = _drafts_cache.get(cache_key)
+        if drafts is not None:
+            log_message_to_supabase(
+                session_id=session_id,
+                message_type="ai",
+                content="Generated Twitter drafts.",
+                metadata={"drafts": drafts, "cached": True}
+            )
+            yield from drafts
+            return
+
+        # Only the articles change between requests, everything before them is the static prefix
+        prompt = f"Articles:\n{context}\n\nEnsure each draft has a unique number from 1 to 3."
+
+        # Generate response using OpenAI GPT-4o, constrained to the drafts schema and streamed
+        drafts = []
+        with openai_client.beta.chat.completions.stream(
+            model="gpt-4o",
             messages=[
-                {"role": "system", "content": "You are a social media expert. Always respond with valid JSON."},
+                {"role": "system", "content": STATIC_PREFIX},
                 {"role": "user", "content": prompt}
-            ]
-        )
-
-        # Parse JSON response
-        text = response.choices[0].message.content.strip()
-        drafts_data = json.loads(text)
+            ],
+            response_format=DraftsModel,
+            temperature=0.7,
+            max_tokens=1000
+        ) as stream:
+            for event in stream:
+                if event.type != "content.delta" or not isinstance(event.parsed, dict):
+                    continue
+                # The partially parsed response: a draft is complete once the next one has started
+                partial_drafts = event.parsed.get("drafts") or []
+                while len(drafts) < len(partial_drafts) - 1:
+                    draft = Draft.model_validate(partial_drafts[len(drafts)]).model_dump()
+                    drafts.append(draft)
+                    yield draft
+            message = stream.get_final_completion().choices[0].message
+
+        # The response is validated against DraftsModel while it is parsed
+        if message.parsed is None:
+            raise ValueError(f"No drafts returned: {message.refusal}")
+        for draft in message.parsed.drafts[len(drafts):]:
+            drafts.append(draft.model_dump())
+            yield drafts[-1]
+
+        with _drafts_cache_lock:
+            _drafts_cache[cache_key] = drafts
 
         # Log the response to Supabase
         log_message_to_supabase(
             session_id=session_id,
             message_type="ai",
             content="Generated Twitter drafts.",
-            metadata={"drafts": drafts_data["drafts"]}
+            metadata={"drafts": drafts}
         )
-
-        return drafts_data["drafts"]
-    except json.JSONDecodeError as e:
+    except ValidationError as e:
         error_message = f"Error parsing JSON response: {str(e)}"
         # Log the error to Supabase
         log_message_to_supabase(
@@ -1,10 +1,13 @@
 import streamlit as st
-import uuid
+from secrets import token_hex
 import os
+from dataclasses import dataclass, field
+from typing import Optional
+from concurrent.futures import ThreadPoolExecutor
 from voice_utils import transcribe_audio_file
 from brave_api import fetch_articles_from_brave
 from crawler_utils import crawl_articles
-from openai_api import generate_twitter_drafts
+from openai_api import stream_twitter_drafts
 from supabase_utils import log_message_to_supabase
 
 # Twitter import
@@ -15,38 +18,44 @@ except ImportError as e:
     st.error(f"⚠️ Error importing Twitter module: {str(e)}")
     TWITTER_ENABLED = False
 
+# Check the Twitter credentials once instead of in every branch that needs them
+REQUIRED_TWITTER_VARS = ("TWITTER_API_KEY", "TWITTER_API_SECRET", "TWITTER_ACCESS_TOKEN", "TWITTER_ACCESS_TOKEN_SECRET")
+_missing = [var for var in REQUIRED_TWITTER_VARS if not os.environ.get(var)]
+
+# Crawling the article pages is the slowest step and the drafts only use what Brave returns,
+# so it is opt-in and limited to the best ranked articles
+ENABLE_CRAWL = os.getenv("ENABLE_CRAWL", "0") == "1"
+CRAWL_TOP_ARTICLES = 3
+
+@dataclass(slots=True)
+class SessionState:
+    """State of the app kept between reruns, stored under a single session state key"""
+    session_id: str
+    transcribed_text: Optional[str] = None
+    articles: Optional[list] = None
+    drafts: Optional[list] = None
+    drafts_by_num: dict = field(default_factory=dict)
+    selected_draft: Optional[dict] = None
+    processing_complete: bool = False
+    user_input: str = ""
+
+@st.cache_data(show_spinner=False)
+def _cached_transcribe(audio_bytes: bytes, file_name: str, _session_id: str) -> str:
+    """Transcribe an uploaded audio file once per content, the session ID is left out of the cache key"""
+    return transcribe_audio_file((file_name, audio_bytes), _session_id)
+
 # Initialize session state
-if 'session_id' not in st.session_state:
-    st.session_state.session_id = str(uuid.uuid4())
-if 'transcribed_text' not in st.session_state:
-    st.session_state.transcribed_text = None
-if 'articles' not in st.session_state:
-    st.session_state.articles = None
-if 'drafts' not in st.session_state:
-    st.session_state.drafts = None
-if 'selected_draft' not in st.session_state:
-    st.session_state.selected_draft = None
-if 'processing_complete' not in st.session_state:
-    st.session_state.processing_complete = False
-if 'user_input' not in st.session_state:
-    st.session_state.user_input = ""
+if 'app_state' not in st.session_state:
+    st.session_state.app_state = SessionState(session_id=token_hex(16))
+state: SessionState = st.session_state.app_state
 
 def reset_state():
     """Reset all state and refresh the page"""
-    # Generate new session ID
-    new_session_id = str(uuid.uuid4())
-    # Clear all session state
+    # Clear all session state, including the widget values
     for key in list(st.session_state.keys()):
         del st.session_state[key]
-    # Set new session ID
-    st.session_state.session_id = new_session_id
-    # Initialize other state variables
-    st.session_state.transcribed_text = None
-    st.session_state.articles = None
-    st.session_state.drafts = None
-    st.session_state.selected_draft = None
-    st.session_state.processing_complete = False
-    st.session_state.user_input = ""
+    # Start over with a new session ID
+    st.session_state.app_state = SessionState(session_id=token_hex(16))
     
     # Clear cache and reload the page
     st.cache_data.clear()
@@ -67,10 +76,10 @@ if input_type == "Voice":
     if audio_file:
         try:
             with st.spinner("🎙️ Transcribing audio..."):
-                transcribed_text = transcribe_audio_file(audio_file, st.session_state.session_id)
+                transcribed_text = _cached_transcribe(audio_file.getvalue(), audio_file.name, state.session_id)
                 if transcribed_text:
                     st.success(f"✅ Transcribed Text: {transcribed_text}")
-                    st.session_state.transcribed_text = transcribed_text
+                    state.transcribed_text = transcribed_text
         except Exception as e:
             st.error(f"❌ Error transcribing audio: {str(e)}")
             if st.button("🔄 Try Again", key="try_again_voice"):
@@ -81,45 +90,61 @@ else:
     # Use session ID in the key to ensure it's unique after reset
     user_input = st.text_input(
         "Enter your request:", 
-        value=st.session_state.user_input,
+        value=state.user_input,
         placeholder="Example: Create a tweet about AI technology",
-        key=f"text_input_{st.session_state.session_id}"
+        key=f"text_input_{state.session_id}"
     )
     if user_input:
-        st.session_state.user_input = user_input
-        st.session_state.transcribed_text = user_input
+        state.user_input = user_input
+        state.transcribed_text = user_input
 
 # Process Input and Generate Drafts
-if st.session_state.transcribed_text:
+if state.transcribed_text:
     try:
-        if not st.session_state.drafts:
+        if not state.drafts:
             with st.spinner("🔍 Fetching relevant articles..."):
                 # Fetch articles
                 articles = fetch_articles_from_brave(
-                    st.session_state.transcribed_text, 
-                    st.session_state.session_id
+                    state.transcribed_text, 
+                    state.session_id
                 )
-                st.session_state.articles = articles
+                state.articles = articles
                 st.success(f"✅ Found {len(articles)} relevant articles")
             
-            with st.spinner("📚 Analyzing article content..."):
-                # Crawl article content
-                enriched_articles = crawl_articles(articles, st.session_state.session_id)
-                st.success("✅ Article content analyzed")
-            
-            with st.spinner("✍️ Generating tweet drafts..."):
-                # Generate drafts
-                drafts = generate_twitter_drafts(enriched_articles, st.session_state.session_id)
-                st.session_state.drafts = drafts
-                st.success("✅ Tweet drafts generated")
-                st.session_state.processing_complete = True
+            # The drafts only use the titles, URLs and descriptions Brave returned,
+            # so the article content is crawled while the drafts are generated
+            with ThreadPoolExecutor(max_workers=1) as pool:
+                if ENABLE_CRAWL:
+                    crawl = pool.submit(crawl_articles, articles[:CRAWL_TOP_ARTICLES], state.session_id)
+
+                with st.spinner("✍️ Generating tweet drafts..."):
+                    # Generate drafts, showing each one as soon as it is written
+                    drafts = []
+                    preview = st.empty()
+                    for draft in stream_twitter_drafts(articles, state.session_id):
+                        drafts.append(draft)
+                        with preview.container():
+                            for written_draft in drafts:
+                                st.write(f"\n🔹 Draft {written_draft['number']}:")
+                                st.info(written_draft["text"])
+                    preview.empty()
+                    state.drafts = drafts
+                    state.drafts_by_num = {draft["number"]: draft for draft in drafts}
+                    st.success("✅ Tweet drafts generated")
+
+                if ENABLE_CRAWL:
+                    with st.spinner("📚 Analyzing article content..."):
+                        # Crawl article content
+                        state.articles = crawl.result() + articles[CRAWL_TOP_ARTICLES:]
+                        st.success("✅ Article content analyzed")
+                state.processing_complete = True
         
         # Display drafts
         st.subheader("📋 Available Tweet Drafts")
         st.write("Enter 0 to cancel, or 1-3 to select a draft:")
         
         # Display all drafts in a clean format
-        for draft in st.session_state.drafts:
+        for draft in state.drafts:
             st.write(f"\n🔹 Draft {draft['number']}:")
             st.info(draft["text"])
             st.write("---")
@@ -127,7 +152,7 @@ if st.session_state.transcribed_text:
         # Simple numeric input for selection
         selected_draft = st.text_input(
             "Your choice (0 to cancel, 1-3 to select):", 
-            key=f"draft_selection_{st.session_state.session_id}"
+            key=f"draft_selection_{state.session_id}"
         )
         
         # Validate input
@@ -138,7 +163,7 @@ if st.session_state.transcribed_text:
                     st.warning("✋ Operation cancelled.")
                     # Log cancellation
                     log_message_to_supabase(
-                        session_id=st.session_state.session_id,
+                        session_id=state.session_id,
                         message_type="user_action",
                         content="User cancelled tweet posting",
                         metadata={"action": "cancel"}
@@ -146,14 +171,11 @@ if st.session_state.transcribed_text:
                     if st.button("🔄 Try Again", key="try_again_cancel"):
                         reset_state()
                         
-                elif draft_num not in [1, 2, 3]:
+                elif draft_num not in state.drafts_by_num:
                     st.error("❌ Please enter 0 to cancel, or 1, 2, 3 to select a draft")
                 else:
                     # Get selected tweet
-                    selected_tweet = next(
-                        draft for draft in st.session_state.drafts 
-                        if draft["number"] == draft_num
-                    )
+                    selected_tweet = state.drafts_by_num[draft_num]
                     
                     # Show confirmation section
                     st.write("\n🔍 Selected Tweet:")
@@ -161,35 +183,22 @@ if st.session_state.transcribed_text:
                     
                     # Log selection
                     log_message_to_supabase(
-                        session_id=st.session_state.session_id,
+                        session_id=state.session_id,
                         message_type="user_action",
                         content=f"Draft {draft_num} selected for review",
                         metadata={"selected_draft": selected_tweet}
                     )
                     
                     if TWITTER_ENABLED:
-                        # Check for Twitter credentials
-                        twitter_creds = all([
-                            os.getenv("TWITTER_API_KEY"),
-                            os.getenv("TWITTER_API_SECRET"),
-                            os.getenv("TWITTER_ACCESS_TOKEN"),
-                            os.getenv("TWITTER_ACCESS_TOKEN_SECRET")
-                        ])
-
-                        if not twitter_creds:
-                            missing_creds = []
-                            if not os.getenv("TWITTER_API_KEY"): missing_creds.append("TWITTER_API_KEY")
-                            if not os.getenv("TWITTER_API_SECRET"): missing_creds.append("TWITTER_API_SECRET")
-                            if not os.getenv("TWITTER_ACCESS_TOKEN"): missing_creds.append("TWITTER_ACCESS_TOKEN")
-                            if not os.getenv("TWITTER_ACCESS_TOKEN_SECRET"): missing_creds.append("TWITTER_ACCESS_TOKEN_SECRET")
-                            st.error(f"❌ Missing Twitter credentials: {', '.join(missing_creds)}")
+                        if _missing:
+                            st.error(f"❌ Missing Twitter credentials: {', '.join(_missing)}")
                             st.info("Please add these credentials to your .env file. See .env.example for instructions.")
                         else:
                             try:
                                 with st.spinner("🐦 Posting to Twitter (X)..."):
                                     result = post_tweet(
                                         selected_tweet['text'],
-                                        st.session_state.session_id
+                                        state.session_id
                                     )
                                     
                                     if result['success']:
@@ -212,7 +221,7 @@ if st.session_state.transcribed_text:
         st.error(f"❌ Error: {str(e)}")
         # Log error
         log_message_to_supabase(
-            session_id=st.session_state.session_id,
+            session_id=state.session_id,
             message_type="error",
             content=f"Error in tweet generation process: {str(e)}"
         )
@@ -1,18 +1,60 @@
 import os
+import atexit
+import logging
+import threading
+from datetime import datetime, timezone
 from supabase import create_client, Client
-from dotenv import load_dotenv
+from env_utils import load_env
 
 # Load environment variables
-load_dotenv()
+load_env()
 
 # Initialize Supabase client
 SUPABASE_URL = os.getenv("SUPABASE_URL")
 SUPABASE_KEY = os.getenv("SUPABASE_KEY")
 supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
 
+logger = logging.getLogger(__name__)
+
+# Logged messages waiting to be inserted. A background thread inserts them in one request
+# every FLUSH_INTERVAL seconds, or as soon as FLUSH_BATCH_SIZE of them are waiting
+FLUSH_INTERVAL = 0.25
+FLUSH_BATCH_SIZE = 25
+_pending_rows: list = []
+_pending_lock = threading.Lock()
+_flush_requested = threading.Event()
+
+def flush_messages():
+    """
+    Insert all queued log messages into the Supabase 'messages' table in a single request.
+    """
+    with _pending_lock:
+        if not _pending_rows:
+            return
+        batch = _pending_rows.copy()
+        _pending_rows.clear()
+    try:
+        supabase.table("messages").insert(batch, returning="minimal").execute()
+    except Exception as e:
+        logger.error("Error logging %d messages to Supabase: %s", len(batch), e)
+
+def _flush_periodically():
+    while True:
+        _flush_requested.wait(FLUSH_INTERVAL)
+        _flush_requested.clear()
+        flush_messages()
+
+threading.Thread(target=_flush_periodically, name="supabase-log-flusher", daemon=True).start()
+# Insert the messages still queued when the process exits
+atexit.register(flush_messages)
+
 def log_message_to_supabase(session_id: str, message_type: str, content: str, metadata: dict = None):
     """
-    Log a message to the Supabase 'messages' table.
+    Queue a message for the Supabase 'messages' table.
+
+    The call does not wait for the database: queued messages are inserted in batches
+    by a background thread, see flush_messages. Each message is stamped with the time
+    it was queued, so messages flushed together keep their order.
 
     Args:
         session_id (str): Unique session identifier.
@@ -20,15 +62,16 @@ def log_message_to_supabase(session_id: str, message_type: str, content: str, me
         content (str): The message content.
         metadata (dict, optional): Additional details (e.g., query params, AI model info).
     """
-    try:
-        message_data = {
-            "type": message_type,
-            "content": content,
-            "metadata": metadata or {}
-        }
-        supabase.table("messages").insert({
+    message_data = {
+        "type": message_type,
+        "content": content,
+        "metadata": metadata or {}
+    }
+    with _pending_lock:
+        _pending_rows.append({
             "session_id": session_id,
-            "message": message_data
-        }).execute()
-    except Exception as e:
-        print(f"Error logging message to Supabase: {e}")
+            "message": message_data,
+            "created_at": datetime.now(timezone.utc).isoformat()
+        })
+        if len(_pending_rows) >= FLUSH_BATCH_SIZE:
+            _flush_requested.set()
@@ -1,5 +1,6 @@
 import os
 import json
+import orjson
 from dotenv import load_dotenv
 from openai import OpenAI
 
@@ -81,10 +82,10 @@ def generate_twitter_drafts(articles):
 
         # Parse JSON response
         text = response.choices[0].message.content.strip()
-        drafts_data = json.loads(text)
+        drafts_data = orjson.loads(text)
 
         return drafts_data["drafts"]
-    except json.JSONDecodeError as e:
+    except orjson.JSONDecodeError as e:
         raise Exception(f"Error parsing JSON response: {str(e)}")
     except Exception as e:
         raise Exception(f"Error generating Twitter drafts: {str(e)}")
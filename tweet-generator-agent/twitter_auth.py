@@ -1,13 +1,14 @@
 import os
 import webbrowser
 import ssl
+from pathlib import Path
 from http.server import HTTPServer, BaseHTTPRequestHandler
 from urllib.parse import parse_qs, urlparse
 import tweepy
-from dotenv import load_dotenv
+from env_utils import load_env
 
 # Load environment variables
-load_dotenv()
+load_env()
 
 # Get credentials from environment variables
 CLIENT_ID = os.getenv("TWITTER_CLIENT_ID")
@@ -17,6 +18,11 @@ CLIENT_SECRET = os.getenv("TWITTER_CLIENT_SECRET")
 CALLBACK_URL = "https://127.0.0.1:8000/callback"
 SCOPES = ["tweet.read", "tweet.write", "users.read", "offline.access"]
 
+# Self-signed certificate of the local callback server, kept between runs
+CERT_DIR = Path("~/.cache/tweet-generator").expanduser()
+CERT_FILE = CERT_DIR / "server.crt"
+KEY_FILE = CERT_DIR / "server.key"
+
 class CallbackHandler(BaseHTTPRequestHandler):
     def do_GET(self):
         """Handle the OAuth callback"""
@@ -82,29 +88,48 @@ class CallbackHandler(BaseHTTPRequestHandler):
         pass
 
 def create_self_signed_cert():
-    """Create a self-signed certificate for HTTPS"""
-    from OpenSSL import crypto
-    from datetime import datetime, timedelta
+    """Create a self-signed certificate for HTTPS, unless the cached one is valid for 30 more days"""
+    from cryptography import x509
+    from cryptography.hazmat.primitives import hashes, serialization
+    from cryptography.hazmat.primitives.asymmetric import ec
+    from cryptography.x509.oid import NameOID
+    from datetime import datetime, timedelta, timezone
+    
+    now = datetime.now(timezone.utc)
+    if CERT_FILE.exists() and KEY_FILE.exists():
+        cert = x509.load_pem_x509_certificate(CERT_FILE.read_bytes())
+        if cert.not_valid_after_utc - now > timedelta(days=30):
+            return
     
-    # Generate key
-    key = crypto.PKey()
-    key.generate_key(crypto.TYPE_RSA, 2048)
+    # Generate key, an EC P-256 key is generated in well under a millisecond
+    key = ec.generate_private_key(ec.SECP256R1())
     
     # Generate certificate
-    cert = crypto.X509()
-    cert.get_subject().CN = "127.0.0.1"
-    cert.set_serial_number(1000)
-    cert.gmtime_adj_notBefore(0)
-    cert.gmtime_adj_notAfter(365*24*60*60)  # Valid for one year
-    cert.set_issuer(cert.get_subject())
-    cert.set_pubkey(key)
-    cert.sign(key, 'sha256')
+    name = x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, "127.0.0.1")])
+    cert = (
+        x509.CertificateBuilder()
+        .subject_name(name)
+        .issuer_name(name)
+        .public_key(key.public_key())
+        .serial_number(1000)
+        .not_valid_before(now)
+        .not_valid_after(now + timedelta(days=365))  # Valid for one year
+        .sign(key, hashes.SHA256())
+    )
     
     # Save certificate and private key
-    with open("server.crt", "wb") as f:
-        f.write(crypto.dump_certificate(crypto.FILETYPE_PEM, cert))
-    with open("server.key", "wb") as f:
-        f.write(crypto.dump_privatekey(crypto.FILETYPE_PEM, key))
+    CERT_DIR.mkdir(mode=0o700, parents=True, exist_ok=True)
+    CERT_FILE.write_bytes(cert.public_bytes(serialization.Encoding.PEM))
+    # The key file is created readable by the owner only, so it is never exposed while written
+    fd = os.open(KEY_FILE, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    with os.fdopen(fd, "wb") as key_file:
+        # Also restrict a key file left by an older version before writing the new key
+        os.fchmod(key_file.fileno(), 0o600)
+        key_file.write(key.private_bytes(
+            serialization.Encoding.PEM,
+            serialization.PrivateFormat.PKCS8,
+            serialization.NoEncryption()
+        ))
 
 def main():
     """Main function to handle Twitter OAuth 2.0 authentication"""
@@ -136,7 +161,7 @@ def main():
         
         # Create SSL context
         context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
-        context.load_cert_chain(certfile="server.crt", keyfile="server.key")
+        context.load_cert_chain(certfile=CERT_FILE, keyfile=KEY_FILE)
         
         # Wrap socket with SSL context
         server.socket = context.wrap_socket(server.socket, server_side=True)
@@ -159,12 +184,6 @@ def main():
         print(f"\n❌ Error: {str(e)}")
     
     finally:
-        # Clean up certificate files
-        try:
-            os.remove("server.crt")
-            os.remove("server.key")
-        except:
-            pass
         print("\nYou can close this window now.")
 
 if __name__ == "__main__":
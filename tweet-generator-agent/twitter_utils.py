@@ -1,14 +1,19 @@
 import os
+import functools
 import tweepy
-from dotenv import load_dotenv
+from env_utils import load_env
 from supabase_utils import log_message_to_supabase
 
 # Load environment variables
-load_dotenv()
+load_env()
 
+@functools.lru_cache(maxsize=1)
 def get_twitter_client():
     """
     Initialize and return a Twitter API client using OAuth 1.0a.
+
+    The client is created and verified once, then reused so every tweet is posted
+    over the same kept-alive connection. Failures are not cached.
     """
     # Get credentials from environment variables
     api_key = os.getenv("TWITTER_API_KEY")
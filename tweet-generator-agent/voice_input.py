@@ -1,5 +1,9 @@
 import speech_recognition as sr
 
+# One recognizer per process, calibrated to the ambient noise the first time the microphone is opened
+_recognizer = sr.Recognizer()
+_calibrated = False
+
 def capture_voice_input():
     """
     Capture and transcribe voice input using the SpeechRecognition library.
@@ -7,9 +11,14 @@ def capture_voice_input():
     Returns:
         str: Transcribed text from the user's voice input.
     """
-    recognizer = sr.Recognizer()
+    global _calibrated
+    recognizer = _recognizer
     try:
         with sr.Microphone() as source:
+            if not _calibrated:
+                # Sets the energy threshold used to tell speech from silence
+                recognizer.adjust_for_ambient_noise(source, duration=0.5)
+                _calibrated = True
             print("Listening... Please speak into the microphone.")
             audio = recognizer.listen(source, timeout=10)  # Timeout after 10 seconds
             print("Processing voice input...")
@@ -1,13 +1,23 @@
 from fastapi import FastAPI, HTTPException, Depends
+from fastapi.responses import StreamingResponse
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
 import os
+import re
+import functools
+import asyncio
+import atexit
+import threading
 from typing import Optional
-from datetime import datetime
+from datetime import datetime, timezone
+from concurrent.futures import ThreadPoolExecutor
+from cachetools import TTLCache
 import googleapiclient.discovery
 import googleapiclient.errors
-from youtube_transcript_api import YouTubeTranscriptApi
+import httplib2
+import httpx
+from youtube_transcript_api import YouTubeTranscriptApi, CouldNotRetrieveTranscript
 import openai
 from dotenv import load_dotenv
 import logging
@@ -45,8 +55,10 @@ class AgentResponse(BaseModel):
     error: Optional[str] = None
 
 # Authentication
+API_BEARER_TOKEN = os.getenv("API_BEARER_TOKEN")
+
 async def verify_token(credentials: HTTPAuthorizationCredentials = Depends(security)):
-    if credentials.credentials != os.getenv("API_BEARER_TOKEN"):
+    if credentials.credentials != API_BEARER_TOKEN:
         raise HTTPException(status_code=401, detail="Invalid token")
     return credentials
 
@@ -56,19 +68,75 @@ supabase: Client = create_client(
     os.getenv("SUPABASE_KEY")
 )
 
+# Messages waiting to be stored. A background thread inserts them in one request
+# every FLUSH_INTERVAL seconds, or as soon as FLUSH_BATCH_SIZE of them are waiting
+FLUSH_INTERVAL = 0.25
+FLUSH_BATCH_SIZE = 100
+# Failed batches are queued again, but at most MAX_PENDING_ROWS messages are kept while
+# the database is unreachable
+MAX_PENDING_ROWS = 10_000
+_pending_rows: list = []
+_pending_lock = threading.Lock()
+_flush_requested = threading.Event()
+
+def flush_messages():
+    """Inserts all queued messages into the Supabase 'messages' table in a single request."""
+    with _pending_lock:
+        if not _pending_rows:
+            return
+        batch = _pending_rows.copy()
+        _pending_rows.clear()
+    try:
+        supabase.table("messages").insert(batch, returning="minimal").execute()
+    except httpx.TransportError as e:
+        # The database could not be reached: retry the batch ahead of newer messages
+        with _pending_lock:
+            _pending_rows[:0] = batch
+            dropped = len(_pending_rows) - MAX_PENDING_ROWS
+            if dropped > 0:
+                del _pending_rows[:dropped]
+        logger.error(f"Failed to store {len(batch)} messages, retrying: {str(e)}")
+        if dropped > 0:
+            logger.error(f"Dropped the {dropped} oldest queued messages")
+    except Exception as e:
+        sessions = sorted({row["session_id"] for row in batch})
+        logger.error(f"Failed to store {len(batch)} messages of sessions {sessions}: {str(e)}")
+
+def _flush_periodically():
+    while True:
+        _flush_requested.wait(FLUSH_INTERVAL)
+        _flush_requested.clear()
+        flush_messages()
+
+threading.Thread(target=_flush_periodically, name="supabase-message-flusher", daemon=True).start()
+# Store the messages still queued when the process exits
+atexit.register(flush_messages)
+
+@app.on_event("shutdown")
+def flush_pending_messages():
+    flush_messages()
+
 # Update store_message function
 def store_message(session_id: str, message_type: str, content: str, data: Optional[dict] = None):
+    """
+    Queues a message for the Supabase 'messages' table without waiting for the database.
+    The message is stamped with the time it was queued, so messages flushed together keep their order.
+    """
     message = {
         "type": message_type,
         "content": content
     }
     if data:
         message["data"] = data
-        
-    supabase.table("messages").insert({
-        "session_id": session_id,
-        "message": message
-    }).execute()
+
+    with _pending_lock:
+        _pending_rows.append({
+            "session_id": session_id,
+            "message": message,
+            "created_at": datetime.now(timezone.utc).isoformat()
+        })
+        if len(_pending_rows) >= FLUSH_BATCH_SIZE:
+            _flush_requested.set()
 
 # YouTube API Setup
 youtube = googleapiclient.discovery.build(
@@ -77,12 +145,68 @@ youtube = googleapiclient.discovery.build(
     developerKey=os.getenv("YOUTUBE_API_KEY")
 )
 
+# httplib2 connections are not thread-safe, so every worker thread running YouTube API
+# requests gets its own, kept alive between the requests that thread executes.
+# A stalled connection fails after YOUTUBE_HTTP_TIMEOUT seconds instead of holding the thread
+YOUTUBE_HTTP_TIMEOUT = 10
+_youtube_http = threading.local()
+
+def execute(request):
+    """Executes a YouTube API request over the calling thread's own HTTP connection."""
+    http = getattr(_youtube_http, "http", None)
+    if http is None:
+        http = _youtube_http.http = httplib2.Http(timeout=YOUTUBE_HTTP_TIMEOUT)
+    return request.execute(http=http)
+
+# Responses of the video and comment requests, keyed by request kind and video ID.
+# Repeated queries for the same video within YOUTUBE_CACHE_TTL seconds skip the API
+YOUTUBE_CACHE_TTL = 300
+_youtube_cache = TTLCache(maxsize=1024, ttl=YOUTUBE_CACHE_TTL)
+_youtube_cache_lock = threading.Lock()
+
+def cached_execute(key: tuple, request):
+    """Executes a YouTube API request, or returns the response cached for the same key."""
+    with _youtube_cache_lock:
+        response = _youtube_cache.get(key)
+    if response is None:
+        response = execute(request)
+        with _youtube_cache_lock:
+            _youtube_cache[key] = response
+    return response
+
 # OpenAI API Setup
 openai.api_key = os.getenv("OPENAI_API_KEY")
 
-def get_latest_video(playlist_id):
-    """Fetches the most recent video from a public YouTube playlist."""
-    # Get video basic info from playlist
+# Worker threads fetching comments concurrently with the video details
+_comments_pool = ThreadPoolExecutor(max_workers=8, thread_name_prefix="youtube-comments")
+
+def get_top_comments(video_id):
+    """Fetches the top comments of a video, or an empty list if they cannot be fetched."""
+    try:
+        logger.info("Fetching video comments")
+        comments_request = youtube.commentThreads().list(
+            part="snippet",
+            videoId=video_id,
+            order="relevance",
+            maxResults=5
+        )
+        comments_response = cached_execute(("comments", video_id), comments_request)
+        top_comments = [
+            {
+                "author": item["snippet"]["topLevelComment"]["snippet"]["authorDisplayName"],
+                "text": item["snippet"]["topLevelComment"]["snippet"]["textDisplay"],
+                "likes": item["snippet"]["topLevelComment"]["snippet"]["likeCount"]
+            }
+            for item in comments_response.get("items", [])
+        ]
+        logger.info(f"Found {len(top_comments)} comments")
+        return top_comments
+    except Exception as e:
+        logger.error(f"Error fetching comments: {str(e)}")
+        return []
+
+def get_latest_video_id(playlist_id):
+    """Fetches the ID of the most recent video from a public YouTube playlist."""
     try:
         logger.info(f"Fetching playlist items for playlist ID: {playlist_id}")
         request = youtube.playlistItems().list(
@@ -90,85 +214,18 @@ def get_latest_video(playlist_id):
             playlistId=playlist_id,
             maxResults=1
         )
-        response = request.execute()
-        logger.info(f"Playlist API response snippet: {response['items'][0]['snippet']}")
+        response = execute(request)
         
         if "items" not in response or not response["items"]:
             logger.error("No items found in playlist response")
             return None
+        logger.info(f"Playlist API response snippet: {response['items'][0]['snippet']}")
         
-        video = response["items"][0]["snippet"]
-        video_id = video["resourceId"]["videoId"]
+        video_id = response["items"][0]["snippet"]["resourceId"]["videoId"]
         logger.info(f"Found video ID: {video_id}")
-        
-        # Get additional video statistics and details
-        logger.info("Fetching video statistics")
-        video_request = youtube.videos().list(
-            part="statistics,snippet,contentDetails,topicDetails,status",
-            id=video_id
-        )
-        video_response = video_request.execute()
-        logger.info(f"Video details snippet: {video_response['items'][0]['snippet']}")
-        
-        if not video_response["items"]:
-            logger.error("No video details found")
-            return None
-            
-        video_item = video_response["items"][0]  # Get the whole video item
-        video_details = video_item["snippet"]    # Get snippet for title, description etc
-        video_stats = video_item["statistics"]   # Get statistics separately
-        video_content = video_item["contentDetails"]
-        
-        # Use the channel info from the video details
-        channel_name = video["videoOwnerChannelTitle"]
-        
-        # Get top comments
-        try:
-            logger.info("Fetching video comments")
-            comments_request = youtube.commentThreads().list(
-                part="snippet",
-                videoId=video_id,
-                order="relevance",
-                maxResults=5
-            )
-            comments_response = comments_request.execute()
-            top_comments = [
-                {
-                    "author": item["snippet"]["topLevelComment"]["snippet"]["authorDisplayName"],
-                    "text": item["snippet"]["topLevelComment"]["snippet"]["textDisplay"],
-                    "likes": item["snippet"]["topLevelComment"]["snippet"]["likeCount"]
-                }
-                for item in comments_response.get("items", [])
-            ]
-            logger.info(f"Found {len(top_comments)} comments")
-        except Exception as e:
-            logger.error(f"Error fetching comments: {str(e)}")
-            top_comments = []
-        
-        return {
-            "video_id": video_id,
-            "title": video_details["title"],
-            "description": video_details["description"],
-            "published_at": video_details["publishedAt"],
-            "channel_name": channel_name,
-            "view_count": video_stats.get("viewCount", "N/A"),
-            "like_count": video_stats.get("likeCount", "N/A"),
-            "comment_count": video_stats.get("commentCount", "N/A"),
-            "top_comments": top_comments,
-            "duration": video_content["duration"],  # Video length in ISO 8601 format
-            "tags": video_details.get("tags", []),  # Keywords/tags
-            "category_id": video_details.get("categoryId", "N/A"),  # YouTube category
-            "language": video_details.get("defaultLanguage", "N/A"),
-            "made_for_kids": video_item["status"]["madeForKids"],
-            "privacy_status": video_item["status"]["privacyStatus"],
-            "definition": video_content["definition"],  # HD or SD
-            "caption": video_content["caption"],  # Has captions?
-            "licensed_content": video_content.get("licensedContent", False),
-            "projection": video_content["projection"],  # 360° video?
-            "topics": video_item.get("topicDetails", {}).get("topicCategories", [])
-        }
+        return video_id
     except Exception as e:
-        logger.error(f"Error in get_latest_video: {str(e)}")
+        logger.error(f"Error in get_latest_video_id: {str(e)}")
         raise
 
 def get_video_transcript(video_id):
@@ -176,17 +233,32 @@ def get_video_transcript(video_id):
     try:
         transcript = YouTubeTranscriptApi.get_transcript(video_id)
         return " ".join([t["text"] for t in transcript])
-    except:
-        return None  # No transcript available
+    except CouldNotRetrieveTranscript as e:
+        # Transcripts disabled, none in a supported language, video unavailable...
+        logger.info(f"No transcript for video {video_id}: {type(e).__name__}")
+        return None
 
-def summarize_text(text, video_data):
-    """Summarizes the transcript using OpenAI GPT, with video metadata for context."""
+def summary_messages(text, video_data, partial_summaries=False):
+    """
+    Builds the chat messages asking OpenAI GPT to summarize the transcript, with video metadata for context.
+    With partial_summaries, text holds the summaries of consecutive parts of the transcript to combine.
+    """
     system_prompt = """You are an AI that summarizes YouTube videos. 
     Provide a clear, informative summary that captures the key points and maintains accuracy, 
     especially regarding technical terms, proper nouns, and people mentioned. 
     The channel name often indicates the primary content creator or presenter - use this context 
     to accurately attribute statements and actions in the video."""
 
+    if partial_summaries:
+        request = """Using this context, please combine the following summaries of consecutive parts 
+of the video's transcript into one accurate summary of the whole video, 
+being especially careful to correctly attribute who is speaking or presenting:
+"""
+    else:
+        request = """Using this context, please provide an accurate summary of the following transcript, 
+being especially careful to correctly attribute who is speaking or presenting:
+"""
+
     context = f"""Video Title: {video_data['title']}
 Channel: {video_data['channel_name']} (This is likely the presenter/creator's channel)
 Description: {video_data['description']}
@@ -197,22 +269,119 @@ Topics: {', '.join(video_data['topics']) if video_data['topics'] else 'None'}
 Language: {video_data['language']}
 Has Captions: {'Yes' if video_data['caption'] == 'true' else 'No'}
 
-Using this context, please provide an accurate summary of the following transcript, 
-being especially careful to correctly attribute who is speaking or presenting:
+""" + request
+
+    return [
+        {"role": "system", "content": system_prompt},
+        {"role": "user", "content": context + text}
+    ]
+
+def chunk_messages(chunk, part, parts, video_data):
+    """Builds the chat messages asking OpenAI GPT to summarize one part of a long transcript."""
+    system_prompt = """You summarize one part of a long YouTube video transcript. 
+    Your summary will be combined with the summaries of the other parts, so only cover this part: 
+    keep its key points in order, and keep technical terms, proper nouns and people mentioned exact. 
+    Do not introduce or conclude the video."""
+
+    context = f"""Video Title: {video_data['title']}
+Channel: {video_data['channel_name']} (This is likely the presenter/creator's channel)
+
+Summarize part {part} of {parts} of the transcript:
 """
 
-    response = openai.ChatCompletion.create(
+    return [
+        {"role": "system", "content": system_prompt},
+        {"role": "user", "content": context + chunk}
+    ]
+
+# Transcripts longer than this are split into chunks of at most this many characters
+# (about 8k tokens), summarized concurrently, and the summary is written from the chunk summaries
+TRANSCRIPT_CHUNK_CHARS = 32_000
+# At most this many transcript chunks, across all requests, are summarized at the same time,
+# so very long videos do not run into the OpenAI rate limits
+TRANSCRIPT_CHUNK_CONCURRENCY = 4
+_chunk_semaphore = asyncio.Semaphore(TRANSCRIPT_CHUNK_CONCURRENCY)
+
+def split_transcript(text, size=TRANSCRIPT_CHUNK_CHARS):
+    """Splits a transcript into chunks of at most `size` characters, between words."""
+    chunks = []
+    while len(text) > size:
+        cut = text.rfind(" ", 0, size)
+        if cut <= 0:
+            cut = size
+        chunks.append(text[:cut])
+        text = text[cut:].lstrip()
+    chunks.append(text)
+    return chunks
+
+async def summarize_chunk(chunk, part, parts, video_data):
+    """Summarizes one part of a long transcript using OpenAI GPT."""
+    async with _chunk_semaphore:
+        response = await openai.ChatCompletion.acreate(
+            model="gpt-4-turbo",
+            messages=chunk_messages(chunk, part, parts, video_data)
+        )
+    return response["choices"][0]["message"]["content"]
+
+async def transcript_messages(text, video_data):
+    """
+    Builds the chat messages summarizing the transcript. A long transcript is condensed first:
+    its chunks are summarized and the final summary is written from the chunk summaries in order.
+    """
+    if len(text) <= TRANSCRIPT_CHUNK_CHARS:
+        return summary_messages(text, video_data)
+    chunks = split_transcript(text)
+    logger.info(f"Summarizing a {len(text)} character transcript in {len(chunks)} chunks")
+    summaries = await asyncio.gather(
+        *(summarize_chunk(chunk, i, len(chunks), video_data) for i, chunk in enumerate(chunks, 1))
+    )
+    condensed = "\n\n".join(
+        f"[Summary of part {i} of {len(chunks)}]\n{summary}"
+        for i, summary in enumerate(summaries, 1)
+    )
+    return summary_messages(condensed, video_data, partial_summaries=True)
+
+async def summarize_text(text, video_data):
+    """Summarizes the transcript using OpenAI GPT, with video metadata for context."""
+    response = await openai.ChatCompletion.acreate(
         model="gpt-4-turbo",
-        messages=[
-            {"role": "system", "content": system_prompt},
-            {"role": "user", "content": context + text}
-        ]
+        messages=await transcript_messages(text, video_data)
     )
     return response["choices"][0]["message"]["content"]
 
-def process_playlist(playlist_id):
+async def stream_summary(text, video_data):
+    """Summarizes the transcript like summarize_text, yielding the summary as it is generated."""
+    response = await openai.ChatCompletion.acreate(
+        model="gpt-4-turbo",
+        messages=await transcript_messages(text, video_data),
+        stream=True
+    )
+    async for chunk in response:
+        content = chunk["choices"][0]["delta"].get("content")
+        if content:
+            yield content
+
+async def fetch_video(id_type: str, content_id: str):
+    """
+    Fetches the metadata and transcript of a video, or of the latest video of a playlist.
+    Returns tuple of (video_data, transcript), video_data is None if no video was found
+    """
+    if id_type == "video":
+        video_id = content_id
+    else:
+        video_id = await asyncio.to_thread(get_latest_video_id, content_id)
+        if not video_id:
+            return None, None
+
+    # The details and the transcript only need the video ID, so they are fetched concurrently
+    return await asyncio.gather(
+        asyncio.to_thread(get_video_details, video_id),
+        asyncio.to_thread(get_video_transcript, video_id)
+    )
+
+async def process_playlist(playlist_id):
     """Main function to process the latest video from a playlist."""
-    video_data = get_latest_video(playlist_id)
+    video_data, transcript = await fetch_video("playlist", playlist_id)
     if not video_data:
         # Return a properly structured error response
         return {
@@ -227,8 +396,7 @@ def process_playlist(playlist_id):
             "summary": "No videos found in the playlist."
         }
 
-    transcript = get_video_transcript(video_data["video_id"])
-    summary = summarize_text(transcript, video_data) if transcript else "Transcript unavailable."
+    summary = await summarize_text(transcript, video_data) if transcript else "Transcript unavailable."
 
     # Return all metadata fields
     return {
@@ -236,8 +404,24 @@ def process_playlist(playlist_id):
         "summary": summary
     }
 
+# ISO 8601 duration of a video, e.g. PT1H2M3S
+_DURATION_RE = re.compile(r"PT(?:(\d+)H)?(?:(\d+)M)?(?:(\d+)S)?$")
+
+# Wikipedia topic category URLs, e.g. https://en.wikipedia.org/wiki/Video_game_culture
+_TOPIC_RE = re.compile(r"wikipedia\.org/wiki/(.*)")
+
+@functools.lru_cache(maxsize=1024)
+def topic_name(topic_url):
+    """Returns the name of a Wikipedia topic URL, or None for any other URL. Topics repeat across videos."""
+    match = _TOPIC_RE.search(topic_url)
+    return match[1].replace("_", " ") if match else None
+
 def format_response(result):
     """Formats the video information and summary into a readable response."""
+    return format_header(result) + result['summary'] + format_comments(result)
+
+def format_header(result):
+    """Formats the video information shown before the summary."""
     # Format the date
     published_date = datetime.fromisoformat(result["published_at"].replace('Z', '+00:00'))
     formatted_date = published_date.strftime("%B %d, %Y")
@@ -250,21 +434,10 @@ def format_response(result):
     
     # Format duration from ISO 8601 to readable format
     duration = result.get("duration", "N/A")
-    if duration.startswith("PT"):
-        # Remove the "PT" prefix
-        duration = duration[2:]
-        # Convert XhYmZs format to readable string
-        hours = "0"
-        minutes = "0"
-        seconds = "0"
-        
-        if "H" in duration:
-            hours, duration = duration.split("H")
-        if "M" in duration:
-            minutes, duration = duration.split("M")
-        if "S" in duration:
-            seconds = duration.replace("S", "")
-            
+    duration_match = _DURATION_RE.match(duration)
+    if duration_match:
+        # Convert PTxHyMzS format to readable string
+        hours, minutes, seconds = duration_match.groups(default="0")
         if hours != "0":
             duration = f"{hours}:{minutes.zfill(2)}:{seconds.zfill(2)}"
         else:
@@ -273,14 +446,10 @@ def format_response(result):
     # Format tags and topics
     tags = ", ".join(result.get("tags", [])[:5]) if result.get("tags") else "None"
     # Clean up topic URLs to just show the topic name
-    topics = []
-    for topic in result.get("topics", []):
-        if "wikipedia.org/wiki/" in topic:
-            topic_name = topic.split("/wiki/")[-1].replace("_", " ")
-            topics.append(topic_name)
+    topics = [name for name in map(topic_name, result.get("topics", [])) if name]
     topics = ", ".join(topics) if topics else "None"
     
-    response = f"""Here's a summary of the latest video:
+    return f"""Here's a summary of the latest video:
 
 📺 Title: {result['title']}
 👤 Channel: {result['channel_name']}
@@ -292,17 +461,27 @@ def format_response(result):
 🗣️ Captions: {'Available' if result.get('caption') == 'true' else 'Not Available'}
 
 📝 Summary:
-{result['summary']}
-
-💬 Top Comments:"""
+"""
 
+def format_comments(result):
+    """Formats the top comments shown after the summary."""
+    lines = ["\n\n💬 Top Comments:"]
     if result["top_comments"]:
-        for i, comment in enumerate(result["top_comments"], 1):
-            response += f"\n{i}. {comment['text']} - {comment['author']}"
+        lines.extend(
+            f"{i}. {comment['text']} - {comment['author']}"
+            for i, comment in enumerate(result["top_comments"], 1)
+        )
     else:
-        response += "\nNo comments available"
+        lines.append("No comments available")
     
-    return response
+    return "\n".join(lines)
+
+# Playlist URLs, video URLs and short video URLs, capturing the ID up to the next query parameter
+_YOUTUBE_URL_RE = re.compile(
+    r"playlist\?list=(?P<playlist>[^&]*)"
+    r"|watch\?v=(?P<video>[^&]*)"
+    r"|youtu\.be/(?P<short>[^?]*)"
+)
 
 def extract_youtube_id(query: str) -> tuple[str, str]:
     """
@@ -311,26 +490,18 @@ def extract_youtube_id(query: str) -> tuple[str, str]:
     """
     query = query.strip()
     
-    # Handle different URL patterns
-    if "youtube.com" in query or "youtu.be" in query:
-        if "playlist?list=" in query:
-            # Playlist URL
-            playlist_id = query.split("playlist?list=")[-1].split("&")[0]
-            return ("playlist", playlist_id)
-        elif "watch?v=" in query:
-            # Video URL
-            video_id = query.split("watch?v=")[-1].split("&")[0]
-            return ("video", video_id)
-        elif "youtu.be/" in query:
-            # Short video URL
-            video_id = query.split("youtu.be/")[-1].split("?")[0]
-            return ("video", video_id)
+    # Handle different URL patterns in a single scan of the query
+    match = _YOUTUBE_URL_RE.search(query)
+    if match:
+        if match["playlist"] is not None:
+            return ("playlist", match["playlist"])
+        return ("video", match["video"] or match["short"])
+
+    # Assume it's a direct ID - check length to guess type
+    if len(query) == 11:  # Standard YouTube video ID length
+        return ("video", query)
     else:
-        # Assume it's a direct ID - check length to guess type
-        if len(query) == 11:  # Standard YouTube video ID length
-            return ("video", query)
-        else:
-            return ("playlist", query)
+        return ("playlist", query)
 
 @app.post("/api/youtube-summary-agent", response_model=AgentResponse)
 async def process_request(
@@ -341,21 +512,17 @@ async def process_request(
         logger.info(f"Processing request for session {request.session_id}")
         
         # Store user's message
-        try:
-            store_message(request.session_id, "human", request.query)
-            logger.info("Successfully stored user message")
-        except Exception as e:
-            logger.error(f"Failed to store user message: {str(e)}")
-            raise
+        store_message(request.session_id, "human", request.query)
+        logger.info("Queued user message")
 
         # Extract ID and type from query
         id_type, content_id = extract_youtube_id(request.query)
         logger.info(f"Processing {id_type} with ID: {content_id}")
         
         if id_type == "video":
-            result = process_video(content_id)
+            result = await process_video(content_id)
         else:  # playlist
-            result = process_playlist(content_id)
+            result = await process_playlist(content_id)
         
         # Store agent's response with additional data
         response_data = {
@@ -366,17 +533,13 @@ async def process_request(
         
         response_text = format_response(result)
         
-        try:
-            store_message(
-                request.session_id, 
-                "ai", 
-                response_text,
-                response_data
-            )
-            logger.info("Successfully stored AI response")
-        except Exception as e:
-            logger.error(f"Failed to store AI response: {str(e)}")
-            raise
+        store_message(
+            request.session_id, 
+            "ai", 
+            response_text,
+            response_data
+        )
+        logger.info("Queued AI response")
         
         return AgentResponse(
             response=response_text,
@@ -392,75 +555,59 @@ async def process_request(
             error=error_message
         )
 
-def process_video(video_id: str):
+@app.post("/api/youtube-summary-agent/stream")
+async def stream_request(
+    request: AgentRequest,
+    credentials: HTTPAuthorizationCredentials = Depends(verify_token)
+):
+    """
+    Returns the same response as /api/youtube-summary-agent as streamed plain text.
+    The video information is sent as soon as it is fetched and the summary as it is generated.
+    """
+    logger.info(f"Streaming request for session {request.session_id}")
+    store_message(request.session_id, "human", request.query)
+
+    id_type, content_id = extract_youtube_id(request.query)
+    logger.info(f"Processing {id_type} with ID: {content_id}")
+    video_data, transcript = await fetch_video(id_type, content_id)
+    if video_data is None:
+        raise HTTPException(status_code=404, detail=f"No video found for {id_type} {content_id}")
+
+    async def generate():
+        yield format_header(video_data)
+        if transcript:
+            summary_parts = []
+            async for content in stream_summary(transcript, video_data):
+                summary_parts.append(content)
+                yield content
+            summary = "".join(summary_parts)
+        else:
+            summary = "Transcript unavailable."
+            yield summary
+        result = {**video_data, "summary": summary}
+        yield format_comments(result)
+
+        store_message(
+            request.session_id,
+            "ai",
+            format_response(result),
+            {
+                "video_title": result["title"],
+                "published_at": result["published_at"],
+                "video_description": result["description"]
+            }
+        )
+
+    return StreamingResponse(generate(), media_type="text/plain; charset=utf-8")
+
+async def process_video(video_id: str):
     """Process a single video by ID."""
     try:
-        # Get video details
-        video_request = youtube.videos().list(
-            part="statistics,snippet,contentDetails,topicDetails,status",
-            id=video_id
-        )
-        video_response = video_request.execute()
-        
-        if not video_response["items"]:
-            logger.error("No video found with ID: {video_id}")
+        video_data, transcript = await fetch_video("video", video_id)
+        if video_data is None:
             return None
-            
-        video_item = video_response["items"][0]
-        video_details = video_item["snippet"]
-        video_stats = video_item["statistics"]
-        video_content = video_item["contentDetails"]
-        
-        # Get top comments
-        try:
-            logger.info("Fetching video comments")
-            comments_request = youtube.commentThreads().list(
-                part="snippet",
-                videoId=video_id,
-                order="relevance",
-                maxResults=5
-            )
-            comments_response = comments_request.execute()
-            top_comments = [
-                {
-                    "author": item["snippet"]["topLevelComment"]["snippet"]["authorDisplayName"],
-                    "text": item["snippet"]["topLevelComment"]["snippet"]["textDisplay"],
-                    "likes": item["snippet"]["topLevelComment"]["snippet"]["likeCount"]
-                }
-                for item in comments_response.get("items", [])
-            ]
-            logger.info(f"Found {len(top_comments)} comments")
-        except Exception as e:
-            logger.error(f"Error fetching comments: {str(e)}")
-            top_comments = []
-        
-        # Build video data dictionary
-        video_data = {
-            "video_id": video_id,
-            "title": video_details["title"],
-            "description": video_details["description"],
-            "published_at": video_details["publishedAt"],
-            "channel_name": video_details["channelTitle"],
-            "view_count": video_stats.get("viewCount", "N/A"),
-            "like_count": video_stats.get("likeCount", "N/A"),
-            "comment_count": video_stats.get("commentCount", "N/A"),
-            "top_comments": top_comments,
-            "duration": video_content["duration"],
-            "tags": video_details.get("tags", []),
-            "category_id": video_details.get("categoryId", "N/A"),
-            "language": video_details.get("defaultLanguage", "N/A"),
-            "made_for_kids": video_item["status"]["madeForKids"],
-            "privacy_status": video_item["status"]["privacyStatus"],
-            "definition": video_content["definition"],
-            "caption": video_content["caption"],
-            "licensed_content": video_content.get("licensedContent", False),
-            "projection": video_content["projection"],
-            "topics": video_item.get("topicDetails", {}).get("topicCategories", [])
-        }
-        
-        # Get and process transcript
-        transcript = get_video_transcript(video_id)
-        summary = summarize_text(transcript, video_data) if transcript else "Transcript unavailable."
+
+        summary = await summarize_text(transcript, video_data) if transcript else "Transcript unavailable."
         
         return {
             **video_data,
@@ -471,6 +618,54 @@ def process_video(video_id: str):
         logger.error(f"Error processing video: {str(e)}")
         raise
 
+def get_video_details(video_id: str):
+    """Fetches the details and top comments of a single video by ID."""
+    # The comments only need the video ID, so they are fetched while the details are
+    comments_future = _comments_pool.submit(get_top_comments, video_id)
+
+    # Get video details
+    video_request = youtube.videos().list(
+        part="statistics,snippet,contentDetails,topicDetails,status",
+        id=video_id
+    )
+    video_response = cached_execute(("videos", video_id), video_request)
+    
+    if not video_response["items"]:
+        logger.error(f"No video found with ID: {video_id}")
+        return None
+        
+    video_item = video_response["items"][0]
+    video_details = video_item["snippet"]
+    video_stats = video_item["statistics"]
+    video_content = video_item["contentDetails"]
+    
+    # Wait for the comments requested alongside the video details
+    top_comments = comments_future.result()
+    
+    # Build video data dictionary
+    return {
+        "video_id": video_id,
+        "title": video_details["title"],
+        "description": video_details["description"],
+        "published_at": video_details["publishedAt"],
+        "channel_name": video_details["channelTitle"],
+        "view_count": video_stats.get("viewCount", "N/A"),
+        "like_count": video_stats.get("likeCount", "N/A"),
+        "comment_count": video_stats.get("commentCount", "N/A"),
+        "top_comments": top_comments,
+        "duration": video_content["duration"],
+        "tags": video_details.get("tags", []),
+        "category_id": video_details.get("categoryId", "N/A"),
+        "language": video_details.get("defaultLanguage", "N/A"),
+        "made_for_kids": video_item["status"]["madeForKids"],
+        "privacy_status": video_item["status"]["privacyStatus"],
+        "definition": video_content["definition"],
+        "caption": video_content["caption"],
+        "licensed_content": video_content.get("licensedContent", False),
+        "projection": video_content["projection"],
+        "topics": video_item.get("topicDetails", {}).get("topicCategories", [])
+    }
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8001)